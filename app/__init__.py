@@ -4,7 +4,7 @@ from dotenv import load_dotenv
 from flask import Flask
 
 from .config import DevelopmentConfig, ProductionConfig, TestingConfig
-from .extensions import db, migrate, ma, login_manager, init_scheduler
+from .extensions import db, migrate, ma, login_manager, init_scheduler, configure_sqlite
 from flask_login import AnonymousUserMixin
 from .logging_config import configure_logging
 from .error_handlers import register_error_handlers
@@ -28,6 +28,7 @@ def create_app(config_name: str | None = None) -> Flask:
 
     # Configure logging and extensions
     configure_logging(app)
+    configure_sqlite(app)
     db.init_app(app)
     migrate.init_app(app, db)
     ma.init_app(app)
@@ -40,6 +41,12 @@ def create_app(config_name: str | None = None) -> Flask:
         from .models import User
         return db.session.get(User, user_id)
 
+    # Graph revision tracking (session events bump Project.revision on graph writes)
+    from .services import revisions  # noqa: F401
+    from .services import graph_cache  # noqa: F401
+    # R*Tree mirror of node_layout (created with the table; see services.spatial)
+    from .services import spatial  # noqa: F401
+
     # Register blueprints
     from .blueprints.main.routes import bp as main_bp
     from .blueprints.graph.routes import bp as graph_bp
@@ -55,6 +62,10 @@ def create_app(config_name: str | None = None) -> Flask:
     app.register_blueprint(users_bp)
     app.register_blueprint(settings_bp)
 
+    # Deferred derived-field recomputation (RECOMPUTE_MODE)
+    from .services import recompute_queue
+    recompute_queue.init_app(app)
+
     # Error handlers
     register_error_handlers(app)
     register_cli(app)
@@ -69,6 +80,7 @@ def create_app(config_name: str | None = None) -> Flask:
     try:
         if app.config.get("SCHEDULER_ENABLED", True):
             init_scheduler(app)
+            _schedule_sqlite_maintenance(app)
         else:
             app.logger.info('[scheduler] disabled by config')
     except Exception:
@@ -76,3 +88,26 @@ def create_app(config_name: str | None = None) -> Flask:
 
     return app
 
+
+
+def _schedule_sqlite_maintenance(app: Flask) -> None:
+    """Register the periodic WAL checkpoint/optimize job for SQLite databases."""
+    from . import extensions as ext
+    from .services.scheduler_jobs import sqlite_maintenance_job
+
+    minutes = int(app.config.get("SQLITE_MAINTENANCE_MINUTES") or 0)
+    uri = (app.config.get("SQLALCHEMY_DATABASE_URI") or "").lower()
+    if ext.scheduler is None or minutes <= 0 or not uri.startswith("sqlite:") or ":memory:" in uri:
+        return
+    try:
+        from apscheduler.triggers.interval import IntervalTrigger  # type: ignore
+        ext.scheduler.add_job(
+            sqlite_maintenance_job,
+            trigger=IntervalTrigger(minutes=minutes),
+            id="sqlite_maintenance",
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
+    except Exception:
+        app.logger.exception('[scheduler] failed to schedule sqlite maintenance (optional)')
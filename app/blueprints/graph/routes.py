@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify, request, current_app, send_file
+from flask import Blueprint, Response, jsonify, request, current_app, send_file, stream_with_context
 import os
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 import glob
@@ -7,7 +7,7 @@ import logging
 
 from ...extensions import db
 from flask_login import login_required
-from ...models import Project, Node, Edge, Comment, TimeEntry, CostEntry, NodeLayout, StatusChange, User, NodeTranslation, Attachment
+from ...models import Project, Node, Edge, Comment, TimeEntry, CostEntry, NodeLayout, StatusChange, User, NodeTranslation, Attachment, generate_uuid
 from ...schemas import ProjectSchema, NodeSchema, EdgeSchema, CommentSchema, TimeEntrySchema, CostEntrySchema, StatusChangeSchema, AttachmentSchema, CommentWithAttachmentsSchema
 from flask_login import current_user
 from ...repositories.translations import (
@@ -18,10 +18,30 @@ from ...repositories.translations import (
     get_stale_comment_bodies,
     upsert_comment_translations,
 )
-from ...services.translation import translate_texts, TranslationError
+from ...services.translation import translate_texts, TranslationError, TranslationStats
 from ...services.async_jobs import enqueue_translation_job, get_job
-from ...services.nodes import recompute_importance_score, recompute_group_status
-from ...services.graph_analysis import longest_path_by_planned_hours
+from ...services.recompute_queue import schedule_recompute
+from ...services.graph_analysis import longest_path_by_planned_hours, project_cycles, would_create_cycle, node_visual_metrics
+from ...services.spatial import node_ids_in_bbox
+from ...services.bulk import BulkError, bulk_create
+from ...services.project_archive import ArchiveError, iter_buffered, iter_export_lines, iter_gzip
+from ...services.project_import import (
+    JOB_TYPE as IMPORT_JOB_TYPE, ImportJobError, claim_import_job, create_import_job, enqueue_import, run_import,
+)
+from ...services.layout import (
+    DIRECTIONS as LAYOUT_DIRECTIONS,
+    PositionError,
+    apply_project_layout,
+    compute_project_layout,
+    mark_layout_written,
+    parse_positions,
+    upsert_positions,
+)
+from ...services.scheduling import project_schedule
+from ...services.graph_snapshot import load_graph_snapshot, project_graph_version, graph_etag, load_nodes, load_edges
+from ...services.revisions import current_revision, changes_since
+from ...schemas import columnar
+from ...schemas.fast import serializer_for, dump_comments_with_attachments
 from ...models import NodeTranslation, CommentTranslation
 from ...utils.sanitize import sanitize_comment_html
 from marshmallow import ValidationError
@@ -93,6 +113,23 @@ def _normalize_and_validate_link_url(raw: object) -> str | None:
     return s
 
 
+def _wire_format() -> str:
+    fmt = (request.args.get("format") or "json").strip().lower()
+    return fmt if fmt in columnar.FORMATS else "json"
+
+
+def _columnar_response(payload: dict, fmt: str, status: int = 200, headers: dict | None = None):
+    """Serialize a columnar payload as JSON or msgpack depending on requested format."""
+    body = {"data": payload}
+    if fmt == "msgpack":
+        try:
+            packed = columnar.encode_msgpack(body)
+        except columnar.ColumnarUnavailable as e:
+            return jsonify({"errors": [{"status": 406, "title": "Format unavailable", "detail": str(e)}]}), 406
+        return current_app.response_class(packed, status=status, headers=headers, mimetype="application/x-msgpack")
+    return jsonify(body), status, (headers or {})
+
+
 @bp.get("/health")
 def health():
     try:
@@ -116,6 +153,12 @@ def health():
                 uptime_seconds = None
     except Exception:
         pass
+    sqlite_pragmas = None
+    try:
+        from ...extensions import effective_sqlite_pragmas
+        sqlite_pragmas = effective_sqlite_pragmas() or None
+    except Exception:
+        sqlite_pragmas = None
     return jsonify({
         "data": {
             "status": "ok",
@@ -123,6 +166,7 @@ def health():
             "started": started_iso,
             "now": now_iso,
             "uptime_seconds": uptime_seconds,
+            "sqlite": sqlite_pragmas,
         }
     })
 
@@ -216,6 +260,61 @@ def create_project():
     return jsonify({"data": ProjectSchema().dump(item)}), 201
 
 
+@bp.post("/projects/import")
+@login_required
+def import_project():
+    """Import an NDJSON(.gz) archive as a BackgroundJob; ?resume=<job_id> continues a failed or stalled one.
+
+    The archive is the multipart field `file` or the raw request body. The
+    uploaded copy is deleted once the import finishes.
+    """
+    resume = request.args.get("resume")
+    stale_after = float(current_app.config.get("IMPORT_STALE_SECONDS", 300))
+    if resume:
+        job = db.session.get(BackgroundJob, resume)
+        if job is None or job.type != IMPORT_JOB_TYPE:
+            return jsonify({"errors": [{"status": 404, "title": "Job not found"}]}), 404
+        job_id = job.id
+    else:
+        upload = request.files.get("file")
+        src = upload.stream if upload is not None else request.stream
+        folder = Path(current_app.instance_path) / "imports"
+        folder.mkdir(parents=True, exist_ok=True)
+        dest = folder / f"{generate_uuid()}.ndjson"
+        with open(dest, "wb") as out:
+            while True:
+                chunk = src.read(64 * 1024)
+                if not chunk:
+                    break
+                out.write(chunk)
+        try:
+            job_id = create_import_job(
+                str(dest),
+                batch_size=int(request.args.get("batch_size") or current_app.config.get("IMPORT_BATCH_SIZE", 1000)),
+                remap=True if request.args.get("remap") == "1" else None,
+                owns_source=True,
+            )
+        except (ArchiveError, ValueError) as e:
+            dest.unlink(missing_ok=True)
+            return jsonify({"errors": [{"status": 400, "title": "Invalid archive", "detail": str(e)}]}), 400
+    user_id = _fallback_user_id()
+    # Claimed here, not in the worker, so concurrent resumes get their 409 from this request
+    blocker = claim_import_job(job_id, stale_after)
+    if blocker:
+        return jsonify({"errors": [{"status": 409, "title": "Job not resumable", "detail": blocker}]}), 409
+    if current_app.config.get("IMPORT_ASYNC", True):
+        enqueue_import(current_app._get_current_object(), job_id, fallback_user_id=user_id, claimed=True)
+    else:
+        try:
+            run_import(job_id, fallback_user_id=user_id, claimed=True)
+        except (ArchiveError, ImportJobError) as e:
+            return jsonify({"errors": [{"status": 400, "title": "Import failed", "detail": str(e), "meta": {"job_id": job_id}}]}), 400
+        except Exception as e:
+            current_app.logger.exception("[import] job %s failed", job_id)
+            return jsonify({"errors": [{"status": 500, "title": "Import failed", "detail": str(e), "meta": {"job_id": job_id}}]}), 500
+    return jsonify({"data": {"job_id": job_id}}), 202
+
+
 @bp.get("/projects/<id>")
 def get_project(id: str):
     item = db.session.get(Project, id)
@@ -244,37 +343,133 @@ def list_nodes(project_id: str):
     lang = (request.args.get("lang") or "").lower().strip()
     include_hidden_raw = (request.args.get("include_hidden") or "").strip().lower()
     include_hidden = include_hidden_raw in {"1", "true", "yes", "y", "on"}
-    base_q = db.session.query(Node).filter_by(project_id=project_id)
-    if not include_hidden:
-        # Execute with hidden-filter, but fall back to no-filter if DB not migrated yet
-        try:
-            items = base_q.filter(Node.is_hidden == False).all()  # noqa: E712
-        except SQLAlchemyError:
-            items = base_q.all()
-        except Exception:
-            items = base_q.all()
-    else:
-        items = base_q.all()
-    payload = NodeSchema(many=True).dump(items)
-    # attach layout if exists (best-effort)
+    fmt = _wire_format()
+    if fmt != "json":
+        return _columnar_response(columnar.wrap(project_id, nodes=columnar.node_columns(project_id, lang, include_hidden)), fmt)
     try:
-        layouts = {l.node_id: l for l in db.session.query(NodeLayout).join(Node, Node.id == NodeLayout.node_id).filter(Node.project_id == project_id).all()}
-        for n in payload:
-            lay = layouts.get(n["id"]) if isinstance(n, dict) else None
-            if lay:
-                n["position"] = {"x": lay.x, "y": lay.y}
-        # attach translations if requested
-        if lang:
-            tr = { (t.node_id): t for t in db.session.query(NodeTranslation).filter(NodeTranslation.lang==lang, NodeTranslation.node_id.in_([x["id"] for x in payload])).all() }
-            for n in payload:
-                t = tr.get(n["id"]) if isinstance(n, dict) else None
-                if t:
-                    n["title_translated"] = t.text
+        payload = load_nodes(project_id, lang, include_hidden)
     except SQLAlchemyError:
-        pass
+        # Fall back to plain ORM dump if DB not migrated yet (e.g., missing columns)
+        db.session.rollback()
+        payload = NodeSchema(many=True).dump(db.session.query(Node).filter_by(project_id=project_id).all())
     return jsonify({"data": payload})
 
 
+def _viewport_selector(project_id: str, bbox: list | None, min_lod: float | None, include_hidden: bool):
+    """Callable returning node ids inside bbox (R*Tree) and/or with lod_score >= min_lod."""
+    def select():
+        metrics = node_visual_metrics(project_id, include_hidden) if min_lod is not None or bbox is None else {}
+        if bbox is not None:
+            ids = node_ids_in_bbox(project_id, *bbox, include_hidden=include_hidden)
+        else:
+            ids = list(metrics)
+        if min_lod is not None:
+            ids = [i for i in ids if i in metrics and metrics[i][2] >= min_lod]
+        return ids
+    return select
+
+
+@bp.get("/projects/<project_id>/graph")
+def get_graph(project_id: str):
+    """Nodes (with positions/translations) and edges of a project in one response.
+
+    Carries an ETag derived from the project graph version; clients sending a
+    matching If-None-Match receive 304 without the payload being built.
+
+    Optional viewport mode: `bbox=x1,y1,x2,y2` returns only nodes whose saved
+    position is inside the box, and `min_lod=<0..1>` only nodes whose lod_score
+    reaches it; edges are those incident to the returned nodes.
+    """
+    if not db.session.get(Project, project_id):
+        return jsonify({"errors": [{"status": 404, "title": "Not Found"}]}), 404
+    lang = (request.args.get("lang") or "").lower().strip()
+    include_hidden_raw = (request.args.get("include_hidden") or "").strip().lower()
+    include_hidden = include_hidden_raw in {"1", "true", "yes", "y", "on"}
+    fmt = _wire_format()
+    bbox = None
+    min_lod = None
+    try:
+        if request.args.get("bbox"):
+            bbox = [float(v) for v in request.args["bbox"].split(",")]
+            if len(bbox) != 4:
+                raise ValueError("bbox needs four numbers")
+        if request.args.get("min_lod"):
+            min_lod = float(request.args["min_lod"])
+    except ValueError:
+        return jsonify({"errors": [{"status": 400, "title": "Invalid viewport", "detail": "bbox=x1,y1,x2,y2 and min_lod must be numbers"}]}), 400
+    variant = f"{bbox}|{min_lod}" if (bbox is not None or min_lod is not None) else ""
+
+    select_ids = _viewport_selector(project_id, bbox, min_lod, include_hidden) if variant else None
+    headers = {"Cache-Control": "no-cache"}
+    inm = request.headers.get("If-None-Match")
+    if inm:
+        etag = graph_etag(project_graph_version(project_id), lang, include_hidden, fmt, variant)
+        if etag in {v.strip().removeprefix("W/").strip('"') for v in inm.split(",")}:
+            headers["ETag"] = f'"{etag}"'
+            return ("", 304, headers)
+    snap = load_graph_snapshot(project_id, lang=lang, include_hidden=include_hidden, columnar=(fmt != "json"), select_node_ids=select_ids)
+    etag = graph_etag(snap["version"], lang, include_hidden, fmt, variant)
+    headers["ETag"] = f'"{etag}"'
+    extra = {"bbox": bbox, "min_lod": min_lod} if variant else {}
+    if fmt != "json":
+        payload = columnar.wrap(project_id, version=snap["version"], revision=int(snap["version"]), nodes=snap["nodes"], edges=snap["edges"], **extra)
+        return _columnar_response(payload, fmt, headers=headers)
+    return jsonify({"data": {"version": snap["version"], "revision": int(snap["version"]), "nodes": snap["nodes"], "edges": snap["edges"], **extra}}), 200, headers
+
+
+@bp.get("/projects/<project_id>/changes")
+def get_graph_changes(project_id: str):
+    """Delta sync: nodes/edges/positions upserted or deleted after revision `since`.
+
+    Hidden nodes are reported as deleted unless include_hidden is set, so a
+    client can apply the delta to a cached /graph response of the same variant.
+    """
+    current = current_revision(project_id)
+    if current is None:
+        return jsonify({"errors": [{"status": 404, "title": "Not Found"}]}), 404
+    try:
+        since = int(request.args.get("since", ""))
+    except ValueError:
+        return jsonify({"errors": [{"status": 400, "title": "since must be an integer revision"}]}), 400
+    if since < 0 or since > current:
+        return jsonify({"errors": [{"status": 409, "title": "Unknown revision", "detail": "Reload the full graph"}]}), 409
+    lang = (request.args.get("lang") or "").lower().strip()
+    include_hidden_raw = (request.args.get("include_hidden") or "").strip().lower()
+    include_hidden = include_hidden_raw in {"1", "true", "yes", "y", "on"}
+
+    log = changes_since(project_id, since, current)
+    deleted_nodes = {eid for (eid, _), op in log.get("node", {}).items() if op == "delete"}
+    deleted_edges = {eid for (eid, _), op in log.get("edge", {}).items() if op == "delete"}
+    deleted_positions = {eid for (eid, _), op in log.get("position", {}).items() if op == "delete"}
+    touched_nodes = {eid for (eid, _), op in log.get("node", {}).items() if op == "upsert"}
+    touched_nodes |= {eid for (eid, _) in log.get("position", {}).keys()}
+    touched_nodes |= {eid for (eid, tl) in log.get("translation", {}).keys() if lang and tl == lang}
+    touched_nodes -= deleted_nodes
+    upsert_edges = {eid for (eid, _), op in log.get("edge", {}).items() if op == "upsert"} - deleted_edges
+
+    nodes = load_nodes(project_id, lang, True, node_ids=sorted(touched_nodes)) if touched_nodes else []
+    if not include_hidden:
+        hidden = {n["id"] for n in nodes if n.get("is_hidden")}
+        deleted_nodes |= hidden
+        nodes = [n for n in nodes if n["id"] not in hidden]
+    edges = load_edges(project_id, edge_ids=sorted(upsert_edges)) if upsert_edges else []
+    positions = [{"node_id": n["id"], **n["position"]} for n in nodes if n.get("position")]
+    return jsonify({
+        "data": {
+            "since": since,
+            "revision": current,
+            "nodes": nodes,
+            "edges": edges,
+            "positions": positions,
+            "deleted": {
+                "nodes": sorted(deleted_nodes),
+                "edges": sorted(deleted_edges),
+                "positions": sorted(deleted_positions - deleted_nodes),
+            },
+        }
+    })
+
+
 @bp.post("/projects/<project_id>/nodes")
 @login_required
 def create_node(project_id: str):
@@ -300,10 +495,41 @@ def create_node(project_id: str):
         db.session.commit()
     except Exception:
         db.session.rollback()
-    recompute_importance_score(item.id)
+    schedule_recompute(scores=[item.id])
     return jsonify({"data": NodeSchema().dump(item)}), 201
 
 
+@bp.post("/projects/<project_id>/bulk")
+@login_required
+def bulk_create_graph(project_id: str):
+    """Create nodes, edges, positions and parent links in one transaction.
+
+    Body: {nodes, edges, positions, parents}; nodes carry client temp ids that
+    the other lists may reference. Returns the temp id -> node id map.
+    """
+    if db.session.get(Project, project_id) is None:
+        return jsonify({"errors": [{"status": 404, "title": "Not Found"}]}), 404
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"errors": [{"status": 400, "title": "Invalid bulk payload", "detail": "Body must be a JSON object"}]}), 400
+    try:
+        result = bulk_create(
+            project_id,
+            payload,
+            normalize_link=_normalize_and_validate_link_url,
+            reject_cycles=bool(current_app.config.get("REJECT_CYCLIC_EDGES")),
+        )
+        db.session.commit()
+    except BulkError as e:
+        db.session.rollback()
+        return jsonify({"errors": [{"status": e.status, "title": e.title, "detail": e.detail}]}), e.status
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"errors": [{"status": 400, "title": "Invalid bulk payload"}]}), 400
+    schedule_recompute(scores=result.score_ids, groups=result.group_ids)
+    return jsonify({"data": {"revision": result.revision, "id_map": result.id_map, "counts": result.counts}}), 201
+
+
 @bp.get("/nodes/<id>")
 def get_node(id: str):
     item = db.session.get(Node, id)
@@ -335,7 +561,7 @@ def translate_single_node(node_id: str):
         res = translate_texts([item.title or ""], lang, provider=provider)
         if not res:
             return jsonify({"errors": [{"status": 502, "title": "Provider returned no result"}]}), 502
-        upsert_node_translations([(node_id, lang, res[0].text, res[0].detected_source_lang)])
+        upsert_node_translations([(node_id, lang, res[0].text, res[0].detected_source_lang, item.title or "")], provider=provider)
         return jsonify({"data": {"node_id": node_id, "lang": lang, "text": res[0].text}})
     except TranslationError as e:
         return jsonify({"errors": [{"status": 502, "title": "Translation error", "detail": str(e)}]}), 502
@@ -359,6 +585,7 @@ def update_node(id: str):
         setattr(item, k, v)
     db.session.commit()
     # if status changed, recompute group chain
+    groups = []
     if "status" in data and data.get("status") != old_status:
         try:
             sc = StatusChange(node_id=item.id, old_status=old_status or "planned", new_status=item.status or "planned")
@@ -366,8 +593,8 @@ def update_node(id: str):
             db.session.commit()
         except Exception:
             db.session.rollback()
-        recompute_group_status(item.parent_id)
-    recompute_importance_score(item.id)
+        groups.append(item.parent_id)
+    schedule_recompute(scores=[item.id], groups=groups)
     return jsonify({"data": NodeSchema().dump(item)})
 @bp.get("/nodes/<node_id>/status-history")
 def node_status_history(node_id: str):
@@ -414,6 +641,8 @@ def create_edge(project_id: str):
     tgt = db.session.get(Node, data["target_node_id"]) if "target_node_id" in data else None
     if not src or not tgt or src.project_id != project_id or tgt.project_id != project_id:
         return jsonify({"errors": [{"status": 400, "title": "Invalid edge", "detail": "Source/target missing or not in project"}]}), 400
+    if current_app.config.get("REJECT_CYCLIC_EDGES") and would_create_cycle(project_id, src.id, tgt.id):
+        return jsonify({"errors": [{"status": 409, "title": "Cycle", "detail": "Edge would create a dependency cycle"}]}), 409
     item = Edge(**data)
     try:
         db.session.add(item)
@@ -421,8 +650,7 @@ def create_edge(project_id: str):
     except IntegrityError:
         db.session.rollback()
         return jsonify({"errors": [{"status": 400, "title": "Invalid edge"}]}), 400
-    recompute_importance_score(item.source_node_id)
-    recompute_importance_score(item.target_node_id)
+    schedule_recompute(scores=[item.source_node_id, item.target_node_id])
     return jsonify({"data": EdgeSchema().dump(item)}), 201
 
 
@@ -436,8 +664,7 @@ def delete_edge(id: str):
     target_id = item.target_node_id
     db.session.delete(item)
     db.session.commit()
-    recompute_importance_score(source_id)
-    recompute_importance_score(target_id)
+    schedule_recompute(scores=[source_id, target_id])
     return ("", 204)
 
 
@@ -495,13 +722,13 @@ def list_comments(node_id: str):
     order = (request.args.get("order") or "asc").strip().lower()
     if order not in {"asc", "desc"}:
         order = "asc"
-    q = db.session.query(Comment).filter_by(node_id=node_id)
+    ser = serializer_for(CommentWithAttachmentsSchema, Comment)
+    q = db.session.query(*ser.columns()).filter(Comment.node_id == node_id)
     if order == "desc":
         q = q.order_by(Comment.created_at.desc())
     else:
         q = q.order_by(Comment.created_at.asc())
-    items = q.all()
-    payload = CommentWithAttachmentsSchema(many=True).dump(items)
+    payload = dump_comments_with_attachments(q.all(), CommentWithAttachmentsSchema)
     if lang:
         from ...models import CommentTranslation
         try:
@@ -653,11 +880,8 @@ def add_time_entry(node_id: str):
     if node:
         node.actual_hours = float(node.actual_hours or 0) + float(item.hours or 0)
     db.session.commit()
-    recompute_importance_score(node_id)
     # touch parent group status if any
-    parent = node.parent_id if node else None
-    if parent:
-        recompute_group_status(parent)
+    schedule_recompute(scores=[node_id], groups=[node.parent_id if node else None])
     return jsonify({"data": TimeEntrySchema().dump(item)}), 201
 
 
@@ -681,10 +905,7 @@ def add_cost_entry(node_id: str):
     if node:
         node.actual_cost = float(node.actual_cost or 0) + float(item.amount or 0)
     db.session.commit()
-    recompute_importance_score(node_id)
-    parent = node.parent_id if node else None
-    if parent:
-        recompute_group_status(parent)
+    schedule_recompute(scores=[node_id], groups=[node.parent_id if node else None])
     return jsonify({"data": CostEntrySchema().dump(item)}), 201
 
 
@@ -696,17 +917,41 @@ def list_cost_entries(node_id: str):
 
 @bp.get("/projects/<project_id>/edges")
 def list_edges(project_id: str):
+    fmt = _wire_format()
+    if fmt != "json":
+        return _columnar_response(columnar.wrap(project_id, edges=columnar.edge_columns(project_id)), fmt)
     from sqlalchemy.orm import aliased
     S = aliased(Node)
     T = aliased(Node)
-    items = (
-        db.session.query(Edge)
+    ser = serializer_for(EdgeSchema, Edge)
+    rows = (
+        db.session.query(*ser.columns())
         .join(S, S.id == Edge.source_node_id)
         .join(T, T.id == Edge.target_node_id)
         .filter(Edge.project_id == project_id)
         .all()
     )
-    return jsonify({"data": EdgeSchema(many=True).dump(items)})
+    return jsonify({"data": ser.dump_rows(rows)})
+
+
+@bp.get("/projects/<project_id>/export")
+def export_project(project_id: str):
+    """Stream the full project as an NDJSON archive (format=ndjson or ndjson.gz)."""
+    fmt = (request.args.get("format") or "ndjson.gz").lower()
+    if fmt not in ("ndjson", "ndjson.gz"):
+        return jsonify({"errors": [{"status": 400, "title": "Unsupported format", "detail": "format must be ndjson or ndjson.gz"}]}), 400
+    if db.session.get(Project, project_id) is None:
+        return jsonify({"errors": [{"status": 404, "title": "Not Found"}]}), 404
+    body = iter_buffered(iter_export_lines(project_id))
+    if fmt == "ndjson.gz":
+        body = iter_gzip(body)
+        mimetype = "application/gzip"
+    else:
+        mimetype = "application/x-ndjson"
+    resp = Response(stream_with_context(body), mimetype=mimetype)
+    resp.headers["Content-Disposition"] = f'attachment; filename="project-{project_id}.{fmt}"'
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
 
 
 @bp.post("/nodes/<node_id>/position")
@@ -730,26 +975,115 @@ def save_node_position(node_id: str):
     return jsonify({"data": {"node_id": node_id, "x": x, "y": y}})
 
 
+@bp.post("/projects/<project_id>/positions")
+@login_required
+def save_node_positions(project_id: str):
+    """Upsert many saved positions in one transaction: body is [{node_id, x, y}, ...]."""
+    if db.session.get(Project, project_id) is None:
+        return jsonify({"errors": [{"status": 404, "title": "Not Found"}]}), 404
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get("positions")
+    try:
+        positions = parse_positions(payload)
+        revision = upsert_positions(project_id, positions)
+        db.session.commit()
+    except PositionError as e:
+        db.session.rollback()
+        return jsonify({"errors": [{"status": 400, "title": "Invalid positions", "detail": e.detail}]}), 400
+    return jsonify({"data": {"revision": revision, "count": len(positions)}})
+
+
+@bp.post("/projects/<project_id>/layout")
+@login_required
+def run_project_layout(project_id: str):
+    """Compute a server-side layout (?algo=layered) and save it unless save=0.
+
+    Options come from the query string or a JSON body: direction (LR|TB),
+    node_sep, rank_sep.
+    """
+    opts = dict(request.get_json(silent=True) or {})
+    opts.update(request.args.to_dict())
+    algo = str(opts.get("algo") or "layered")
+    try:
+        direction = str(opts.get("direction") or "LR").upper()
+        node_sep = float(opts.get("node_sep", 90))
+        rank_sep = float(opts.get("rank_sep", 220))
+        if direction not in LAYOUT_DIRECTIONS or not (10 <= node_sep <= 2000) or not (10 <= rank_sep <= 4000):
+            raise ValueError
+    except (TypeError, ValueError):
+        return jsonify({"errors": [{"status": 400, "title": "Invalid layout options", "detail": "direction must be LR or TB; node_sep and rank_sep must be numbers in range"}]}), 400
+    save = str(opts.get("save", "1")).lower() not in ("0", "false", "no")
+    try:
+        result = compute_project_layout(project_id, algo, direction=direction, node_sep=node_sep, rank_sep=rank_sep)
+        if result is None:
+            return jsonify({"errors": [{"status": 404, "title": "Not Found"}]}), 404
+        key, positions, cached = result
+        if save:
+            revision = apply_project_layout(project_id, key, positions)
+            db.session.commit()
+            mark_layout_written(project_id, key, revision)
+        else:
+            revision = current_revision(project_id)
+    except PositionError as e:
+        db.session.rollback()
+        return jsonify({"errors": [{"status": 400, "title": "Invalid layout", "detail": e.detail}]}), 400
+    return jsonify({"data": {
+        "algo": algo,
+        "cached": cached,
+        "saved": save,
+        "revision": revision,
+        "positions": [{"node_id": nid, "x": x, "y": y} for nid, (x, y) in positions.items()],
+    }})
+
+
 @bp.get("/projects/<project_id>/metrics")
 def project_metrics(project_id: str):
-    nodes = db.session.query(Node).filter_by(project_id=project_id).all()
-    edges = db.session.query(Edge).filter_by(project_id=project_id).all()
-    total_hours = sum(float(n.actual_hours or 0) for n in nodes)
-    total_cost = sum(float(n.actual_cost or 0) for n in nodes)
-    top_nodes = sorted(nodes, key=lambda n: float(n.importance_score or 0), reverse=True)[:5]
+    # Aggregates in SQL; the critical path comes from the incrementally maintained cache
+    count_nodes, total_hours, total_cost = db.session.query(
+        db.func.count(Node.id),
+        db.func.coalesce(db.func.sum(Node.actual_hours), 0.0),
+        db.func.coalesce(db.func.sum(Node.actual_cost), 0.0),
+    ).filter(Node.project_id == project_id).one()
+    count_edges = db.session.query(db.func.count(Edge.id)).filter(Edge.project_id == project_id).scalar() or 0
+    top_nodes = (
+        db.session.query(Node.id, Node.title, Node.importance_score)
+        .filter(Node.project_id == project_id)
+        .order_by(db.func.coalesce(Node.importance_score, 0.0).desc())
+        .limit(5)
+        .all()
+    )
     path, weight = longest_path_by_planned_hours(project_id)
     return jsonify({
         "data": {
-            "count_nodes": len(nodes),
-            "count_edges": len(edges),
-            "total_hours": total_hours,
-            "total_cost": total_cost,
-            "top_nodes": [{"id": n.id, "title": n.title, "score": n.importance_score} for n in top_nodes],
+            "count_nodes": int(count_nodes or 0),
+            "count_edges": int(count_edges),
+            "total_hours": float(total_hours or 0),
+            "total_cost": float(total_cost or 0),
+            "top_nodes": [{"id": nid, "title": title, "score": score} for nid, title, score in top_nodes],
             "critical_path_hint": {"node_ids": path, "total_planned_hours": weight}
         }
     })
 
 
+@bp.get("/projects/<project_id>/schedule")
+def project_schedule_view(project_id: str):
+    """CPM schedule: ES/EF/LS/LF and total/free float per node (hours; edge weight is lag)."""
+    data = project_schedule(project_id)
+    if data is None:
+        return jsonify({"errors": [{"status": 404, "title": "Not Found"}]}), 404
+    return jsonify({"data": data})
+
+
+@bp.get("/projects/<project_id>/cycles")
+def project_cycles_view(project_id: str):
+    """Dependency cycles as strongly connected components (largest first)."""
+    data = project_cycles(project_id)
+    if data is None:
+        return jsonify({"errors": [{"status": 404, "title": "Not Found"}]}), 404
+    return jsonify({"data": data})
+
+
 @bp.get("/debug/db-url")
 def debug_db_url():
     try:
@@ -820,6 +1154,7 @@ def translate_project(project_id: str):
 
     translated = 0
     skipped = 0
+    stats = TranslationStats()
 
     try:
         todo_nodes: list[tuple[str, str]] = []
@@ -835,11 +1170,11 @@ def translate_project(project_id: str):
                 pass
             elif todo_nodes:
                 texts = [t for (_, t) in todo_nodes]
-                res = translate_texts(texts, lang, provider=provider)
+                res = translate_texts(texts, lang, provider=provider, refresh=force, stats=stats)
                 records = []
-                for (nid, _), tr in zip(todo_nodes, res):
-                    records.append((nid, lang, tr.text, tr.detected_source_lang))
-                upsert_node_translations(records)
+                for (nid, src), tr in zip(todo_nodes, res):
+                    records.append((nid, lang, tr.text, tr.detected_source_lang, src))
+                upsert_node_translations(records, provider=provider)
                 translated += len(records)
             else:
                 skipped += 1
@@ -862,11 +1197,11 @@ def translate_project(project_id: str):
                 pass
             elif todo_comments:
                 texts = [b for (_, b) in todo_comments]
-                res = translate_texts(texts, lang, provider=provider)
+                res = translate_texts(texts, lang, provider=provider, refresh=force, stats=stats)
                 records = []
-                for (cid, _), tr in zip(todo_comments, res):
-                    records.append((cid, lang, tr.text, tr.detected_source_lang))
-                upsert_comment_translations(records)
+                for (cid, src), tr in zip(todo_comments, res):
+                    records.append((cid, lang, tr.text, tr.detected_source_lang, src))
+                upsert_comment_translations(records, provider=provider)
                 translated += len(records)
     except TranslationError as e:
         return jsonify({"errors": [{"status": 502, "title": "Translation provider error", "detail": str(e)}]}), 502
@@ -880,7 +1215,7 @@ def translate_project(project_id: str):
                 "total": len(todo_nodes) + len(todo_comments),
             }
         })
-    return jsonify({"data": {"translated": translated, "skipped": skipped}})
+    return jsonify({"data": {"translated": translated, "skipped": skipped, "stats": stats.as_dict()}})
 
 
 @bp.post("/projects/<project_id>/translate/async")
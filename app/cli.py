@@ -13,7 +13,7 @@ from .repositories.translations import (
     get_stale_comment_bodies,
     upsert_comment_translations,
 )
-from .services.translation import translate_texts, TranslationError
+from .services.translation import translate_texts, TranslationError, TranslationStats
 
 
 def register_cli(app: Flask) -> None:
@@ -115,6 +115,11 @@ def register_cli(app: Flask) -> None:
             if "updated_at" not in pcols:
                 conn.execute(text("ALTER TABLE project ADD COLUMN updated_at TEXT"))
                 click.echo("Added project.updated_at")
+            # Ensure revision on project (delta sync counter)
+            pcols = [row[1] for row in conn.execute(text("PRAGMA table_info(project)"))]
+            if "revision" not in pcols:
+                conn.execute(text("ALTER TABLE project ADD COLUMN revision INTEGER NOT NULL DEFAULT 0"))
+                click.echo("Added project.revision")
             # Ensure updated_at on edge
             ecols = [row[1] for row in conn.execute(text("PRAGMA table_info(edge)"))]
             if "updated_at" not in ecols:
@@ -122,6 +127,11 @@ def register_cli(app: Flask) -> None:
                 click.echo("Added edge.updated_at")
             # Ensure background_job table exists
         db.create_all()
+        # create_all() skips existing tables, so add missing hot-path indexes explicitly
+        with engine.begin() as conn:
+            for table in db.metadata.sorted_tables:
+                for idx in table.indexes:
+                    idx.create(bind=conn, checkfirst=True)
         click.echo("Upgrade complete")
 
     @app.cli.command("upgrade-status-change")
@@ -151,6 +161,7 @@ def register_cli(app: Flask) -> None:
         """Translate missing (and optionally stale) node titles and comments for a project."""
         translated = 0
         skipped = 0
+        stats = TranslationStats()
         prov = (provider or os.getenv("TRANSLATION_PROVIDER") or ("deepl" if os.getenv("DEEPL_API_KEY") else "mock")).lower()
         try:
             if include_nodes:
@@ -163,13 +174,13 @@ def register_cli(app: Flask) -> None:
                     todo = list({(nid, t) for (nid, t) in missing + stale_nodes})
                 if todo:
                     texts = [t for (_, t) in todo]
-                    res = translate_texts(texts, lang, provider=prov)
+                    res = translate_texts(texts, lang, provider=prov, refresh=force, stats=stats)
                     records = []
                     for (nid, src), tr in zip(todo, res):
-                        records.append((nid, lang, tr.text, tr.detected_source_lang))
+                        records.append((nid, lang, tr.text, tr.detected_source_lang, src))
                         if verbose:
                             click.echo(f"node {nid}: '{src}' -> '{tr.text}'")
-                    upsert_node_translations(records)
+                    upsert_node_translations(records, provider=prov)
                     translated += len(records)
                 else:
                     skipped += 1
@@ -183,17 +194,116 @@ def register_cli(app: Flask) -> None:
                     todo_c = list({(cid, b) for (cid, b) in missing_c + stale_c})
                 if todo_c:
                     texts = [b for (_, b) in todo_c]
-                    res = translate_texts(texts, lang, provider=prov)
+                    res = translate_texts(texts, lang, provider=prov, refresh=force, stats=stats)
                     records = []
                     for (cid, src), tr in zip(todo_c, res):
-                        records.append((cid, lang, tr.text, tr.detected_source_lang))
+                        records.append((cid, lang, tr.text, tr.detected_source_lang, src))
                         if verbose:
                             click.echo(f"comment {cid}: '{src}' -> '{tr.text}'")
-                    upsert_comment_translations(records)
+                    upsert_comment_translations(records, provider=prov)
                     translated += len(records)
         except TranslationError as e:
             click.echo(f"Provider error: {e}")
             raise SystemExit(2)
 
         click.echo(f"Translated: {translated}, Skipped groups: {skipped}")
+        click.echo(f"Provider items: {stats.provider_items}, Memory hits: {stats.memory_hits}, Dedup ratio: {stats.dedup_ratio:.2f}")
+
+
+    @app.cli.command("explain-hot-queries")
+    @click.option("--strict/--no-strict", default=False, help="Exit with code 1 if any hot query does a full table scan")
+    def explain_hot_queries_cmd(strict: bool) -> None:
+        """Print EXPLAIN QUERY PLAN for registered hot queries and flag full scans."""
+        from .services.hot_queries import explain_hot_queries
+
+        try:
+            results = explain_hot_queries()
+        except RuntimeError as e:
+            click.echo(str(e))
+            raise SystemExit(2)
+        flagged = 0
+        for r in results:
+            mark = "FULL SCAN" if r["full_scans"] else "ok"
+            click.echo(f"[{mark}] {r['name']}")
+            for step in r["plan"]:
+                click.echo(f"    {step}")
+            if r["full_scans"]:
+                flagged += 1
+        click.echo(f"Checked {len(results)} queries, {flagged} with full table scans")
+        if flagged and strict:
+            raise SystemExit(1)
+
+    @app.cli.command("recompute-scores")
+    @click.option("--project", "project_id", default=None, help="Project ID (default: all projects)")
+    def recompute_scores(project_id: str | None) -> None:
+        """Recompute importance scores with aggregate queries and one bulk UPDATE per project."""
+        from .services.nodes import recompute_importance_scores
+
+        project_ids = [project_id] if project_id else [pid for (pid,) in db.session.query(Project.id).all()]
+        total = 0
+        for pid in project_ids:
+            updated = recompute_importance_scores(project_id=pid)
+            db.session.commit()
+            total += updated
+            click.echo(f"project {pid}: updated {updated}")
+        click.echo(f"Recomputed scores: {total} node(s) updated")
+
+    @app.cli.command("recompute-groups")
+    @click.option("--project", "project_id", default=None, help="Project ID (default: all projects)")
+    def recompute_groups(project_id: str | None) -> None:
+        """Repair group statuses bottom-up (e.g. after imports), one transaction per project."""
+        from .services.nodes import recompute_all_group_statuses
 
+        project_ids = [project_id] if project_id else [pid for (pid,) in db.session.query(Project.id).all()]
+        total = 0
+        for pid in project_ids:
+            changed = recompute_all_group_statuses(pid)
+            db.session.commit()
+            total += changed
+            click.echo(f"project {pid}: updated {changed}")
+        click.echo(f"Recomputed group statuses: {total} node(s) updated")
+
+    @app.cli.command("rebuild-spatial-index")
+    def rebuild_spatial_index_cmd() -> None:
+        """Repopulate the node_layout R*Tree (run after restoring a backup)."""
+        from .services.spatial import rebuild_spatial_index, rtree_available
+
+        if not rtree_available():
+            click.echo("R*Tree table not present; viewport queries use the range fallback")
+            return
+        count = rebuild_spatial_index()
+        db.session.commit()
+        click.echo(f"Spatial index rebuilt: {count} position(s)")
+
+    @app.cli.command("import-project")
+    @click.argument("path", required=False, type=click.Path(exists=True, dir_okay=False))
+    @click.option("--batch-size", default=None, type=int, help="Rows per transaction (default: IMPORT_BATCH_SIZE)")
+    @click.option("--remap/--keep-ids", default=None, help="Force new ids / keep archived ids (default: remap only if the project exists)")
+    @click.option("--resume", "resume_job", default=None, help="Resume a failed or interrupted import job by id")
+    def import_project_cmd(path: str | None, batch_size: int | None, remap: bool | None, resume_job: str | None) -> None:
+        """Import an NDJSON(.gz) project archive in resumable batches."""
+        import os
+
+        from .services.project_archive import ArchiveError
+        from .services.project_import import ImportJobError, create_import_job, run_import
+
+        if resume_job:
+            job_id = resume_job
+        elif path:
+            try:
+                job_id = create_import_job(
+                    os.path.abspath(path),
+                    batch_size=batch_size or app.config.get("IMPORT_BATCH_SIZE", 1000),
+                    remap=remap,
+                )
+            except ArchiveError as e:
+                raise click.ClickException(str(e))
+        else:
+            raise click.UsageError("Give an archive path or --resume JOB_ID")
+        click.echo(f"Import job: {job_id}")
+        try:
+            meta = run_import(job_id, progress=lambda n: click.echo(f"  {n} record(s) committed"))
+        except (ArchiveError, ImportJobError) as e:
+            raise click.ClickException(f"{e} (resume with --resume {job_id})")
+        inserted = ", ".join(f"{k}={v}" for k, v in sorted((meta.get("inserted") or {}).items()))
+        click.echo(f"Imported project {meta['project_id']}: {inserted}")
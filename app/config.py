@@ -78,6 +78,30 @@ class BaseConfig:
         or ""
     ).strip()
 
+    # Reject new edges that would close a dependency cycle (409 from create_edge)
+    REJECT_CYCLIC_EDGES = (_get_env("REJECT_CYCLIC_EDGES", "0").strip() == "1")
+
+    # When derived fields (scores, group status) are recomputed after writes: sync | request | background
+    RECOMPUTE_MODE = (_get_env("RECOMPUTE_MODE", "request") or "request").strip().lower()
+
+    # Project archive import: rows per transaction (each batch commits its checkpoint)
+    IMPORT_BATCH_SIZE = int((_get_env("IMPORT_BATCH_SIZE", "1000") or "1000").strip() or "1000")
+    # Run POST /projects/import in a background thread (0 = inside the request)
+    IMPORT_ASYNC = (_get_env("IMPORT_ASYNC", "1").strip() != "0")
+    # Seconds without a checkpoint after which a "running" import from another process may be resumed
+    IMPORT_STALE_SECONDS = float((_get_env("IMPORT_STALE_SECONDS", "300") or "300").strip() or "300")
+
+    # SQLite connection profile (applied on every new DBAPI connection; see extensions)
+    SQLITE_JOURNAL_MODE = (_get_env("SQLITE_JOURNAL_MODE", "WAL") or "WAL").strip().upper()
+    SQLITE_SYNCHRONOUS = (_get_env("SQLITE_SYNCHRONOUS", "NORMAL") or "NORMAL").strip().upper()
+    SQLITE_MMAP_SIZE = int((_get_env("SQLITE_MMAP_SIZE", "268435456") or "0").strip() or "0")
+    # Negative values are KiB (SQLite convention): -65536 = 64 MiB page cache per connection
+    SQLITE_CACHE_SIZE = int((_get_env("SQLITE_CACHE_SIZE", "-65536") or "-2000").strip() or "-2000")
+    SQLITE_TEMP_STORE = (_get_env("SQLITE_TEMP_STORE", "MEMORY") or "DEFAULT").strip().upper()
+    SQLITE_BUSY_TIMEOUT_MS = int((_get_env("SQLITE_BUSY_TIMEOUT_MS", "5000") or "0").strip() or "0")
+    # Periodic wal_checkpoint + optimize job interval; 0 disables
+    SQLITE_MAINTENANCE_MINUTES = int((_get_env("SQLITE_MAINTENANCE_MINUTES", "30") or "0").strip() or "0")
+
     # Google OAuth configuration
     GOOGLE_OAUTH_ENABLED = (_get_env("GOOGLE_OAUTH_ENABLED", "1").strip() != "0")
     GOOGLE_OAUTH_CLIENT_ID = _get_env("GOOGLE_OAUTH_CLIENT_ID")
@@ -99,4 +123,6 @@ class ProductionConfig(BaseConfig):
 class TestingConfig(BaseConfig):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    RECOMPUTE_MODE = "sync"
+    IMPORT_ASYNC = False
 
@@ -4,7 +4,8 @@ from flask_login import LoginManager
 from flask_marshmallow import Marshmallow
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
-from typing import Optional
+from typing import Any, Dict, Optional
+import sqlite3
 
 
 db = SQLAlchemy()
@@ -13,17 +14,82 @@ login_manager = LoginManager()
 ma = Marshmallow()
 scheduler = None  # type: ignore[assignment]
 
-# Enable SQLite foreign keys to prevent ghost references
+# SQLite connection profile; filled from app config by configure_sqlite().
+# Empty until then, so engines created outside the app only get foreign_keys=ON.
+sqlite_profile: Dict[str, Any] = {}
+
+_SQLITE_CHOICES = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "temp_store": {"DEFAULT", "FILE", "MEMORY"},
+}
+
+
+def configure_sqlite(app) -> None:
+    """Load the SQLite PRAGMA profile from config; invalid values are dropped with a warning."""
+    cfg = app.config
+    profile: Dict[str, Any] = {
+        "busy_timeout": cfg.get("SQLITE_BUSY_TIMEOUT_MS"),
+        "journal_mode": cfg.get("SQLITE_JOURNAL_MODE"),
+        "synchronous": cfg.get("SQLITE_SYNCHRONOUS"),
+        "mmap_size": cfg.get("SQLITE_MMAP_SIZE"),
+        "cache_size": cfg.get("SQLITE_CACHE_SIZE"),
+        "temp_store": cfg.get("SQLITE_TEMP_STORE"),
+    }
+    clean: Dict[str, Any] = {}
+    for name, value in profile.items():
+        if value is None or value == "":
+            continue
+        choices = _SQLITE_CHOICES.get(name)
+        if choices is not None:
+            value = str(value).upper()
+            if value not in choices:
+                app.logger.warning('[sqlite] ignoring invalid %s=%r', name, value)
+                continue
+        else:
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                app.logger.warning('[sqlite] ignoring invalid %s=%r', name, value)
+                continue
+        clean[name] = value
+    sqlite_profile.clear()
+    sqlite_profile.update(clean)
+
+
+# Enable SQLite foreign keys to prevent ghost references, then apply the tuning profile
 @event.listens_for(Engine, "connect")
 def _set_sqlite_fk(dbapi_connection, connection_record):  # type: ignore[no-redef]
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
     try:
         cursor = dbapi_connection.cursor()
         cursor.execute("PRAGMA foreign_keys=ON")
+        # busy_timeout first so a concurrent writer does not fail the journal_mode switch
+        for name, value in sqlite_profile.items():
+            try:
+                cursor.execute(f"PRAGMA {name}={value}")
+            except Exception:
+                pass
         cursor.close()
     except Exception:
         pass
 
 
+def effective_sqlite_pragmas() -> Dict[str, Any]:
+    """Read back the PRAGMA values actually in effect on a pooled connection."""
+    out: Dict[str, Any] = {}
+    conn = db.session.connection()
+    if conn.dialect.name != "sqlite":
+        return out
+    for name in ("foreign_keys", *sqlite_profile.keys()):
+        try:
+            out[name] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+        except Exception:
+            out[name] = None
+    return out
+
+
 def init_scheduler(app) -> None:
     """Initialize APScheduler if available; fail gracefully if not installed."""
     global scheduler
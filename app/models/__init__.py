@@ -62,6 +62,8 @@ class Project(db.Model, TimestampMixin):
     name: Mapped[str] = mapped_column(db.String, nullable=False)
     description: Mapped[Optional[str]] = mapped_column(db.Text, nullable=True)
     archived: Mapped[bool] = mapped_column(db.Boolean, default=False, nullable=False)
+    # Monotonic graph revision; bumped on every Node/Edge/NodeLayout/NodeTranslation write
+    revision: Mapped[int] = mapped_column(db.Integer, default=0, server_default="0", nullable=False)
 
     nodes = relationship("Node", back_populates="project", cascade="all, delete-orphan")
     edges = relationship("Edge", back_populates="project", cascade="all, delete-orphan")
@@ -107,6 +109,11 @@ class Node(db.Model, TimestampMixin):
 
     translations = relationship("NodeTranslation", back_populates="node", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        db.Index("ix_node_project_id", "project_id"),
+        db.Index("ix_node_parent_id", "parent_id"),
+    )
+
 
 class Edge(db.Model, TimestampMixin):
     __tablename__ = "edge"
@@ -124,6 +131,9 @@ class Edge(db.Model, TimestampMixin):
 
     __table_args__ = (
         CheckConstraint("source_node_id <> target_node_id", name="ck_edge_not_self_loop"),
+        db.Index("ix_edge_project_id", "project_id"),
+        db.Index("ix_edge_source_node_id", "source_node_id"),
+        db.Index("ix_edge_target_node_id", "target_node_id"),
     )
 
 
@@ -141,6 +151,10 @@ class TimeEntry(db.Model):
     node = relationship("Node", back_populates="time_entries")
     user = relationship("User", back_populates="time_entries")
 
+    __table_args__ = (
+        db.Index("ix_time_entry_node_id", "node_id"),
+    )
+
 
 class CostEntry(db.Model):
     __tablename__ = "cost_entry"
@@ -154,6 +168,10 @@ class CostEntry(db.Model):
 
     node = relationship("Node", back_populates="cost_entries")
 
+    __table_args__ = (
+        db.Index("ix_cost_entry_node_id", "node_id"),
+    )
+
 
 class Comment(db.Model, TimestampMixin):
     __tablename__ = "comment"
@@ -175,6 +193,11 @@ class Comment(db.Model, TimestampMixin):
         cascade="all",
     )
 
+    __table_args__ = (
+        # Serves both node filters and the created_at ordering of list_comments
+        db.Index("ix_comment_node_id_created_at", "node_id", "created_at"),
+    )
+
 
 class Tag(db.Model):
     __tablename__ = "tag"
@@ -191,7 +214,13 @@ class NodeLayout(db.Model):
     node_id: Mapped[str] = mapped_column(db.String, ForeignKey("node.id", ondelete="CASCADE"), primary_key=True)
     x: Mapped[float] = mapped_column(db.Float, nullable=False, default=0.0)
     y: Mapped[float] = mapped_column(db.Float, nullable=False, default=0.0)
-    updated_at: Mapped[str] = mapped_column(db.String, default=lambda: datetime.utcnow().isoformat() + "Z", nullable=False)
+    updated_at: Mapped[str] = mapped_column(db.String, default=lambda: datetime.utcnow().isoformat() + "Z", onupdate=lambda: datetime.utcnow().isoformat() + "Z", nullable=False)
+    # Stable integer key of the R*Tree mirror (SQLite); assigned by the insert trigger, unlike rowid it survives VACUUM
+    spatial_id: Mapped[Optional[int]] = mapped_column(db.Integer, nullable=True)
+
+    __table_args__ = (
+        db.Index("ux_node_layout_spatial_id", "spatial_id", unique=True),
+    )
 
 
 class StatusChange(db.Model, TimestampMixin):
@@ -204,6 +233,10 @@ class StatusChange(db.Model, TimestampMixin):
 
     node = relationship("Node", back_populates="status_changes")
 
+    __table_args__ = (
+        db.Index("ix_status_change_node_id_created_at", "node_id", "created_at"),
+    )
+
 
 class NodeTranslation(db.Model):
     __tablename__ = "node_translation"
@@ -218,6 +251,10 @@ class NodeTranslation(db.Model):
 
     node = relationship("Node", back_populates="translations")
 
+    __table_args__ = (
+        db.Index("ix_node_translation_lang", "lang"),
+    )
+
 
 class CommentTranslation(db.Model):
     __tablename__ = "comment_translation"
@@ -233,6 +270,34 @@ class CommentTranslation(db.Model):
     comment = relationship("Comment", back_populates="translations")
 
 
+class TranslationMemory(db.Model):
+    """Content-addressed provider output shared by every node, comment and project."""
+    __tablename__ = "translation_memory"
+
+    source_hash: Mapped[str] = mapped_column(db.String, primary_key=True)  # sha256 of normalized source
+    lang: Mapped[str] = mapped_column(db.String, primary_key=True)
+    provider: Mapped[str] = mapped_column(db.String, primary_key=True)
+    text: Mapped[str] = mapped_column(db.Text, nullable=False)
+    detected_source_lang: Mapped[str | None] = mapped_column(db.String, nullable=True)
+    created_at: Mapped[str] = mapped_column(db.String, default=lambda: datetime.utcnow().isoformat() + "Z", nullable=False)
+
+
+class GraphChange(db.Model):
+    """Append-only change log backing delta sync (one row per entity write per revision)."""
+    __tablename__ = "graph_change"
+
+    id: Mapped[int] = mapped_column(db.Integer, primary_key=True, autoincrement=True)
+    project_id: Mapped[str] = mapped_column(db.String, ForeignKey("project.id", ondelete="CASCADE"), nullable=False)
+    revision: Mapped[int] = mapped_column(db.Integer, nullable=False)
+    entity: Mapped[str] = mapped_column(db.String, nullable=False)  # node|edge|position|translation
+    entity_id: Mapped[str] = mapped_column(db.String, nullable=False)
+    op: Mapped[str] = mapped_column(db.String, nullable=False)  # upsert|delete
+    lang: Mapped[Optional[str]] = mapped_column(db.String, nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_graph_change_project_revision", "project_id", "revision"),
+    )
+
 
 class BackgroundJob(db.Model, TimestampMixin):
     __tablename__ = "background_job"
@@ -4,6 +4,27 @@ from typing import Iterable, List, Tuple
 
 from ..extensions import db
 from ..models import Node, Comment, NodeTranslation, CommentTranslation
+from ..services.translation import source_hash
+
+
+Record = Tuple  # (id, lang, text, detected_source_lang[, source_text])
+
+
+def _is_stale(source: str | None, stored_hash: str | None, updated_at: str, created_at: str) -> bool:
+    # Rows written before source hashes existed fall back to the timestamp heuristic
+    if stored_hash is None:
+        return updated_at > created_at
+    return stored_hash != source_hash(source)
+
+
+def _record_hashes(text_col, key_col, records: List[Record]) -> dict:
+    """source_hash per record id: from the source text carried in the record, else the current DB value."""
+    hashes = {r[0]: source_hash(r[4]) for r in records if len(r) > 4}
+    missing = [r[0] for r in records if r[0] not in hashes]
+    if missing:
+        for rid, text in db.session.query(key_col, text_col).filter(key_col.in_(missing)).all():
+            hashes[rid] = source_hash(text)
+    return hashes
 
 
 def get_missing_node_titles(project_id: str, lang: str) -> List[Tuple[str, str]]:
@@ -18,25 +39,31 @@ def get_missing_node_titles(project_id: str, lang: str) -> List[Tuple[str, str]]
 
 
 def get_stale_node_titles(project_id: str, lang: str) -> List[Tuple[str, str]]:
+    """Translated nodes whose title no longer matches the hash the translation was made from."""
     q = (
-        db.session.query(Node.id, Node.title, NodeTranslation.created_at)
+        db.session.query(Node.id, Node.title, Node.updated_at, NodeTranslation.source_hash, NodeTranslation.created_at)
         .join(NodeTranslation, (NodeTranslation.node_id == Node.id) & (NodeTranslation.lang == lang))
         .filter(Node.project_id == project_id)
-        .filter(Node.updated_at > NodeTranslation.created_at)
     )
-    return [(nid, title or "") for nid, title, _ in q.all()]
+    return [(nid, title or "") for nid, title, upd, h, created in q.all() if _is_stale(title, h, upd, created)]
+
 
+def upsert_node_translations(records: List[Record], provider: str = "deepl") -> None:
+    """records: list of (node_id, lang, text, detected_source_lang[, source_text])
 
-def upsert_node_translations(records: List[Tuple[str, str, str, str | None]]) -> None:
-    """records: list of (node_id, lang, text, detected_source_lang)"""
-    for node_id, lang, text, det in records:
+    source_text is the title that was translated; when omitted the current title is hashed.
+    """
+    hashes = _record_hashes(Node.title, Node.id, records)
+    for node_id, lang, text, det, *_ in records:
         inst = db.session.query(NodeTranslation).get((node_id, lang))
         if inst:
             inst.text = text
-            inst.provider = "deepl"
+            inst.provider = provider
             inst.detected_source_lang = det
+            inst.source_hash = hashes.get(node_id)
         else:
-            inst = NodeTranslation(node_id=node_id, lang=lang, text=text, provider="deepl", detected_source_lang=det)
+            inst = NodeTranslation(node_id=node_id, lang=lang, text=text, provider=provider, detected_source_lang=det,
+                                   source_hash=hashes.get(node_id))
             db.session.add(inst)
     db.session.commit()
 
@@ -54,24 +81,27 @@ def get_missing_comment_bodies(project_id: str, lang: str) -> List[Tuple[str, st
 
 def get_stale_comment_bodies(project_id: str, lang: str) -> List[Tuple[str, str]]:
     q = (
-        db.session.query(Comment.id, Comment.body, CommentTranslation.created_at)
+        db.session.query(Comment.id, Comment.body, Comment.updated_at, CommentTranslation.source_hash, CommentTranslation.created_at)
         .join(CommentTranslation, (CommentTranslation.comment_id == Comment.id) & (CommentTranslation.lang == lang))
         .join(Node, Node.id == Comment.node_id)
         .filter(Node.project_id == project_id)
-        .filter(Comment.updated_at > CommentTranslation.created_at)
     )
-    return [(cid, body or "") for cid, body, _ in q.all()]
+    return [(cid, body or "") for cid, body, upd, h, created in q.all() if _is_stale(body, h, upd, created)]
 
 
-def upsert_comment_translations(records: List[Tuple[str, str, str, str | None]]) -> None:
-    for comment_id, lang, text, det in records:
+def upsert_comment_translations(records: List[Record], provider: str = "deepl") -> None:
+    """records: list of (comment_id, lang, text, detected_source_lang[, source_text])"""
+    hashes = _record_hashes(Comment.body, Comment.id, records)
+    for comment_id, lang, text, det, *_ in records:
         inst = db.session.query(CommentTranslation).get((comment_id, lang))
         if inst:
             inst.text = text
-            inst.provider = "deepl"
+            inst.provider = provider
             inst.detected_source_lang = det
+            inst.source_hash = hashes.get(comment_id)
         else:
-            inst = CommentTranslation(comment_id=comment_id, lang=lang, text=text, provider="deepl", detected_source_lang=det)
+            inst = CommentTranslation(comment_id=comment_id, lang=lang, text=text, provider=provider, detected_source_lang=det,
+                                      source_hash=hashes.get(comment_id))
             db.session.add(inst)
     db.session.commit()
 
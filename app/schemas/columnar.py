@@ -0,0 +1,107 @@
+"""Compact columnar wire format for large boards.
+
+Instead of one keyed object per node, every field is sent once as an array
+(`columns[field][i]` is the value for row i). Low-cardinality string fields are
+interned: the column holds small integers indexing into `dicts[field]`.
+Values are read straight from column-level selects using the compiled field
+conversions of schemas.fast, bypassing marshmallow.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Sequence
+
+from ..extensions import db
+from ..models import Node, Edge, NodeLayout, NodeTranslation
+from . import NodeSchema, EdgeSchema
+from .fast import RowSerializer, converter, serializer_for
+
+try:
+    import msgpack  # type: ignore
+except Exception:  # pragma: no cover
+    msgpack = None  # type: ignore
+
+
+FORMATS = {"json", "columnar", "msgpack"}
+INTERNED_FIELDS = {"status", "priority", "type", "assignee_id"}
+
+
+class ColumnarUnavailable(Exception):
+    pass
+
+
+def _columns(ser: RowSerializer, rows: Sequence[Sequence[Any]]) -> Dict[str, Any]:
+    columns: Dict[str, List[Any]] = {}
+    dicts: Dict[str, List[Any]] = {}
+    for idx, (name, _attr, kind) in enumerate(ser.fields):
+        conv = converter(kind)
+        values = [r[idx] for r in rows] if conv is None else [conv(r[idx]) for r in rows]
+        if name in INTERNED_FIELDS:
+            table: Dict[Any, int] = {}
+            columns[name] = [table.setdefault(v, len(table)) for v in values]
+            dicts[name] = list(table.keys())
+        else:
+            columns[name] = values
+    return {"columns": columns, "dicts": dicts}
+
+
+def node_columns(project_id: str, lang: str = "", include_hidden: bool = False, node_ids: List[str] | None = None) -> Dict[str, Any]:
+    """Nodes of a project (with x/y and optional title_translated) in columnar form."""
+    ser = serializer_for(NodeSchema, Node)
+    q = (
+        db.session.query(*ser.columns(), NodeLayout.x, NodeLayout.y)
+        .outerjoin(NodeLayout, NodeLayout.node_id == Node.id)
+        .filter(Node.project_id == project_id)
+    )
+    if lang:
+        q = q.add_columns(NodeTranslation.text).outerjoin(
+            NodeTranslation, (NodeTranslation.node_id == Node.id) & (NodeTranslation.lang == lang)
+        )
+    if not include_hidden:
+        q = q.filter(Node.is_hidden == False)  # noqa: E712
+    if node_ids is not None:
+        q = q.filter(Node.id.in_(node_ids))
+    rows = q.all()
+    out = _columns(ser, rows)
+    base = ser.width
+    out["columns"]["x"] = [r[base] for r in rows]
+    out["columns"]["y"] = [r[base + 1] for r in rows]
+    if lang:
+        out["columns"]["title_translated"] = [r[base + 2] for r in rows]
+    out["fields"] = list(out["columns"].keys())
+    out["count"] = len(rows)
+    return out
+
+
+def edge_columns(project_id: str, incident_to: List[str] | None = None) -> Dict[str, Any]:
+    ser = serializer_for(EdgeSchema, Edge)
+    q = db.session.query(*ser.columns()).filter(Edge.project_id == project_id)
+    if incident_to is not None:
+        q = q.filter(Edge.source_node_id.in_(incident_to) | Edge.target_node_id.in_(incident_to))
+    rows = q.all()
+    out = _columns(ser, rows)
+    out["fields"] = list(out["columns"].keys())
+    out["count"] = len(rows)
+    return out
+
+
+def wrap(project_id: str, **parts: Any) -> Dict[str, Any]:
+    """Envelope shared by columnar responses; project_id is sent once for all rows."""
+    return {"format": "columnar", "project_id": project_id, **parts}
+
+
+def encode_msgpack(payload: Dict[str, Any]) -> bytes:
+    if msgpack is None:
+        raise ColumnarUnavailable("msgpack package is not installed")
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def rows_from_columnar(block: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    """Decode a columnar block back into per-row dicts (reference decoder, used in tests)."""
+    cols = block["columns"]
+    dicts = block.get("dicts", {})
+    for i in range(block["count"]):
+        row: Dict[str, Any] = {}
+        for name in block["fields"]:
+            v = cols[name][i]
+            row[name] = dicts[name][v] if name in dicts else v
+        yield row
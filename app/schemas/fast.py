@@ -0,0 +1,166 @@
+"""Precompiled row serializers for hot read paths.
+
+For a marshmallow schema and its model, `serializer_for` inspects the schema's
+dump fields once and generates a specialized function that turns SQLAlchemy
+`Row` tuples (from column-level selects) into the exact dicts marshmallow would
+produce for the equivalent ORM instances. Generated code is cached per schema.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from marshmallow import Schema, fields
+from sqlalchemy import Boolean, Float, Integer, String, Text
+
+from ..extensions import db
+from ..models import Comment, Attachment, comment_attachment
+
+
+# Conversion kinds: how a raw column value becomes the marshmallow-dumped value
+IDENTITY = "identity"
+STR = "str"
+FLOAT = "float"
+INT = "int"
+BOOL = "bool"
+
+
+def _field_kind(field: fields.Field) -> str:
+    if isinstance(field, fields.Boolean):
+        return BOOL
+    if isinstance(field, fields.Float):
+        return FLOAT
+    if isinstance(field, fields.Integer):
+        return INT
+    if isinstance(field, fields.String):
+        return STR
+    raise TypeError(f"Unsupported field type for fast serializer: {type(field).__name__}")
+
+
+def _column_kind(model: type, attr: str, kind: str) -> str:
+    """Drop conversions the database driver already guarantees for this column type."""
+    col = model.__table__.c[attr]
+    ctype = col.type
+    if kind == STR and isinstance(ctype, (String, Text)):
+        return IDENTITY
+    if kind == BOOL and isinstance(ctype, Boolean):
+        return IDENTITY
+    if kind == INT and isinstance(ctype, Integer):
+        return IDENTITY
+    # Float columns may come back as int from SQLite when stored as integers
+    if kind == FLOAT and isinstance(ctype, Float):
+        return FLOAT
+    return kind
+
+
+_CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    STR: str,
+    FLOAT: float,
+    INT: int,
+    BOOL: bool,
+}
+
+
+def converter(kind: str) -> Callable[[Any], Any] | None:
+    """Scalar converter for a kind (None means identity); None values pass through."""
+    fn = _CONVERTERS.get(kind)
+    if fn is None:
+        return None
+    return lambda v: None if v is None else fn(v)
+
+
+class RowSerializer:
+    """Compiled dumper for one schema over rows selected with `columns()`.
+
+    - fields: [(output_key, model_attribute, kind)] for scalar dump fields in schema order
+    - nested: [(output_key, schema_cls)] for Nested(many=True) fields, filled by callers
+    """
+
+    def __init__(self, schema_cls: type[Schema], model: type) -> None:
+        self.schema_cls = schema_cls
+        self.model = model
+        self.fields: List[Tuple[str, str, str]] = []
+        self.nested: List[Tuple[str, type[Schema]]] = []
+        for name, field in schema_cls().dump_fields.items():
+            key = field.data_key or name
+            attr = field.attribute or name
+            if isinstance(field, fields.Nested):
+                self.nested.append((key, type(field.schema)))
+                continue
+            self.fields.append((key, attr, _column_kind(model, attr, _field_kind(field))))
+        self.dump_row, self.dump_rows = self._compile()
+
+    def columns(self) -> List[Any]:
+        return [getattr(self.model, attr) for (_, attr, _) in self.fields]
+
+    @property
+    def width(self) -> int:
+        return len(self.fields)
+
+    def _compile(self) -> Tuple[Callable[[Sequence[Any]], Dict[str, Any]], Callable[[Sequence[Sequence[Any]]], List[Dict[str, Any]]]]:
+        parts: List[str] = []
+        for i, (key, _attr, kind) in enumerate(self.fields):
+            if kind == IDENTITY:
+                expr = f"row[{i}]"
+            else:
+                expr = f"(None if row[{i}] is None else _{kind}(row[{i}]))"
+            parts.append(f"{key!r}: {expr}")
+        body = "{" + ", ".join(parts) + "}"
+        src = (
+            "def dump_row(row):\n"
+            f"    return {body}\n"
+            "def dump_rows(rows):\n"
+            f"    return [{body} for row in rows]\n"
+        )
+        ns: Dict[str, Any] = {"_str": str, "_float": float, "_int": int, "_bool": bool}
+        exec(compile(src, f"<fast-serializer {self.schema_cls.__name__}>", "exec"), ns)
+        return ns["dump_row"], ns["dump_rows"]
+
+
+_cache: Dict[Tuple[type, type], RowSerializer] = {}
+_cache_lock = threading.Lock()
+
+
+def serializer_for(schema_cls: type[Schema], model: type) -> RowSerializer:
+    """Return the cached compiled serializer for (schema, model)."""
+    key = (schema_cls, model)
+    ser = _cache.get(key)
+    if ser is None:
+        with _cache_lock:
+            ser = _cache.get(key)
+            if ser is None:
+                ser = RowSerializer(schema_cls, model)
+                _cache[key] = ser
+    return ser
+
+
+def dump_comments_with_attachments(comment_rows: Sequence[Sequence[Any]], schema_cls: type[Schema]) -> List[Dict[str, Any]]:
+    """Dump comment rows (selected with the comment serializer's columns) plus nested attachments.
+
+    Attachments of all comments are fetched with one query over the association table,
+    in the same order the ORM relationship would load them.
+    """
+    from . import AttachmentSchema
+
+    cser = serializer_for(schema_cls, Comment)
+    out = cser.dump_rows(comment_rows)
+    if not cser.nested or not out:
+        return out
+    id_idx = next(i for i, (_k, attr, _kind) in enumerate(cser.fields) if attr == "id")
+    ids = [r[id_idx] for r in comment_rows]
+    aser = serializer_for(AttachmentSchema, Attachment)
+    grouped: Dict[str, List[Dict[str, Any]]] = {cid: [] for cid in ids}
+    for chunk_start in range(0, len(ids), 500):
+        chunk = ids[chunk_start:chunk_start + 500]
+        rows = (
+            db.session.query(comment_attachment.c.comment_id, *aser.columns())
+            .join(Attachment, Attachment.id == comment_attachment.c.attachment_id)
+            .filter(comment_attachment.c.comment_id.in_(chunk))
+            .all()
+        )
+        for r in rows:
+            grouped[r[0]].append(aser.dump_row(tuple(r)[1:]))
+    for key, _schema in cser.nested:
+        for item, cid in zip(out, ids):
+            item[key] = grouped.get(cid, [])
+    return out
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 import os
 import threading
 import time
@@ -19,7 +20,7 @@ from ..repositories.translations import (
     get_stale_comment_bodies,
     upsert_comment_translations,
 )
-from .translation import translate_texts, TranslationError
+from .translation import translate_texts, TranslationError, TranslationStats
 from ..extensions import db
 from ..models import BackgroundJob
 
@@ -61,6 +62,9 @@ def get_job(job_id: str) -> Dict[str, Any] | None:
         "translated": jb.translated,
         "skipped": jb.skipped,
         "error": jb.error,
+        "type": jb.type,
+        "project_id": jb.project_id,
+        "meta": _meta(jb),
         "created_at": jb.created_at,
         "updated_at": jb.updated_at,
         "pid": os.getpid(),
@@ -69,6 +73,15 @@ def get_job(job_id: str) -> Dict[str, Any] | None:
     }
 
 
+def _meta(jb: BackgroundJob) -> Dict[str, Any] | None:
+    if not jb.meta_json:
+        return None
+    try:
+        return json.loads(jb.meta_json)
+    except ValueError:
+        return None
+
+
 def _update_job_db(job_id: str, **kwargs: Any) -> None:
     jb = db.session.get(BackgroundJob, job_id)
     if not jb:
@@ -157,9 +170,11 @@ def enqueue_translation_job(
                 # Prepare maps for nodes/comments that need translation
                 to_translate_node_ids = [nid for (nid, _) in to_translate_nodes]
                 to_translate_node_texts = [t for (_, t) in to_translate_nodes]
+                node_stats = TranslationStats()
+                comment_stats = TranslationStats()
                 node_translate_map = {}
                 if to_translate_node_texts:
-                    node_results = translate_texts(to_translate_node_texts, lang, provider=provider_name)
+                    node_results = translate_texts(to_translate_node_texts, lang, provider=provider_name, refresh=force, stats=node_stats)
                     for nid, tr in zip(to_translate_node_ids, node_results):
                         node_translate_map[nid] = tr
                 else:
@@ -169,7 +184,7 @@ def enqueue_translation_job(
                 to_translate_comment_texts = [b for (_, b) in to_translate_comments]
                 comment_translate_map = {}
                 if to_translate_comment_texts:
-                    comment_results = translate_texts(to_translate_comment_texts, lang, provider=provider_name)
+                    comment_results = translate_texts(to_translate_comment_texts, lang, provider=provider_name, refresh=force, stats=comment_stats)
                     for cid, tr in zip(to_translate_comment_ids, comment_results):
                         comment_translate_map[cid] = tr
                 else:
@@ -178,10 +193,10 @@ def enqueue_translation_job(
                 # Iterate all nodes and update progress per item
                 node_records: List[Tuple[str, str, str, str | None]] = []
                 done_counter = 0
-                for nid, _title in full_nodes:
+                for nid, title in full_nodes:
                     if nid in node_translate_map:
                         tr = node_translate_map[nid]
-                        node_records.append((nid, lang, tr.text, tr.detected_source_lang))
+                        node_records.append((nid, lang, tr.text, tr.detected_source_lang, title))
                         translated_count += 1
                     done_counter += 1
                     _update_job_db(job_id, done=done_counter, translated=translated_count)
@@ -189,10 +204,10 @@ def enqueue_translation_job(
 
                 # Iterate all comments and update progress per item
                 comment_records: List[Tuple[str, str, str, str | None]] = []
-                for cid, _body in full_comments:
+                for cid, body in full_comments:
                     if cid in comment_translate_map:
                         tr = comment_translate_map[cid]
-                        comment_records.append((cid, lang, tr.text, tr.detected_source_lang))
+                        comment_records.append((cid, lang, tr.text, tr.detected_source_lang, body))
                         translated_count += 1
                     done_counter += 1
                     _update_job_db(job_id, done=done_counter, translated=translated_count)
@@ -200,14 +215,20 @@ def enqueue_translation_job(
 
                 # Bulk upsert after iteration
                 if node_records:
-                    upsert_node_translations(node_records)
+                    upsert_node_translations(node_records, provider=provider_name)
                 if comment_records:
-                    upsert_comment_translations(comment_records)
+                    upsert_comment_translations(comment_records, provider=provider_name)
 
                 db.session.remove()
 
-                _update_job_db(job_id, status="finished", skipped=skipped_groups)
-                logging.info(f"[translate job {job_id}] finished translated={translated_count} skipped_groups={skipped_groups}")
+                total_stats = TranslationStats()
+                total_stats.add(node_stats)
+                total_stats.add(comment_stats)
+                meta = {"provider": provider_name, "lang": lang, "stats": total_stats.as_dict(),
+                        "nodes": node_stats.as_dict(), "comments": comment_stats.as_dict()}
+                _update_job_db(job_id, status="finished", skipped=skipped_groups, meta_json=json.dumps(meta))
+                logging.info(f"[translate job {job_id}] finished translated={translated_count} skipped_groups={skipped_groups} "
+                             f"dedup_ratio={total_stats.dedup_ratio:.2f} memory_hits={total_stats.memory_hits} provider_items={total_stats.provider_items}")
         except TranslationError as e:
             try:
                 with app.app_context():
@@ -0,0 +1,266 @@
+"""Bulk creation of nodes, edges, positions and parent links (imports).
+
+Clients refer to nodes they are creating by temporary ids; every reference
+(edge endpoints, positions, parent links) may use either a temporary id from
+the same payload or the id of a node already in the project. New rows are
+written with a handful of executemany statements and the project revision is
+bumped once; the caller commits and schedules one derived-field recompute.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from marshmallow import ValidationError
+from sqlalchemy import bindparam, insert, select, update
+
+from ..extensions import db
+from ..models import Node, Edge, StatusChange, generate_uuid
+from ..schemas import NodeSchema, EdgeSchema
+from .graph_analysis import _tarjan
+from .graph_cache import get_graph
+from .layout import PositionError, parse_positions, write_positions
+from .revisions import current_revision, record_graph_changes
+
+
+# Node fields accepted from a payload; ids, scores and actuals are server-owned
+NODE_FIELDS = (
+    "title", "description", "link_url", "link_open_in_new_tab", "status", "planned_hours",
+    "planned_cost", "is_group", "is_hidden", "priority",
+)
+EDGE_FIELDS = ("type", "weight")
+
+
+class BulkError(ValueError):
+    def __init__(self, detail: Any, status: int = 400, title: str = "Invalid bulk payload") -> None:
+        super().__init__(str(detail))
+        self.detail = detail
+        self.status = status
+        self.title = title
+
+
+@dataclass
+class BulkResult:
+    revision: int
+    id_map: Dict[str, str]
+    counts: Dict[str, int] = field(default_factory=dict)
+    # Pass to schedule_recompute after commit
+    score_ids: List[str] = field(default_factory=list)
+    group_ids: List[str] = field(default_factory=list)
+
+
+def _list(payload: Dict[str, Any], key: str) -> List[Any]:
+    items = payload.get(key) or []
+    if not isinstance(items, list):
+        raise BulkError(f"{key} must be an array")
+    return items
+
+
+def _temp_id(item: Dict[str, Any]) -> Optional[str]:
+    ref = item.get("temp_id", item.get("id"))
+    return str(ref) if ref not in (None, "") else None
+
+
+def bulk_create(
+    project_id: str,
+    payload: Dict[str, Any],
+    normalize_link: Optional[Callable[[Any], Optional[str]]] = None,
+    reject_cycles: bool = False,
+) -> BulkResult:
+    """Validate and insert a bulk payload. Does not commit; raises BulkError.
+
+    payload keys (all optional):
+    - nodes: [{temp_id | id, title, ..., parent_id}] (parent_id may be a ref)
+    - edges: [{source | source_node_id, target | target_node_id, type, weight}]
+    - positions: [{node_id, x, y}]
+    - parents: [{node_id, parent_id}] (parent_id null detaches)
+    """
+    raw_nodes = _list(payload, "nodes")
+    raw_edges = _list(payload, "edges")
+    raw_positions = _list(payload, "positions")
+    raw_parents = _list(payload, "parents")
+
+    current_parent: Dict[str, Optional[str]] = dict(
+        db.session.execute(select(Node.id, Node.parent_id).where(Node.project_id == project_id)).all()
+    )
+    existing = set(current_parent)
+    id_map: Dict[str, str] = {}
+    now = datetime.utcnow().isoformat() + "Z"
+    schema = NodeSchema()
+
+    node_rows: List[Dict[str, Any]] = []
+    parent_links: Dict[str, Optional[str]] = {}
+    for idx, item in enumerate(raw_nodes):
+        if not isinstance(item, dict):
+            raise BulkError(f"nodes[{idx}] must be an object")
+        data = {k: item[k] for k in NODE_FIELDS if k in item}
+        if "link_url" in data and normalize_link is not None:
+            try:
+                data["link_url"] = normalize_link(data["link_url"])
+            except ValueError as e:
+                raise BulkError(f"nodes[{idx}].link_url: {e}")
+        try:
+            data = schema.load({**data, "project_id": project_id})
+        except ValidationError as ve:
+            raise BulkError({f"nodes[{idx}]": ve.messages})
+        nid = generate_uuid()
+        ref = _temp_id(item)
+        if ref is not None:
+            if ref in id_map:
+                raise BulkError(f"nodes[{idx}]: duplicate temp id {ref}")
+            id_map[ref] = nid
+        node_rows.append({
+            "id": nid,
+            "project_id": project_id,
+            "title": data["title"],
+            "description": data.get("description"),
+            "link_url": data.get("link_url"),
+            "link_open_in_new_tab": data.get("link_open_in_new_tab", True),
+            "status": data.get("status") or "planned",
+            "importance_score": 0.0,
+            "planned_hours": float(data.get("planned_hours") or 0.0),
+            "actual_hours": 0.0,
+            "planned_cost": float(data.get("planned_cost") or 0.0),
+            "actual_cost": 0.0,
+            "parent_id": None,
+            "is_group": bool(data.get("is_group", False)),
+            "is_hidden": bool(data.get("is_hidden", False)),
+            "priority": data.get("priority") or "normal",
+            "created_at": now,
+            "updated_at": now,
+        })
+        if item.get("parent_id"):
+            parent_links[nid] = str(item["parent_id"])
+
+    def resolve(ref: Any, where: str) -> str:
+        key = str(ref) if ref is not None else ""
+        if key in id_map:
+            return id_map[key]
+        if key in existing:
+            return key
+        raise BulkError(f"{where}: unknown node {key or '(missing)'}")
+
+    for nid, ref in list(parent_links.items()):
+        parent_links[nid] = resolve(ref, "nodes.parent_id")
+    for idx, item in enumerate(raw_parents):
+        if not isinstance(item, dict):
+            raise BulkError(f"parents[{idx}] must be an object")
+        child = resolve(item.get("node_id"), f"parents[{idx}].node_id")
+        parent = item.get("parent_id")
+        parent_links[child] = resolve(parent, f"parents[{idx}].parent_id") if parent else None
+    for child, parent in parent_links.items():
+        if child == parent:
+            raise BulkError(f"node {child} cannot be its own parent")
+    _reject_parent_cycles(current_parent, parent_links)
+
+    edge_schema = EdgeSchema()
+    edge_rows: List[Dict[str, Any]] = []
+    for idx, item in enumerate(raw_edges):
+        if not isinstance(item, dict):
+            raise BulkError(f"edges[{idx}] must be an object")
+        src = resolve(item.get("source", item.get("source_node_id")), f"edges[{idx}].source")
+        dst = resolve(item.get("target", item.get("target_node_id")), f"edges[{idx}].target")
+        if src == dst:
+            raise BulkError(f"edges[{idx}]: self-loops are not allowed")
+        try:
+            data = edge_schema.load({
+                **{k: item[k] for k in EDGE_FIELDS if k in item},
+                "project_id": project_id, "source_node_id": src, "target_node_id": dst,
+            })
+        except ValidationError as ve:
+            raise BulkError({f"edges[{idx}]": ve.messages})
+        edge_rows.append({
+            "id": generate_uuid(),
+            "project_id": project_id,
+            "source_node_id": src,
+            "target_node_id": dst,
+            "type": data.get("type") or "dependency",
+            "weight": float(data["weight"]) if data.get("weight") is not None else 1.0,
+            "created_at": now,
+            "updated_at": now,
+        })
+
+    try:
+        parsed = parse_positions(raw_positions)
+    except PositionError as e:
+        raise BulkError(e.detail)
+    positions = {resolve(ref, "positions.node_id"): xy for ref, xy in parsed.items()}
+
+    if node_rows:
+        db.session.execute(insert(Node.__table__), node_rows)
+        db.session.execute(insert(StatusChange.__table__), [
+            {"id": generate_uuid(), "node_id": r["id"], "old_status": r["status"], "new_status": r["status"],
+             "created_at": now, "updated_at": now}
+            for r in node_rows
+        ])
+    if parent_links:
+        nt = Node.__table__
+        db.session.execute(
+            update(nt).where(nt.c.id == bindparam("b_id")).values(parent_id=bindparam("b_parent"), updated_at=now),
+            [{"b_id": c, "b_parent": p} for c, p in parent_links.items()],
+        )
+    if edge_rows:
+        db.session.execute(insert(Edge.__table__), edge_rows)
+    write_positions(positions)
+
+    changes = (
+        [("node", r["id"], "upsert", None) for r in node_rows]
+        + [("node", c, "upsert", None) for c in parent_links if c in existing]
+        + [("edge", r["id"], "upsert", None) for r in edge_rows]
+        + [("position", nid, "upsert", None) for nid in positions]
+    )
+    counts = {"nodes": len(node_rows), "edges": len(edge_rows), "positions": len(positions), "parents": len(parent_links)}
+    if not changes:
+        return BulkResult(int(current_revision(project_id) or 0), id_map, counts)
+    revision = record_graph_changes(project_id, changes)
+    # Bulk rows bypass the ORM; make sure loaded instances do not shadow them
+    db.session.expire_all()
+
+    if reject_cycles and edge_rows:
+        _reject_new_cycles(project_id, edge_rows)
+
+    # Re-parenting changes child counts on both sides: score the moved nodes and their old and new parents
+    moved = [c for c, p in parent_links.items() if current_parent.get(c) != p]
+    old_parents = [current_parent[c] for c in moved if current_parent.get(c)]
+    new_parents = [parent_links[c] for c in moved if parent_links[c]]
+    return BulkResult(
+        revision, id_map, counts,
+        score_ids=[r["id"] for r in node_rows] + [e for r in edge_rows for e in (r["source_node_id"], r["target_node_id"])]
+        + moved + old_parents + new_parents,
+        group_ids=[p for p in parent_links.values() if p] + old_parents,
+    )
+
+
+def _reject_parent_cycles(current_parent: Dict[str, Optional[str]], parent_links: Dict[str, Optional[str]]) -> None:
+    """Walk each re-parented node up the resulting hierarchy; raise BulkError (409) on a loop."""
+    parent_of = {**current_parent, **parent_links}
+    rooted: set = set()
+    for start in parent_links:
+        chain: List[str] = []
+        seen: set = set()
+        node: Optional[str] = start
+        while node is not None and node not in rooted:
+            if node in seen:
+                raise BulkError(f"parent links form a cycle through node {node}", status=409, title="Cycle")
+            seen.add(node)
+            chain.append(node)
+            node = parent_of.get(node)
+        rooted.update(chain)
+
+
+def _reject_new_cycles(project_id: str, edge_rows: List[Dict[str, Any]]) -> None:
+    g = get_graph(project_id)
+    if g is None:
+        return
+    with g.lock:
+        comp_of: Dict[int, int] = {}
+        for c, members in enumerate(_tarjan(len(g.ids), g.succ, g.node_slots())):
+            if len(members) > 1:
+                for i in members:
+                    comp_of[i] = c
+        for r in edge_rows:
+            s = g.index.get(r["source_node_id"])
+            t = g.index.get(r["target_node_id"])
+            if s in comp_of and comp_of.get(t) == comp_of[s]:
+                raise BulkError("Edges would create a dependency cycle", status=409, title="Cycle")
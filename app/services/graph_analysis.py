@@ -1,64 +1,531 @@
 from __future__ import annotations
 
-from collections import defaultdict, deque
+import heapq
+from collections import deque
 from typing import Dict, List, Tuple
 
-from ..extensions import db
-from ..models import Node, Edge
+from .graph_cache import ProjectGraph, get_graph
 
 
 def longest_path_by_planned_hours(project_id: str) -> Tuple[List[str], float]:
-    nodes: Dict[str, Node] = {n.id: n for n in db.session.query(Node).filter_by(project_id=project_id).all()}
-    edges: List[Edge] = db.session.query(Edge).filter_by(project_id=project_id).all()
-
-    outgoing: Dict[str, list[str]] = defaultdict(list)
-    indeg: Dict[str, int] = {nid: 0 for nid in nodes.keys()}
-    for e in edges:
-        if e.source_node_id in nodes and e.target_node_id in nodes:
-            outgoing[e.source_node_id].append(e.target_node_id)
-            indeg[e.target_node_id] += 1
-
-    # Kahn's algorithm for topological order (ignore cycles by skipping when impossible)
-    q = deque([nid for nid, d in indeg.items() if d == 0])
-    topo: List[str] = []
-    visited = set()
-    while q:
-        u = q.popleft()
-        topo.append(u)
-        visited.add(u)
-        for v in outgoing.get(u, []):
-            indeg[v] -= 1
-            if indeg[v] == 0:
-                q.append(v)
-
-    # If cycles exist, add remaining nodes arbitrarily
-    for nid in nodes.keys():
-        if nid not in visited:
-            topo.append(nid)
-
-    # DP over topo for longest path where weight is planned_hours of node
-    dist: Dict[str, float] = {nid: float(nodes[nid].planned_hours or 0) for nid in nodes.keys()}
-    prev: Dict[str, str | None] = {nid: None for nid in nodes.keys()}
-
-    for u in topo:
-        for v in outgoing.get(u, []):
-            w = float(nodes[v].planned_hours or 0)
-            if dist[u] + w > dist[v]:
-                dist[v] = dist[u] + w
-                prev[v] = u
-
-    # Find end of longest path
-    end = max(dist, key=lambda k: dist[k]) if dist else None
-    if end is None:
+    g = get_graph(project_id)
+    if g is None:
         return ([], 0.0)
+    with g.lock:
+        return critical_path_state(g).result()
 
-    # Reconstruct path
-    path: List[str] = []
-    cur = end
-    while cur is not None:
-        path.append(cur)
-        cur = prev[cur]  # type: ignore
-    path.reverse()
-    return (path, dist[end])
 
+def critical_path_state(g: ProjectGraph) -> "CriticalPath":
+    """Return the critical-path state attached to a cached graph, creating it on first use.
 
+    Caller must hold `g.lock`.
+    """
+    cp = getattr(g, "critical_path", None)
+    if cp is None:
+        cp = CriticalPath(g)
+        g.critical_path = cp  # type: ignore[attr-defined]
+        g.listeners.append(cp.on_change)
+    return cp
+
+
+class CriticalPath:
+    """Longest path by planned hours, maintained incrementally on cache patches.
+
+    State per node slot: `pos` (topological position), `dist` (heaviest path
+    ending at the node, including its own hours) and `prev` (predecessor on
+    that path). Hours changes and edge insert/delete only repropagate through
+    the downstream subgraph of the touched node, in topological order. Nodes
+    added since the last recompute stay unplaced until their first edge, which
+    puts them at the front (as a source) or the back (as a target) of the
+    order. An edge that contradicts the current order, or a graph with cycles,
+    falls back to a full recompute.
+    """
+
+    def __init__(self, g: ProjectGraph) -> None:
+        self.g = g
+        self.pos: List[int] = []
+        self.dist: List[float] = []
+        self.prev: List[int] = []
+        self.acyclic = True
+        self._next_pos = 0
+        self._front_pos = 0
+        # Slots added incrementally that have no edges yet: free to move in the order
+        self._unplaced: set = set()
+        self._result: Tuple[List[str], float] | None = None
+        self.full_recomputes = 0
+        self.recompute()
+
+    # --- full recompute ------------------------------------------------------------
+
+    def recompute(self) -> None:
+        g = self.g
+        self.full_recomputes += 1
+        n = len(g.ids)
+        slots = g.node_slots()
+        indeg: Dict[int, int] = {i: len(g.pred[i]) for i in slots}
+
+        # Kahn's algorithm for topological order (ignore cycles by skipping when impossible)
+        q = deque([i for i in slots if indeg[i] == 0])
+        topo: List[int] = []
+        while q:
+            u = q.popleft()
+            topo.append(u)
+            for v in g.succ[u]:
+                indeg[v] -= 1
+                if indeg[v] == 0:
+                    q.append(v)
+        self.acyclic = len(topo) == len(slots)
+        # If cycles exist, add remaining nodes arbitrarily
+        if not self.acyclic:
+            seen = set(topo)
+            topo.extend(i for i in slots if i not in seen)
+
+        self.pos = [-1] * n
+        for p, i in enumerate(topo):
+            self.pos[i] = p
+        self._next_pos = len(topo)
+        self._front_pos = 0
+        self._unplaced.clear()
+        planned = g.planned
+        self.dist = [planned[i] if g.alive[i] else 0.0 for i in range(n)]
+        self.prev = [-1] * n
+        dist, prev = self.dist, self.prev
+        # DP over topo for longest path where weight is planned_hours of node
+        for u in topo:
+            du = dist[u]
+            for v in g.succ[u]:
+                w = planned[v]
+                if du + w > dist[v]:
+                    dist[v] = du + w
+                    prev[v] = u
+        self._result = None
+
+    # --- incremental maintenance -----------------------------------------------------
+
+    def _grow(self) -> None:
+        n = len(self.g.ids)
+        while len(self.pos) < n:
+            i = len(self.pos)
+            # New nodes arrive without edges: any position after the current ones is valid
+            self.pos.append(self._next_pos)
+            self._next_pos += 1
+            self._unplaced.add(i)
+            self.dist.append(self.g.planned[i])
+            self.prev.append(-1)
+
+    def _place(self, s: int, t: int) -> None:
+        """Give unplaced endpoints of a new edge s -> t a position consistent with it."""
+        if s in self._unplaced:
+            # Its only edge leaves it: no predecessors, so it can precede everything
+            self._unplaced.discard(s)
+            self._front_pos -= 1
+            self.pos[s] = self._front_pos
+        if t in self._unplaced:
+            # Its only edge enters it: no successors, so it can follow everything
+            self._unplaced.discard(t)
+            self.pos[t] = self._next_pos
+            self._next_pos += 1
+
+    def _best_pred(self, v: int) -> Tuple[float, int]:
+        best, arg = 0.0, -1
+        pos, dist = self.pos, self.dist
+        for u in self.g.pred[v]:
+            du = dist[u]
+            if du > best or (du == best and arg != -1 and pos[u] < pos[arg]):
+                best, arg = du, u
+        return best, arg
+
+    def _propagate(self, seeds: List[int]) -> None:
+        """Recompute dist/prev for seeds and, where values change, their descendants."""
+        g, pos, dist, prev = self.g, self.pos, self.dist, self.prev
+        heap = [(pos[s], s) for s in set(seeds) if g.alive[s]]
+        heapq.heapify(heap)
+        queued = {s for _p, s in heap}
+        while heap:
+            _p, v = heapq.heappop(heap)
+            queued.discard(v)
+            best, arg = self._best_pred(v)
+            nd = g.planned[v] + best
+            if nd == dist[v] and arg == prev[v]:
+                continue
+            changed_dist = nd != dist[v]
+            dist[v], prev[v] = nd, arg
+            if not changed_dist:
+                continue
+            for w in g.succ[v]:
+                if w not in queued:
+                    queued.add(w)
+                    heapq.heappush(heap, (pos[w], w))
+        self._result = None
+
+    def on_change(self, kind: str, args: Tuple) -> None:
+        g = self.g
+        if kind == "node_hidden":
+            # The critical path spans hidden nodes too
+            return
+        self._grow()
+        if not self.acyclic and kind != "node_new":
+            self.recompute()
+            return
+        if kind == "node_new":
+            self._result = None
+        elif kind == "node_update":
+            i, old_planned = args
+            if g.planned[i] != old_planned:
+                self._propagate([i])
+        elif kind == "node_delete":
+            (i,) = args
+            self.dist[i] = 0.0
+            self.prev[i] = -1
+            self._result = None
+        elif kind == "edge_add":
+            s, t = args
+            self._place(s, t)
+            if self.pos[s] < self.pos[t]:
+                self._propagate([t])
+            else:
+                self.recompute()
+        elif kind == "edge_delete":
+            _s, t = args
+            self._propagate([t])
+
+    def result(self) -> Tuple[List[str], float]:
+        if self._result is not None:
+            return self._result
+        g = self.g
+        slots = g.node_slots()
+        if not slots:
+            self._result = ([], 0.0)
+            return self._result
+        # Find end of longest path
+        end = max(slots, key=lambda k: self.dist[k])
+        path: List[str] = []
+        cur = end
+        while cur != -1 and len(path) <= len(slots):
+            path.append(g.ids[cur])
+            cur = self.prev[cur]
+        path.reverse()
+        self._result = (path, self.dist[end])
+        return self._result
+
+
+def strongly_connected_components(g: ProjectGraph) -> List[List[int]]:
+    """Iterative Tarjan over the cached graph; returns components as lists of node slots.
+
+    Caller must hold `g.lock`.
+    """
+    return _tarjan(len(g.ids), g.succ, g.node_slots())
+
+
+def _tarjan(n: int, succ: List[List[int]], roots: List[int]) -> List[List[int]]:
+    """Components are emitted in reverse topological order of the condensation."""
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    stack: List[int] = []
+    comps: List[List[int]] = []
+    counter = 0
+    for root in roots:
+        if index[root] != -1:
+            continue
+        # Work stack of (node, next successor offset)
+        work: List[Tuple[int, int]] = [(root, 0)]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            v, k = work[-1]
+            out = succ[v]
+            if k < len(out):
+                work[-1] = (v, k + 1)
+                w = out[k]
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, 0))
+                elif on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+                continue
+            work.pop()
+            if work:
+                u = work[-1][0]
+                if low[v] < low[u]:
+                    low[u] = low[v]
+            if low[v] == index[v]:
+                comp: List[int] = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    comp.append(w)
+                    if w == v:
+                        break
+                comps.append(comp)
+    return comps
+
+
+def project_cycles(project_id: str) -> Dict[str, object] | None:
+    """Report dependency cycles: every strongly connected component with more than one node."""
+    g = get_graph(project_id)
+    if g is None:
+        return None
+    with g.lock:
+        cyclic = [c for c in strongly_connected_components(g) if len(c) > 1]
+        cyclic.sort(key=len, reverse=True)
+        components = []
+        for comp in cyclic:
+            members = set(comp)
+            components.append({
+                "size": len(comp),
+                "node_ids": [g.ids[i] for i in comp],
+                "edge_ids": [eid for eid, (s, t, _w) in g.edges.items() if s in members and t in members],
+            })
+        return {"acyclic": not components, "components": components}
+
+
+def would_create_cycle(project_id: str, source_id: str, target_id: str) -> bool:
+    """True if adding source -> target closes a cycle, i.e. target already reaches source.
+
+    Uses the topological positions kept by CriticalPath: on an acyclic graph a
+    path t ~> s only passes through nodes positioned at or before s, so when
+    pos[t] > pos[s] the answer is immediate and otherwise the search is bounded
+    to that prefix of the order.
+    """
+    if source_id == target_id:
+        return True
+    g = get_graph(project_id)
+    if g is None:
+        return False
+    with g.lock:
+        s = g.index.get(source_id)
+        t = g.index.get(target_id)
+        if s is None or t is None:
+            return False
+        cp = critical_path_state(g)
+        bounded = cp.acyclic
+        pos = cp.pos
+        if bounded and pos[t] > pos[s]:
+            return False
+        limit = pos[s]
+        seen = {t}
+        todo = [t]
+        succ = g.succ
+        while todo:
+            u = todo.pop()
+            for v in succ[u]:
+                if v == s:
+                    return True
+                if v in seen or (bounded and pos[v] > limit):
+                    continue
+                seen.add(v)
+                todo.append(v)
+        return False
+
+
+class _VisibleSucc:
+    """`g.succ` restricted to visible nodes, filtered on first access per slot."""
+
+    def __init__(self, g: ProjectGraph, include_hidden: bool) -> None:
+        self.g = g
+        self.include_hidden = include_hidden
+        self._lists: Dict[int, List[int]] = {}
+
+    def __getitem__(self, u: int) -> List[int]:
+        out = self._lists.get(u)
+        if out is None:
+            g = self.g
+            out = g.succ[u] if self.include_hidden else [v for v in g.succ[u] if not g.hidden[v]]
+            self._lists[u] = out
+        return out
+
+
+def _descendant_counts(n: int, succ, roots: List[int]) -> Dict[int, int]:
+    """Descendants (excluding the node itself) of every node reachable from `roots`.
+
+    One pass over the SCC condensation in reverse topological order with Python
+    ints as bitsets; a component's set is released once all of its predecessors
+    have consumed it.
+    """
+    # Tarjan emits components in reverse topological order (sinks first)
+    comps = _tarjan(n, succ, roots)
+    comp_of: Dict[int, int] = {}
+    masks = [0] * len(comps)
+    bit = 0
+    for c, members in enumerate(comps):
+        m = 0
+        for i in members:
+            comp_of[i] = c
+            m |= 1 << bit
+            bit += 1
+        masks[c] = m
+    comp_succ: List[set] = [set() for _ in comps]
+    pending_preds = [0] * len(comps)
+    for cu, members in enumerate(comps):
+        for u in members:
+            for v in succ[u]:
+                cv = comp_of[v]
+                if cv != cu and cv not in comp_succ[cu]:
+                    comp_succ[cu].add(cv)
+                    pending_preds[cv] += 1
+    reach: Dict[int, int] = {}
+    counts: List[int] = [0] * len(comps)
+    for c, members in enumerate(comps):
+        r = 0
+        for d in comp_succ[c]:
+            r |= reach[d] | masks[d]
+            pending_preds[d] -= 1
+            if pending_preds[d] == 0:
+                del reach[d]
+        if pending_preds[c] > 0:
+            reach[c] = r
+        if len(members) > 1:
+            # Other members of a cycle are reachable too; the node itself is not counted
+            counts[c] = (r | masks[c]).bit_count() - 1
+        else:
+            counts[c] = r.bit_count()
+    return {i: counts[c] for i, c in comp_of.items()}
+
+
+def visual_metrics_state(g: ProjectGraph, include_hidden: bool) -> "VisualMetrics":
+    """Return the visual-metrics state for one visibility mode of a cached graph, creating it on first use.
+
+    Caller must hold `g.lock`.
+    """
+    states = getattr(g, "visual_metrics", None)
+    if states is None:
+        states = {}
+        g.visual_metrics = states  # type: ignore[attr-defined]
+    vm = states.get(include_hidden)
+    if vm is None:
+        vm = states[include_hidden] = VisualMetrics(g, include_hidden)
+        g.listeners.append(vm.on_change)
+    elif vm.structure != g.structure:
+        vm.recompute()
+    return vm
+
+
+class VisualMetrics:
+    """Descendant count, degree and LOD score per node over the visible subgraph.
+
+    descendants = nodes reachable through outgoing edges (excluding the node
+    itself), degree = in + out edges, lod_score = 0.6 * degree/max_degree +
+    0.4 * descendants/max_descendants. Counts are patched from cache changes:
+    an edge insert/delete or a hidden toggle adjusts the degrees around it and
+    recounts descendants only for the nodes upstream of it. `structure` is the
+    `g.structure` the counts match; writes that leave the topology alone
+    (titles, hours, statuses) keep the memoized result.
+    """
+
+    def __init__(self, g: ProjectGraph, include_hidden: bool) -> None:
+        self.g = g
+        self.include_hidden = include_hidden
+        self.desc: Dict[int, int] = {}
+        self.degree: Dict[int, int] = {}
+        self.structure = -1
+        self._result: Dict[str, Tuple[int, int, float]] | None = None
+        self.full_recomputes = 0
+        self.recompute()
+
+    def _visible(self, i: int) -> bool:
+        return self.g.alive[i] and (self.include_hidden or not self.g.hidden[i])
+
+    def recompute(self) -> None:
+        g = self.g
+        self.full_recomputes += 1
+        slots = [i for i in g.node_slots() if self._visible(i)]
+        succ = _VisibleSucc(g, self.include_hidden)
+        degree = {i: 0 for i in slots}
+        for u in slots:
+            for v in succ[u]:
+                degree[u] += 1
+                degree[v] += 1
+        self.degree = degree
+        self.desc = _descendant_counts(len(g.ids), succ, slots)
+        self.structure = g.structure
+        self._result = None
+
+    # --- incremental maintenance -----------------------------------------------------
+
+    def _upstream(self, i: int) -> List[int]:
+        """Visible nodes with a path to `i`, plus `i` itself when visible."""
+        pred = self.g.pred
+        seen = {i}
+        todo = [i]
+        while todo:
+            for u in pred[todo.pop()]:
+                if u not in seen and self._visible(u):
+                    seen.add(u)
+                    todo.append(u)
+        return [u for u in seen if self._visible(u)]
+
+    def _recount(self, nodes: List[int]) -> None:
+        if nodes:
+            counts = _descendant_counts(len(self.g.ids), _VisibleSucc(self.g, self.include_hidden), nodes)
+            for i in nodes:
+                self.desc[i] = counts[i]
+
+    def _count_degree(self, i: int) -> int:
+        g = self.g
+        return sum(1 for v in g.succ[i] if self._visible(v)) + sum(1 for u in g.pred[i] if self._visible(u))
+
+    def on_change(self, kind: str, args: Tuple) -> None:
+        g = self.g
+        if kind == "node_update":
+            # Hours/parent changes do not move descendants or degrees
+            self.structure = g.structure
+            return
+        if kind == "node_new":
+            i = args[0]
+            if self._visible(i):
+                self.desc[i] = 0
+                self.degree[i] = 0
+        elif kind == "node_delete":
+            (i,) = args
+            # Incident edges were removed (and patched) before the node
+            self.desc.pop(i, None)
+            self.degree.pop(i, None)
+        elif kind in ("edge_add", "edge_delete"):
+            s, t = args
+            if self._visible(s) and self._visible(t):
+                step = 1 if kind == "edge_add" else -1
+                self.degree[s] += step
+                self.degree[t] += step
+                self._recount(self._upstream(s))
+        elif kind == "node_hidden" and not self.include_hidden:
+            (i,) = args
+            if self._visible(i):
+                self.degree[i] = self._count_degree(i)
+            else:
+                self.desc.pop(i, None)
+                self.degree.pop(i, None)
+            for v in set(g.succ[i]) | set(g.pred[i]):
+                if self._visible(v):
+                    self.degree[v] = self._count_degree(v)
+            self._recount(self._upstream(i))
+        self.structure = g.structure
+        self._result = None
+
+    def result(self) -> Dict[str, Tuple[int, int, float]]:
+        if self._result is not None:
+            return self._result
+        ids, desc, degree = self.g.ids, self.desc, self.degree
+        max_deg = max(degree.values(), default=0)
+        max_desc = max(desc.values(), default=0)
+        out: Dict[str, Tuple[int, int, float]] = {}
+        for i in sorted(degree):
+            norm_deg = degree[i] / max_deg if max_deg > 0 else 0.0
+            norm_desc = desc[i] / max_desc if max_desc > 0 else 0.0
+            out[ids[i]] = (desc[i], degree[i], round(0.6 * norm_deg + 0.4 * norm_desc, 4))
+        self._result = out
+        return out
+
+
+def node_visual_metrics(project_id: str, include_hidden: bool = False) -> Dict[str, Tuple[int, int, float]]:
+    """(descendants, degree, lod_score) by node id, memoized per cached graph structure."""
+    g = get_graph(project_id)
+    if g is None:
+        return {}
+    with g.lock:
+        return visual_metrics_state(g, include_hidden).result()
@@ -0,0 +1,313 @@
+"""Per-project in-process graph cache.
+
+Holds a compact, integer-indexed view of a project's graph (node slots,
+successor/predecessor lists, edge weights, parent hierarchy, planned hours,
+hidden flags)
+so analysis code does not rebuild adjacency from ORM objects on every call.
+
+Freshness:
+- ORM writes to Node/Edge are captured in `after_flush` and applied to a cached
+  entry in `after_commit` (dropped on rollback), provided the entry was built at
+  the revision the transaction started from; otherwise the entry is discarded.
+- Every read checks `Project.revision` (one primary-key lookup), so writes from
+  other processes or bulk paths that only call `record_graph_changes` force a
+  rebuild instead of serving stale adjacency.
+
+Readers should hold `graph.lock` while walking the structure.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models import Node, Edge
+from .revisions import current_revision
+
+
+class ProjectGraph:
+    """Integer-indexed adjacency for one project.
+
+    Node slots are never reused while the entry lives; deleted nodes are
+    tombstoned (`alive[i] = False`) and dropped from `index`.
+    """
+
+    def __init__(self, project_id: str, revision: int) -> None:
+        self.project_id = project_id
+        self.revision = revision
+        # Advanced only by topology changes (nodes, edges, parents, hidden flags),
+        # unlike `revision`, which every write to the project bumps
+        self.structure = 0
+        self.lock = threading.RLock()
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.alive: List[bool] = []
+        self.planned: List[float] = []
+        self.hidden: List[bool] = []
+        self.parent: List[int] = []
+        self.children: List[List[int]] = []
+        self.succ: List[List[int]] = []
+        self.pred: List[List[int]] = []
+        # edge_id -> (source slot, target slot, weight)
+        self.edges: Dict[str, Tuple[int, int, float]] = {}
+        # Extensions (e.g. critical-path state) hook node/edge patches here
+        self.listeners: List[Callable[[str, Tuple[Any, ...]], None]] = []
+        self._pending_parent: Dict[str, List[int]] = {}
+
+    # --- construction / patching -------------------------------------------------
+
+    def _slot(self, node_id: str) -> int:
+        i = self.index.get(node_id)
+        if i is not None:
+            return i
+        i = len(self.ids)
+        self.ids.append(node_id)
+        self.index[node_id] = i
+        self.alive.append(True)
+        self.planned.append(0.0)
+        self.hidden.append(False)
+        self.parent.append(-1)
+        self.children.append([])
+        self.succ.append([])
+        self.pred.append([])
+        # Children seen before their parent (load order) attach now
+        for c in self._pending_parent.pop(node_id, []):
+            self.parent[c] = i
+            self.children[i].append(c)
+        return i
+
+    def upsert_node(self, node_id: str, planned_hours: float | None, parent_id: str | None, is_hidden: bool = False) -> None:
+        is_new = node_id not in self.index
+        i = self._slot(node_id)
+        old_planned, old_hidden, old_parent = self.planned[i], self.hidden[i], self.parent[i]
+        self.planned[i] = float(planned_hours or 0)
+        self.hidden[i] = bool(is_hidden)
+        self._set_parent(i, parent_id)
+        hidden_changed = not is_new and self.hidden[i] != old_hidden
+        if is_new or hidden_changed or self.parent[i] != old_parent:
+            self.structure += 1
+        for fn in self.listeners:
+            fn("node_new" if is_new else "node_update", (i, old_planned))
+            if hidden_changed:
+                fn("node_hidden", (i,))
+
+    def _set_parent(self, i: int, parent_id: str | None) -> None:
+        old = self.parent[i]
+        new = self.index.get(parent_id, -1) if parent_id else -1
+        if old == new:
+            if parent_id and new == -1:
+                waiting = self._pending_parent.setdefault(parent_id, [])
+                if i not in waiting:
+                    waiting.append(i)
+            return
+        if old >= 0:
+            try:
+                self.children[old].remove(i)
+            except ValueError:
+                pass
+        self.parent[i] = new
+        if new >= 0:
+            self.children[new].append(i)
+        elif parent_id:
+            self._pending_parent.setdefault(parent_id, []).append(i)
+
+    def delete_node(self, node_id: str) -> None:
+        i = self.index.pop(node_id, None)
+        if i is None:
+            return
+        # Incident edges go with the node (FK cascade)
+        for eid in [eid for eid, (s, t, _w) in self.edges.items() if s == i or t == i]:
+            self.delete_edge(eid)
+        self._set_parent(i, None)
+        for c in self.children[i]:
+            self.parent[c] = -1  # ondelete=SET NULL
+        self.children[i] = []
+        self.alive[i] = False
+        self.planned[i] = 0.0
+        self.structure += 1
+        for fn in self.listeners:
+            fn("node_delete", (i,))
+
+    def upsert_edge(self, edge_id: str, source_id: str, target_id: str, weight: float | None) -> None:
+        s = self.index.get(source_id)
+        t = self.index.get(target_id)
+        if s is None or t is None:
+            return
+        w = float(weight if weight is not None else 1.0)
+        old = self.edges.get(edge_id)
+        if old is not None:
+            if old[0] == s and old[1] == t:
+                self.edges[edge_id] = (s, t, w)
+                return
+            self.delete_edge(edge_id)
+        self.edges[edge_id] = (s, t, w)
+        self.succ[s].append(t)
+        self.pred[t].append(s)
+        self.structure += 1
+        for fn in self.listeners:
+            fn("edge_add", (s, t))
+
+    def delete_edge(self, edge_id: str) -> None:
+        old = self.edges.pop(edge_id, None)
+        if old is None:
+            return
+        s, t, _w = old
+        try:
+            self.succ[s].remove(t)
+        except ValueError:
+            pass
+        try:
+            self.pred[t].remove(s)
+        except ValueError:
+            pass
+        self.structure += 1
+        for fn in self.listeners:
+            fn("edge_delete", (s, t))
+
+    # --- read helpers ----------------------------------------------------------------
+
+    def node_slots(self) -> List[int]:
+        return [i for i, a in enumerate(self.alive) if a]
+
+    @property
+    def node_count(self) -> int:
+        return len(self.index)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edges)
+
+    def degree(self, node_id: str) -> int:
+        i = self.index.get(node_id)
+        return 0 if i is None else len(self.succ[i]) + len(self.pred[i])
+
+
+_graphs: Dict[str, ProjectGraph] = {}
+_graphs_lock = threading.Lock()
+
+
+def _build(project_id: str, revision: int) -> ProjectGraph:
+    g = ProjectGraph(project_id, revision)
+    node_rows = db.session.execute(
+        select(Node.id, Node.planned_hours, Node.parent_id, Node.is_hidden).where(Node.project_id == project_id)
+    ).all()
+    for nid, planned, parent_id, is_hidden in node_rows:
+        i = g._slot(nid)
+        g.planned[i] = float(planned or 0)
+        g.hidden[i] = bool(is_hidden)
+        g._set_parent(i, parent_id)
+    edge_rows = db.session.execute(
+        select(Edge.id, Edge.source_node_id, Edge.target_node_id, Edge.weight).where(Edge.project_id == project_id)
+    ).all()
+    for eid, src, dst, w in edge_rows:
+        s = g.index.get(src)
+        t = g.index.get(dst)
+        if s is None or t is None:
+            continue
+        g.edges[eid] = (s, t, float(w if w is not None else 1.0))
+        g.succ[s].append(t)
+        g.pred[t].append(s)
+    return g
+
+
+def get_graph(project_id: str) -> Optional[ProjectGraph]:
+    """Return the cached graph for a project, rebuilding it if stale. None if no such project."""
+    rev = current_revision(project_id)
+    if rev is None:
+        drop(project_id)
+        return None
+    # Uncommitted graph writes in this transaction: build a private copy, never cache it,
+    # since a rollback would leave an entry claiming a revision it does not match
+    if project_id in (db.session().info.get("graph_revisions") or {}):
+        return _build(project_id, rev)
+    g = _graphs.get(project_id)
+    if g is not None and g.revision == rev:
+        return g
+    g = _build(project_id, rev)
+    with _graphs_lock:
+        _graphs[project_id] = g
+    return g
+
+
+def drop(project_id: str | None = None) -> None:
+    """Discard one project's entry (or all entries)."""
+    with _graphs_lock:
+        if project_id is None:
+            _graphs.clear()
+        else:
+            _graphs.pop(project_id, None)
+
+
+def cached(project_id: str) -> Optional[ProjectGraph]:
+    """Peek at the cached entry without validating it (tests/diagnostics)."""
+    return _graphs.get(project_id)
+
+
+# --- write-through via session events ----------------------------------------------
+
+_OPS_KEY = "graph_cache_ops"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_graph_ops(session: Session, flush_context) -> None:  # type: ignore[no-redef]
+    ops: List[Tuple[str, str, Tuple[Any, ...]]] = session.info.setdefault(_OPS_KEY, [])
+    for o in session.new:
+        if isinstance(o, Node):
+            ops.append((o.project_id, "node", (o.id, o.planned_hours, o.parent_id, o.is_hidden)))
+    for o in session.dirty:
+        if isinstance(o, Node):
+            ops.append((o.project_id, "node", (o.id, o.planned_hours, o.parent_id, o.is_hidden)))
+    for o in session.new:
+        if isinstance(o, Edge):
+            ops.append((o.project_id, "edge", (o.id, o.source_node_id, o.target_node_id, o.weight)))
+    for o in session.dirty:
+        if isinstance(o, Edge):
+            ops.append((o.project_id, "edge", (o.id, o.source_node_id, o.target_node_id, o.weight)))
+    for o in session.deleted:
+        if isinstance(o, Edge):
+            ops.append((o.project_id, "edge_delete", (o.id,)))
+        elif isinstance(o, Node):
+            ops.append((o.project_id, "node_delete", (o.id,)))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_graph_ops(session: Session) -> None:  # type: ignore[no-redef]
+    ops = session.info.pop(_OPS_KEY, None) or []
+    revisions: Dict[str, Tuple[int, int]] = session.info.pop("graph_revisions", None) or {}
+    if not ops and not revisions:
+        return
+    by_project: Dict[str, List[Tuple[str, Tuple[Any, ...]]]] = {pid: [] for pid in revisions}
+    for pid, kind, args in ops:
+        by_project.setdefault(pid, []).append((kind, args))
+    # Projects with only non-structural bumps (no ops) just advance the entry's revision
+    for pid, items in by_project.items():
+        g = _graphs.get(pid)
+        if g is None:
+            continue
+        base, final = revisions.get(pid, (None, None))
+        if base is None or g.revision != base:
+            drop(pid)
+            continue
+        try:
+            with g.lock:
+                for kind, args in items:
+                    if kind == "node":
+                        g.upsert_node(*args)
+                    elif kind == "edge":
+                        g.upsert_edge(*args)
+                    elif kind == "edge_delete":
+                        g.delete_edge(*args)
+                    elif kind == "node_delete":
+                        g.delete_node(*args)
+                g.revision = final
+        except Exception:
+            drop(pid)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_graph_ops(session: Session) -> None:  # type: ignore[no-redef]
+    session.info.pop(_OPS_KEY, None)
+    session.info.pop("graph_revisions", None)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Callable, Dict, List
+
+from ..extensions import db
+from ..models import Node, Edge, NodeLayout, NodeTranslation
+from ..schemas import NodeSchema, EdgeSchema
+from ..schemas import columnar as column_blocks
+from ..schemas.fast import serializer_for
+from .graph_analysis import node_visual_metrics
+from .revisions import current_revision
+
+
+def project_graph_version(project_id: str) -> str:
+    """Return the version everything in the graph snapshot depends on.
+
+    This is the project revision, which every Node/Edge/NodeLayout/NodeTranslation
+    write bumps (see services.revisions), so it costs one primary-key lookup.
+    """
+    rev = current_revision(project_id)
+    return str(rev or 0)
+
+
+def graph_etag(version: str, lang: str, include_hidden: bool, fmt: str = "json", extra: str = "") -> str:
+    """ETag for a snapshot representation (version + request variant)."""
+    raw = f"{version}|{lang}|{1 if include_hidden else 0}|{fmt}|{extra}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def load_nodes(project_id: str, lang: str, include_hidden: bool, node_ids: List[str] | None = None) -> List[Dict[str, Any]]:
+    """Nodes with position and requested translation attached, in one query.
+
+    node_ids optionally restricts the result (used by delta sync).
+    """
+    ser = serializer_for(NodeSchema, Node)
+    q = (
+        db.session.query(*ser.columns(), NodeLayout.x, NodeLayout.y)
+        .outerjoin(NodeLayout, NodeLayout.node_id == Node.id)
+        .filter(Node.project_id == project_id)
+    )
+    if lang:
+        q = q.add_columns(NodeTranslation.text).outerjoin(
+            NodeTranslation, (NodeTranslation.node_id == Node.id) & (NodeTranslation.lang == lang)
+        )
+    if not include_hidden:
+        q = q.filter(Node.is_hidden == False)  # noqa: E712
+    if node_ids is not None:
+        q = q.filter(Node.id.in_(node_ids))
+    rows = q.all()
+    payload = ser.dump_rows(rows)
+    base = ser.width
+    for n, r in zip(payload, rows):
+        if r[base] is not None and r[base + 1] is not None:
+            n["position"] = {"x": r[base], "y": r[base + 1]}
+        if lang and r[base + 2] is not None:
+            n["title_translated"] = r[base + 2]
+    return payload
+
+
+def load_edges(project_id: str, edge_ids: List[str] | None = None, incident_to: List[str] | None = None) -> List[Dict[str, Any]]:
+    """Edges of a project, optionally restricted to ids or to edges touching the given nodes."""
+    ser = serializer_for(EdgeSchema, Edge)
+    q = db.session.query(*ser.columns()).filter(Edge.project_id == project_id)
+    if edge_ids is not None:
+        q = q.filter(Edge.id.in_(edge_ids))
+    if incident_to is not None:
+        q = q.filter(Edge.source_node_id.in_(incident_to) | Edge.target_node_id.in_(incident_to))
+    return ser.dump_rows(q.all())
+
+
+def load_graph_snapshot(
+    project_id: str,
+    lang: str = "",
+    include_hidden: bool = False,
+    max_attempts: int = 3,
+    columnar: bool = False,
+    select_node_ids: Callable[[], List[str]] | None = None,
+) -> Dict[str, Any]:
+    """Load nodes, edges, positions and translations of a project as one consistent read.
+
+    The version is taken before and after reading; if a concurrent writer
+    changed the project in between, the read is retried. When every attempt
+    races a writer, the version read before the last attempt is returned: it
+    is older than the data, so the next conditional request refetches rather
+    than caching the mix under a newer ETag.
+    Returns dict with keys: version, nodes, edges. With columnar=True, nodes and
+    edges are column blocks (see schemas.columnar) instead of lists of dicts.
+    select_node_ids (e.g. a viewport query) restricts nodes to its result and
+    edges to those incident to them; it runs inside the consistency loop.
+    """
+    version = project_graph_version(project_id)
+    nodes: Any = []
+    edges: Any = []
+    attempts = max(1, max_attempts)
+    for attempt in range(attempts):
+        ids = select_node_ids() if select_node_ids is not None else None
+        if columnar:
+            nodes = column_blocks.node_columns(project_id, lang, include_hidden, node_ids=ids)
+            edges = column_blocks.edge_columns(project_id, incident_to=ids)
+        else:
+            nodes = load_nodes(project_id, lang, include_hidden, node_ids=ids)
+            edges = load_edges(project_id, incident_to=ids)
+        after = project_graph_version(project_id)
+        if after == version or attempt == attempts - 1:
+            break
+        version = after
+    attach_visual_metrics(project_id, nodes, include_hidden, columnar)
+    return {"version": version, "nodes": nodes, "edges": edges}
+
+
+def attach_visual_metrics(project_id: str, nodes: Any, include_hidden: bool, columnar: bool = False) -> None:
+    """Add server-computed descendants, degree and lod_score to node payloads (or columns)."""
+    metrics = node_visual_metrics(project_id, include_hidden)
+    default = (0, 0, 0.0)
+    if columnar:
+        ids = nodes["columns"]["id"]
+        vals = [metrics.get(i, default) for i in ids]
+        for k, name in enumerate(("descendants", "degree", "lod_score")):
+            nodes["columns"][name] = [v[k] for v in vals]
+        nodes["fields"] = list(nodes["columns"].keys())
+        return
+    for n in nodes:
+        n["descendants"], n["degree"], n["lod_score"] = metrics.get(n["id"], default)
@@ -0,0 +1,100 @@
+"""Registry of the hot read queries and an EXPLAIN QUERY PLAN checker.
+
+Each entry mirrors a query issued on a hot path (graph load, node details,
+change sync, translation scans). `explain_hot_queries` runs SQLite's
+EXPLAIN QUERY PLAN for each one and flags full table scans, so a missing or
+unused index shows up before it shows up in latency.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from sqlalchemy import or_, select
+from sqlalchemy.sql import Select
+
+from ..extensions import db
+from ..models import (
+    Node,
+    Edge,
+    NodeLayout,
+    NodeTranslation,
+    Comment,
+    TimeEntry,
+    CostEntry,
+    StatusChange,
+    GraphChange,
+)
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    name: str
+    build: Callable[[], Select]
+
+
+_SAMPLE_ID = "00000000-0000-0000-0000-000000000000"
+
+
+HOT_QUERIES: List[HotQuery] = [
+    HotQuery("graph.nodes", lambda: (
+        select(Node.id, Node.title, NodeLayout.x, NodeLayout.y, NodeTranslation.text)
+        .outerjoin(NodeLayout, NodeLayout.node_id == Node.id)
+        .outerjoin(NodeTranslation, (NodeTranslation.node_id == Node.id) & (NodeTranslation.lang == "en"))
+        .where(Node.project_id == _SAMPLE_ID, Node.is_hidden == False)  # noqa: E712
+    )),
+    HotQuery("graph.edges", lambda: select(Edge.id, Edge.source_node_id, Edge.target_node_id).where(Edge.project_id == _SAMPLE_ID)),
+    HotQuery("node.incident_edges", lambda: select(Edge.id).where(
+        or_(Edge.source_node_id == _SAMPLE_ID, Edge.target_node_id == _SAMPLE_ID)
+    )),
+    HotQuery("node.children", lambda: select(Node.id).where(Node.parent_id == _SAMPLE_ID)),
+    HotQuery("node.comments", lambda: select(Comment.id).where(Comment.node_id == _SAMPLE_ID).order_by(Comment.created_at.asc())),
+    HotQuery("node.time_entries", lambda: select(TimeEntry.id).where(TimeEntry.node_id == _SAMPLE_ID)),
+    HotQuery("node.cost_entries", lambda: select(CostEntry.id).where(CostEntry.node_id == _SAMPLE_ID)),
+    HotQuery("node.status_changes", lambda: (
+        select(StatusChange.id).where(StatusChange.node_id == _SAMPLE_ID).order_by(StatusChange.created_at.desc()).limit(20)
+    )),
+    HotQuery("translations.missing_titles", lambda: (
+        select(Node.id, Node.title)
+        .outerjoin(NodeTranslation, (NodeTranslation.node_id == Node.id) & (NodeTranslation.lang == "en"))
+        .where(Node.project_id == _SAMPLE_ID, NodeTranslation.node_id.is_(None))
+    )),
+    HotQuery("translations.by_lang", lambda: select(NodeTranslation.node_id).where(NodeTranslation.lang == "en")),
+    HotQuery("sync.changes_since", lambda: (
+        select(GraphChange.entity, GraphChange.entity_id)
+        .where(GraphChange.project_id == _SAMPLE_ID, GraphChange.revision > 0)
+        .order_by(GraphChange.id)
+    )),
+]
+
+
+def _is_full_scan(detail: str) -> bool:
+    """A plan step like "SCAN node" reads the whole table; index scans name the index."""
+    d = detail.upper()
+    if not d.startswith("SCAN "):
+        return False
+    return "USING INDEX" not in d and "USING COVERING INDEX" not in d and "USING INTEGER PRIMARY KEY" not in d
+
+
+def explain_hot_queries() -> List[Dict[str, object]]:
+    """Run EXPLAIN QUERY PLAN for every registered hot query (SQLite only).
+
+    Returns a list of {name, sql, plan: [detail...], full_scans: [detail...]}.
+    """
+    conn = db.session.connection()
+    if conn.dialect.name != "sqlite":
+        raise RuntimeError("EXPLAIN QUERY PLAN check is only supported on SQLite")
+    results: List[Dict[str, object]] = []
+    for hq in HOT_QUERIES:
+        compiled = hq.build().compile(dialect=conn.dialect)
+        sql = str(compiled)
+        params = tuple(compiled.params[k] for k in compiled.positiontup) if compiled.positiontup else ()
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params).all()
+        plan = [str(r[-1]) for r in rows]
+        results.append({
+            "name": hq.name,
+            "sql": sql,
+            "plan": plan,
+            "full_scans": [p for p in plan if _is_full_scan(p)],
+        })
+    return results
@@ -0,0 +1,393 @@
+"""Server-side auto-layout and bulk writes of saved node positions (node_layout).
+
+`layered_layout` is a Sugiyama-style layered drawing computed from topology
+alone (node ids sorted, so every machine gets the same result):
+
+1. break cycles by reversing DFS back edges
+2. longest-path ranking, with sources pulled next to their first successor
+3. virtual nodes on edges spanning more than one rank
+4. crossing reduction by alternating barycenter sweeps, keeping the order
+   with the fewest crossings (counted per layer pair with a Fenwick tree)
+5. coordinate assignment: each node is pulled toward the mean of its
+   neighbours, then the layer is packed left and right and the two averaged,
+   which keeps order and minimum separation
+
+Nodes without edges go into a grid after the last rank. Results are cached in
+process by a hash of the topology and layout options.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from ..extensions import db
+from ..models import Node, NodeLayout
+from .graph_cache import get_graph
+from .revisions import current_revision, record_graph_changes
+
+
+ALGORITHMS = {"layered"}
+DIRECTIONS = {"LR", "TB"}
+SWEEPS = 8
+COORD_PASSES = 4
+CACHE_SIZE = 16
+
+Positions = Dict[str, Tuple[float, float]]
+
+
+class PositionError(ValueError):
+    """Invalid position payload; `detail` is safe to return to the client."""
+
+    def __init__(self, detail: str) -> None:
+        super().__init__(detail)
+        self.detail = detail
+
+
+def parse_positions(items: Any) -> Dict[str, Tuple[float, float]]:
+    """Validate [{node_id, x, y}, ...] into {node_id: (x, y)}; later duplicates win."""
+    if not isinstance(items, list):
+        raise PositionError("positions must be an array of {node_id, x, y}")
+    out: Dict[str, Tuple[float, float]] = {}
+    for idx, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get("node_id"), str) or not item["node_id"]:
+            raise PositionError(f"positions[{idx}]: node_id is required")
+        try:
+            x = float(item.get("x"))
+            y = float(item.get("y"))
+        except (TypeError, ValueError):
+            raise PositionError(f"positions[{idx}]: x and y must be numbers")
+        if not (math.isfinite(x) and math.isfinite(y)):
+            raise PositionError(f"positions[{idx}]: x and y must be finite")
+        out[item["node_id"]] = (x, y)
+    return out
+
+
+def _insert():
+    if db.engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(NodeLayout.__table__)
+
+
+def write_positions(positions: Positions) -> None:
+    """Upsert node_layout rows with one executemany INSERT ... ON CONFLICT DO UPDATE.
+
+    No validation and no revision bump; callers record the change. The R*Tree
+    triggers keep the viewport index in sync.
+    """
+    if not positions:
+        return
+    now = datetime.utcnow().isoformat() + "Z"
+    stmt = _insert()
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[NodeLayout.__table__.c.node_id],
+        set_={"x": stmt.excluded.x, "y": stmt.excluded.y, "updated_at": stmt.excluded.updated_at},
+    )
+    db.session.execute(stmt, [{"node_id": i, "x": x, "y": y, "updated_at": now} for i, (x, y) in positions.items()])
+    # Drop stale ORM copies so later reads in this session see the new coordinates
+    for obj in list(db.session.identity_map.values()):
+        if isinstance(obj, NodeLayout) and obj.node_id in positions:
+            db.session.expire(obj)
+
+
+def upsert_positions(project_id: str, positions: Positions) -> int:
+    """Save positions for nodes of one project and bump the revision once.
+
+    Every node id must belong to the project (PositionError otherwise). Does
+    not commit; returns the new project revision.
+    """
+    ids = list(positions)
+    if not ids:
+        return int(current_revision(project_id) or 0)
+    known = set(db.session.execute(select(Node.id).where(Node.project_id == project_id)).scalars())
+    foreign = [i for i in ids if i not in known]
+    if foreign:
+        raise PositionError(f"nodes not in project: {', '.join(foreign[:5])}")
+    write_positions(positions)
+    # Positions are not part of the cached adjacency, so the graph cache stays valid
+    return record_graph_changes(project_id, [("position", i, "upsert", None) for i in ids], structural=False)
+
+
+# --- layered (Sugiyama) layout ---------------------------------------------------------
+
+def _acyclic_edges(n: int, succ: List[List[int]]) -> List[Tuple[int, int]]:
+    """Edges with DFS back edges reversed (iterative DFS from nodes in index order)."""
+    state = [0] * n  # 0 = new, 1 = on stack, 2 = done
+    out: List[Tuple[int, int]] = []
+    for root in range(n):
+        if state[root]:
+            continue
+        state[root] = 1
+        stack = [(root, 0)]
+        while stack:
+            u, k = stack[-1]
+            if k < len(succ[u]):
+                stack[-1] = (u, k + 1)
+                v = succ[u][k]
+                if state[v] == 1:
+                    out.append((v, u))
+                else:
+                    out.append((u, v))
+                    if state[v] == 0:
+                        state[v] = 1
+                        stack.append((v, 0))
+            else:
+                state[u] = 2
+                stack.pop()
+    return sorted(set(out))
+
+
+def _ranks(n: int, edges: List[Tuple[int, int]]) -> List[int]:
+    succ: List[List[int]] = [[] for _ in range(n)]
+    indeg = [0] * n
+    for u, v in edges:
+        succ[u].append(v)
+        indeg[v] += 1
+    rank = [0] * n
+    topo = [i for i in range(n) if indeg[i] == 0]
+    for u in topo:  # grows while iterating (Kahn)
+        for v in succ[u]:
+            if rank[u] + 1 > rank[v]:
+                rank[v] = rank[u] + 1
+            indeg[v] -= 1
+            if indeg[v] == 0:
+                topo.append(v)
+    # Pull each source down next to its nearest successor to shorten its edges
+    has_pred = [False] * n
+    for _u, v in edges:
+        has_pred[v] = True
+    for u in reversed(topo):
+        if not has_pred[u] and succ[u]:
+            rank[u] = min(rank[v] for v in succ[u]) - 1
+    return rank
+
+
+def _count_crossings(upper_pos: List[int], lower_pos: List[int], pairs: List[Tuple[int, int]]) -> int:
+    """Crossings between two adjacent layers: inversions of lower positions, in upper order."""
+    seq = [lower_pos[b] for _a, b in sorted(pairs, key=lambda e: (upper_pos[e[0]], lower_pos[e[1]]))]
+    size = max(seq, default=0) + 1
+    tree = [0] * (size + 1)
+    crossings = 0
+    for seen, p in enumerate(seq):
+        # elements already inserted with a position greater than p cross this edge
+        i = p + 1
+        le = 0
+        while i > 0:
+            le += tree[i]
+            i -= i & -i
+        crossings += seen - le
+        i = p + 1
+        while i <= size:
+            tree[i] += 1
+            i += i & -i
+    return crossings
+
+
+def _order_layers(layers: List[List[int]], up: List[List[int]], down: List[List[int]]) -> List[List[int]]:
+    pos = [0] * len(up)
+    for layer in layers:
+        for k, v in enumerate(layer):
+            pos[v] = k
+    layer_pairs = [[(u, v) for u in layers[r] for v in down[u]] for r in range(len(layers) - 1)]
+
+    def crossings() -> int:
+        return sum(_count_crossings(pos, pos, pairs) for pairs in layer_pairs)
+
+    best = [list(layer) for layer in layers]
+    best_cross = crossings()
+    for sweep in range(SWEEPS):
+        if best_cross == 0:
+            break
+        downward = sweep % 2 == 0
+        rng = range(1, len(layers)) if downward else range(len(layers) - 2, -1, -1)
+        for r in rng:
+            layer = layers[r]
+            nbrs = up if downward else down
+
+            def bary(v: int) -> float:
+                ns = nbrs[v]
+                return sum(pos[w] for w in ns) / len(ns) if ns else float(pos[v])
+
+            layer.sort(key=lambda v: (bary(v), pos[v]))
+            for k, v in enumerate(layer):
+                pos[v] = k
+        c = crossings()
+        if c < best_cross:
+            best_cross = c
+            best = [list(layer) for layer in layers]
+    return best
+
+
+def _assign_coordinates(layers: List[List[int]], up: List[List[int]], down: List[List[int]], sep: float) -> List[float]:
+    coord = [0.0] * len(up)
+    for layer in layers:
+        off = (len(layer) - 1) * sep / 2.0
+        for k, v in enumerate(layer):
+            coord[v] = k * sep - off
+    for it in range(COORD_PASSES):
+        downward = it % 2 == 0
+        rng = range(1, len(layers)) if downward else range(len(layers) - 2, -1, -1)
+        for r in rng:
+            layer = layers[r]
+            nbrs = up if downward else down
+            want = [
+                (sum(coord[w] for w in nbrs[v]) / len(nbrs[v])) if nbrs[v] else coord[v]
+                for v in layer
+            ]
+            m = len(layer)
+            left = list(want)
+            for k in range(1, m):
+                left[k] = max(left[k], left[k - 1] + sep)
+            right = list(want)
+            for k in range(m - 2, -1, -1):
+                right[k] = min(right[k], right[k + 1] - sep)
+            for k, v in enumerate(layer):
+                coord[v] = (left[k] + right[k]) / 2.0
+    return coord
+
+
+def layered_layout(
+    node_ids: List[str],
+    edges: List[Tuple[str, str]],
+    direction: str = "LR",
+    node_sep: float = 90.0,
+    rank_sep: float = 220.0,
+) -> Positions:
+    """Layered drawing of a directed graph: {node_id: (x, y)}, ranks along `direction`."""
+    ids = sorted(set(node_ids))
+    index = {nid: i for i, nid in enumerate(ids)}
+    n = len(ids)
+    pairs = sorted({
+        (index[s], index[t]) for s, t in edges
+        if s in index and t in index and s != t
+    })
+    succ: List[List[int]] = [[] for _ in range(n)]
+    linked = [False] * n
+    for u, v in pairs:
+        succ[u].append(v)
+        linked[u] = linked[v] = True
+
+    dag = _acyclic_edges(n, succ)
+    rank = _ranks(n, dag)
+    # Layers over linked nodes, with virtual nodes (index >= n) on long edges
+    max_rank = max((rank[i] for i in range(n) if linked[i]), default=-1)
+    layers: List[List[int]] = [[] for _ in range(max_rank + 1)]
+    for i in range(n):
+        if linked[i]:
+            layers[rank[i]].append(i)
+    up: List[List[int]] = [[] for _ in range(n)]
+    down: List[List[int]] = [[] for _ in range(n)]
+    layer_of = list(rank)
+    for u, v in dag:
+        prev = u
+        for r in range(rank[u] + 1, rank[v]):
+            w = len(up)
+            up.append([])
+            down.append([])
+            layer_of.append(r)
+            layers[r].append(w)
+            down[prev].append(w)
+            up[w].append(prev)
+            prev = w
+        down[prev].append(v)
+        up[v].append(prev)
+
+    layers = _order_layers(layers, up, down)
+    coord = _assign_coordinates(layers, up, down, float(node_sep))
+
+    placed: Dict[int, Tuple[float, float]] = {}
+    for i in range(n):
+        if linked[i]:
+            placed[i] = (layer_of[i] * float(rank_sep), coord[i])
+    lone = [i for i in range(n) if not linked[i]]
+    if lone:
+        cols = max(1, math.ceil(math.sqrt(len(lone))))
+        base = (max_rank + 1) * float(rank_sep)
+        top = min((c for _r, c in placed.values()), default=0.0)
+        for k, i in enumerate(lone):
+            placed[i] = (base + (k % cols) * float(rank_sep), top + (k // cols) * float(node_sep))
+    if direction == "TB":
+        return {ids[i]: (c, r) for i, (r, c) in placed.items()}
+    return {ids[i]: (r, c) for i, (r, c) in placed.items()}
+
+
+# --- project layout with topology cache ----------------------------------------------
+
+_cache: "OrderedDict[str, Positions]" = OrderedDict()
+_cache_lock = threading.Lock()
+# project_id -> (cache key, revision right after we wrote that layout)
+_written: Dict[str, Tuple[str, int]] = {}
+
+
+def _topology(project_id: str) -> Optional[Tuple[List[str], List[Tuple[str, str]]]]:
+    g = get_graph(project_id)
+    if g is None:
+        return None
+    with g.lock:
+        node_ids = [g.ids[i] for i in g.node_slots()]
+        edges = [(g.ids[s], g.ids[t]) for (s, t, _w) in g.edges.values()]
+    return node_ids, edges
+
+
+def topology_key(node_ids: List[str], edges: List[Tuple[str, str]], algo: str, options: Dict[str, Any]) -> str:
+    h = hashlib.sha256()
+    h.update(repr((algo, sorted(options.items()))).encode())
+    for nid in sorted(node_ids):
+        h.update(nid.encode())
+        h.update(b"\0")
+    h.update(b"\1")
+    for s, t in sorted(edges):
+        h.update(f"{s}>{t}".encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def compute_project_layout(project_id: str, algo: str = "layered", **options: Any) -> Optional[Tuple[str, Positions, bool]]:
+    """(cache key, positions, cache hit) for the project's current topology. None if no such project."""
+    if algo not in ALGORITHMS:
+        raise PositionError(f"unsupported layout algorithm: {algo}")
+    topo = _topology(project_id)
+    if topo is None:
+        return None
+    node_ids, edges = topo
+    key = topology_key(node_ids, edges, algo, options)
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            return key, hit, True
+    positions = layered_layout(node_ids, edges, **options)
+    with _cache_lock:
+        _cache[key] = positions
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return key, positions, False
+
+
+def apply_project_layout(project_id: str, key: str, positions: Positions) -> int:
+    """Write a computed layout, skipping the write when it is already the saved state.
+
+    Does not commit; returns the project revision.
+    """
+    rev = current_revision(project_id)
+    if rev is not None and _written.get(project_id) == (key, rev):
+        return rev
+    return upsert_positions(project_id, positions)
+
+
+def mark_layout_written(project_id: str, key: str, revision: int) -> None:
+    """Record that `key`'s layout is saved as of `revision` (call after commit)."""
+    _written[project_id] = (key, revision)
+
+
+def clear_layout_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+    _written.clear()
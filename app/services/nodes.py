@@ -1,54 +1,239 @@
 from __future__ import annotations
 
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+from sqlalchemy import bindparam, func, literal, select, update
+from sqlalchemy.orm.attributes import set_committed_value
+
 from ..extensions import db
-from ..models import Node, TimeEntry, CostEntry, Comment
+from ..models import Node, Edge, TimeEntry, CostEntry, Comment
+from .revisions import record_graph_changes
+
+
+# Guard for the ancestor CTE against parent_id cycles
+_MAX_DEPTH = 1000
 
 
 def recompute_importance_score(node_id: str) -> None:
-    node = db.session.get(Node, node_id)
-    if not node:
-        return
-    total_hours = float(node.actual_hours or 0) + float(node.planned_hours or 0)
-    degree = len(node.incoming_edges) + len(node.outgoing_edges)
-    descendants = len(node.children)
-    score = 0.5 * _log1p(total_hours) + 0.2 * _log1p(descendants) + 0.2 * _log1p(degree)
-    node.importance_score = float(score)
+    recompute_importance_scores(node_ids=[node_id])
     db.session.commit()
 
 
+def _importance(total_hours: float, descendants: int, degree: int) -> float:
+    return float(0.5 * _log1p(total_hours) + 0.2 * _log1p(descendants) + 0.2 * _log1p(degree))
+
+
+def recompute_importance_scores(project_id: str | None = None, node_ids: Iterable[str] | None = None) -> int:
+    """Recompute importance scores for a set of nodes or a whole project with aggregate queries.
+
+    Degree and child counts come from GROUP BY queries, scores are written with
+    one executemany UPDATE (only rows whose score changed), and the change is
+    recorded in the project revision log. Does not commit. Returns rows updated.
+    """
+    if project_id is None and node_ids is None:
+        raise ValueError("project_id or node_ids is required")
+    ids = list(dict.fromkeys(node_ids)) if node_ids is not None else None
+    if ids is not None and not ids:
+        return 0
+    nt = Node.__table__
+    et = Edge.__table__
+    updates: List[Dict[str, object]] = []
+    by_project: Dict[str, List[str]] = defaultdict(list)
+    chunks = [ids[i:i + 500] for i in range(0, len(ids), 500)] if ids is not None else [None]
+    for chunk in chunks:
+        node_filter = nt.c.id.in_(chunk) if chunk is not None else nt.c.project_id == project_id
+        rows = db.session.execute(
+            select(nt.c.id, nt.c.project_id, nt.c.actual_hours, nt.c.planned_hours, nt.c.importance_score).where(node_filter)
+        ).all()
+        if not rows:
+            continue
+        degree: Dict[str, int] = defaultdict(int)
+        if chunk is not None:
+            out_q = select(et.c.source_node_id, func.count()).where(et.c.source_node_id.in_(chunk)).group_by(et.c.source_node_id)
+            in_q = select(et.c.target_node_id, func.count()).where(et.c.target_node_id.in_(chunk)).group_by(et.c.target_node_id)
+            child_q = select(nt.c.parent_id, func.count()).where(nt.c.parent_id.in_(chunk)).group_by(nt.c.parent_id)
+        else:
+            out_q = select(et.c.source_node_id, func.count()).where(et.c.project_id == project_id).group_by(et.c.source_node_id)
+            in_q = select(et.c.target_node_id, func.count()).where(et.c.project_id == project_id).group_by(et.c.target_node_id)
+            child_q = select(nt.c.parent_id, func.count()).where(nt.c.project_id == project_id, nt.c.parent_id.isnot(None)).group_by(nt.c.parent_id)
+        for q in (out_q, in_q):
+            for nid, cnt in db.session.execute(q).all():
+                degree[nid] += int(cnt)
+        children = {nid: int(cnt) for nid, cnt in db.session.execute(child_q).all()}
+        for nid, pid, actual, planned, old in rows:
+            score = _importance(float(actual or 0) + float(planned or 0), children.get(nid, 0), degree.get(nid, 0))
+            if old is not None and abs(float(old) - score) < 1e-12:
+                continue
+            updates.append({"b_id": nid, "b_score": score})
+            by_project[pid].append(nid)
+    if not updates:
+        return 0
+    db.session.execute(
+        update(nt).where(nt.c.id == bindparam("b_id")).values(importance_score=bindparam("b_score")),
+        updates,
+    )
+    # Keep already-loaded instances in sync without marking them dirty
+    scores = {u["b_id"]: u["b_score"] for u in updates}
+    for obj in list(db.session.identity_map.values()):
+        if isinstance(obj, Node) and obj.id in scores:
+            set_committed_value(obj, "importance_score", scores[obj.id])
+    for pid, changed in by_project.items():
+        record_graph_changes(pid, [("node", nid, "upsert", None) for nid in changed], structural=False)
+    return len(updates)
+
+
 def _log1p(x: float) -> float:
     import math
     return math.log1p(max(0.0, x))
 
 
+_GROUP_STATUSES = {"planned", "in-progress", "done", "blocked"}
+
+
+def _rollup(counts: Dict[str, int]) -> str:
+    """Group status from child status counts (statuses already normalized)."""
+    present = {k for k, v in counts.items() if v > 0}
+    if not present:
+        # empty groups default to planned
+        return "planned"
+    if "blocked" in present:
+        return "blocked"
+    if "in-progress" in present:
+        return "in-progress"
+    if present == {"done"}:
+        return "done"
+    return "planned"
+
+
+def _normalize_status(status: str | None) -> str:
+    # Treat any unknown/non-terminal statuses (e.g., 'discuss') as 'planned' for grouping
+    return status if status in _GROUP_STATUSES else "planned"
+
+
+def _apply_group_statuses(changed: Dict[str, str], project_of: Dict[str, str]) -> int:
+    """Write new group statuses with one executemany UPDATE and log them. Does not commit."""
+    if not changed:
+        return 0
+    nt = Node.__table__
+    now = datetime.utcnow().isoformat() + "Z"
+    db.session.execute(
+        update(nt).where(nt.c.id == bindparam("b_id")).values(status=bindparam("b_status"), updated_at=now),
+        [{"b_id": nid, "b_status": st} for nid, st in changed.items()],
+    )
+    for obj in list(db.session.identity_map.values()):
+        if isinstance(obj, Node) and obj.id in changed:
+            set_committed_value(obj, "status", changed[obj.id])
+            set_committed_value(obj, "updated_at", now)
+    by_project: Dict[str, List[str]] = defaultdict(list)
+    for nid in changed:
+        by_project[project_of[nid]].append(nid)
+    for pid, ids in by_project.items():
+        record_graph_changes(pid, [("node", nid, "upsert", None) for nid in ids], structural=False)
+    return len(changed)
+
+
 def recompute_group_status(start_group_id: str | None) -> None:
     """Recalculate status for a group and its ancestors based on children.
 
     Priority: blocked > in-progress > planned > done. Status 'discuss' is treated as planned.
     All done => done; any blocked => blocked; any in-progress => in-progress; else planned.
+
+    The ancestor chain comes from one recursive CTE, child statuses from one
+    aggregate query; new statuses are folded bottom-up (each level sees the
+    updated status of the level below) and written in one UPDATE. Does not commit.
     """
-    current_id = start_group_id
-    while current_id:
-        group: Node | None = db.session.get(Node, current_id)
-        if not group:
-            break
-        children: list[Node] = db.session.query(Node).filter_by(parent_id=current_id).all()
-        if not children:
-            # empty groups default to planned
-            group.status = "planned"
-        else:
-            # Treat any unknown/non-terminal statuses (e.g., 'discuss') as 'planned' for grouping
-            statuses = { (c.status if c.status in {"planned", "in-progress", "done", "blocked"} else "planned") or "planned" for c in children }
-            if "blocked" in statuses:
-                group.status = "blocked"
-            elif "in-progress" in statuses:
-                group.status = "in-progress"
-            elif statuses == {"done"}:
-                group.status = "done"
-            else:
-                group.status = "planned"
-        db.session.commit()
-        # walk up
-        current_id = group.parent_id
+    if not start_group_id:
+        return
+    nt = Node.__table__
+    anc = (
+        select(nt.c.id, nt.c.parent_id, nt.c.project_id, nt.c.status, literal(0).label("depth"))
+        .where(nt.c.id == start_group_id)
+        .cte("ancestors", recursive=True)
+    )
+    anc = anc.union_all(
+        select(nt.c.id, nt.c.parent_id, nt.c.project_id, nt.c.status, anc.c.depth + 1)
+        .join(anc, nt.c.id == anc.c.parent_id)
+        .where(anc.c.depth < _MAX_DEPTH)
+    )
+    chain: List[tuple] = []
+    seen: set[str] = set()
+    for row in db.session.execute(select(anc.c.id, anc.c.project_id, anc.c.status).order_by(anc.c.depth)).all():
+        if row[0] in seen:
+            break  # parent cycle
+        seen.add(row[0])
+        chain.append(tuple(row))
+    if not chain:
+        return
+    counts: Dict[str, Dict[str, int]] = {nid: defaultdict(int) for nid, _pid, _st in chain}
+    agg = (
+        select(nt.c.parent_id, nt.c.status, func.count())
+        .where(nt.c.parent_id.in_(list(counts)))
+        .group_by(nt.c.parent_id, nt.c.status)
+    )
+    for parent_id, status, cnt in db.session.execute(agg).all():
+        counts[parent_id][_normalize_status(status)] += int(cnt)
+
+    changed: Dict[str, str] = {}
+    prev_id, prev_old, prev_new = None, None, None
+    for nid, _pid, status in chain:
+        c = counts[nid]
+        if prev_id is not None and prev_old != prev_new:
+            # The level below is a child of this one: count its new status instead of the stored one
+            c[_normalize_status(prev_old)] -= 1
+            c[prev_new] += 1
+        new = _rollup(c)
+        if new != status:
+            changed[nid] = new
+        prev_id, prev_old, prev_new = nid, status, new
+    _apply_group_statuses(changed, {nid: pid for nid, pid, _st in chain})
 
 
+def recompute_all_group_statuses(project_id: str) -> int:
+    """Repair mode: recompute every group (and any node with children) of a project bottom-up.
+
+    Loads (id, parent_id, status, is_group) once, folds statuses from the leaves
+    up in Python and writes all changes in one UPDATE. Does not commit.
+    Returns the number of nodes whose status changed.
+    """
+    nt = Node.__table__
+    rows = db.session.execute(
+        select(nt.c.id, nt.c.parent_id, nt.c.status, nt.c.is_group).where(nt.c.project_id == project_id)
+    ).all()
+    status = {nid: st for nid, _p, st, _g in rows}
+    children: Dict[str, List[str]] = defaultdict(list)
+    for nid, parent_id, _st, _g in rows:
+        if parent_id in status:
+            children[parent_id].append(nid)
+    targets = [nid for nid, _p, _st, is_group in rows if is_group or nid in children]
+
+    new_status = dict(status)
+    done: set[str] = set()
+    visiting: set[str] = set()
+    for root in targets:
+        if root in done:
+            continue
+        # Iterative post-order so every child group is final before its parent
+        stack: List[tuple] = [(root, False)]
+        while stack:
+            nid, expanded = stack.pop()
+            if nid in done:
+                continue
+            if not expanded:
+                if nid in visiting:
+                    continue  # parent cycle
+                visiting.add(nid)
+                stack.append((nid, True))
+                for c in children.get(nid, []):
+                    if c not in done and c not in visiting and c in children:
+                        stack.append((c, False))
+                continue
+            visiting.discard(nid)
+            done.add(nid)
+            c_counts: Dict[str, int] = defaultdict(int)
+            for c in children.get(nid, []):
+                c_counts[_normalize_status(new_status[c])] += 1
+            new_status[nid] = _rollup(c_counts)
+    changed = {nid: new_status[nid] for nid in targets if new_status[nid] != status[nid]}
+    return _apply_group_statuses(changed, {nid: project_id for nid in changed})
@@ -0,0 +1,212 @@
+"""Full-fidelity project archives as NDJSON (optionally gzip-compressed).
+
+Format: one JSON object per line, `{"type": <record type>, "data": {...}}`.
+The first line is a `header` (format name, version, source project id,
+revision and the per-type record counts about to follow, for progress), the
+last a `footer` repeating the counts actually written so readers can tell a
+complete archive from a truncated one. Record types follow
+RECORD_TYPES, parents before children, so an importer can insert in file
+order (node parent links may still point forward and are applied last).
+
+Export streams rows with `yield_per` inside one read transaction and never
+holds more than a batch in memory; `iter_records` parses an archive
+incrementally from any binary file object, detecting gzip by its magic bytes.
+"""
+from __future__ import annotations
+
+import json
+import zlib
+from datetime import datetime
+from typing import IO, Any, Dict, Iterable, Iterator, List, Tuple
+
+from sqlalchemy import func, select
+
+from ..extensions import db
+from ..models import (
+    Project, Node, Edge, NodeLayout, NodeTranslation, Comment, CommentTranslation, TimeEntry, CostEntry,
+    StatusChange, Tag, Attachment, node_tag, comment_attachment,
+)
+
+
+FORMAT = "graph-planner/ndjson"
+VERSION = 1
+YIELD_PER = 1000
+READ_CHUNK = 64 * 1024
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Insert order for importers
+RECORD_TYPES = (
+    "project", "node", "edge", "node_layout", "node_translation", "node_tag", "status_change",
+    "time_entry", "cost_entry", "comment", "comment_translation", "attachment", "comment_attachment",
+)
+
+
+class ArchiveError(ValueError):
+    pass
+
+
+def _queries(project_id: str) -> List[Tuple[str, Any]]:
+    nt = Node.__table__
+    ct = Comment.__table__
+    in_project = select(nt.c.id).where(nt.c.project_id == project_id)
+    comments_in_project = select(ct.c.id).where(ct.c.node_id.in_(in_project))
+    at = Attachment.__table__
+    cat = comment_attachment
+    return [
+        ("project", select(Project.__table__).where(Project.__table__.c.id == project_id)),
+        ("node", select(nt).where(nt.c.project_id == project_id).order_by(nt.c.created_at, nt.c.id)),
+        ("edge", select(Edge.__table__).where(Edge.__table__.c.project_id == project_id)),
+        # spatial_id is a local index key, not project data
+        ("node_layout", select(*[c for c in NodeLayout.__table__.c if c.name != "spatial_id"])
+            .where(NodeLayout.__table__.c.node_id.in_(in_project))),
+        ("node_translation", select(NodeTranslation.__table__).where(NodeTranslation.__table__.c.node_id.in_(in_project))),
+        ("node_tag", select(node_tag.c.node_id, Tag.__table__.c.name.label("tag"))
+            .join(Tag.__table__, Tag.__table__.c.id == node_tag.c.tag_id)
+            .where(node_tag.c.node_id.in_(in_project))),
+        ("status_change", select(StatusChange.__table__).where(StatusChange.__table__.c.node_id.in_(in_project))),
+        ("time_entry", select(TimeEntry.__table__).where(TimeEntry.__table__.c.node_id.in_(in_project))),
+        ("cost_entry", select(CostEntry.__table__).where(CostEntry.__table__.c.node_id.in_(in_project))),
+        ("comment", select(ct).where(ct.c.node_id.in_(in_project)).order_by(ct.c.created_at, ct.c.id)),
+        ("comment_translation", select(CommentTranslation.__table__)
+            .where(CommentTranslation.__table__.c.comment_id.in_(comments_in_project))),
+        # Attachment metadata only; files stay in the uploads directory
+        ("attachment", select(at).where(at.c.id.in_(
+            select(cat.c.attachment_id).where(cat.c.comment_id.in_(comments_in_project))))),
+        ("comment_attachment", select(cat).where(cat.c.comment_id.in_(comments_in_project))),
+    ]
+
+
+def _line(kind: str, data: Dict[str, Any]) -> bytes:
+    return (json.dumps({"type": kind, "data": data}, ensure_ascii=False, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+
+
+def iter_export_lines(project_id: str) -> Iterator[bytes]:
+    """Yield the archive line by line. The caller checks that the project exists."""
+    revision = db.session.execute(select(Project.revision).where(Project.id == project_id)).scalar()
+    queries = _queries(project_id)
+    yield _line("header", {
+        "format": FORMAT,
+        "version": VERSION,
+        "project_id": project_id,
+        "revision": int(revision or 0),
+        "exported_at": datetime.utcnow().isoformat() + "Z",
+        "types": list(RECORD_TYPES),
+        "counts": {
+            kind: int(db.session.execute(select(func.count()).select_from(stmt.subquery())).scalar() or 0)
+            for kind, stmt in queries
+        },
+    })
+    counts: Dict[str, int] = {}
+    for kind, stmt in queries:
+        n = 0
+        result = db.session.execute(stmt.execution_options(yield_per=YIELD_PER))
+        for row in result.mappings():
+            yield _line(kind, dict(row))
+            n += 1
+        counts[kind] = n
+    yield _line("footer", {"counts": counts})
+
+
+def iter_buffered(lines: Iterable[bytes], size: int = READ_CHUNK) -> Iterator[bytes]:
+    """Coalesce small lines into ~`size` byte chunks for the response body."""
+    buf: List[bytes] = []
+    pending = 0
+    for line in lines:
+        buf.append(line)
+        pending += len(line)
+        if pending >= size:
+            yield b"".join(buf)
+            buf.clear()
+            pending = 0
+    if buf:
+        yield b"".join(buf)
+
+
+def iter_gzip(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip-compress a byte stream incrementally (wbits=31 writes the gzip container)."""
+    comp = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = comp.compress(chunk)
+        if out:
+            yield out
+    yield comp.flush()
+
+
+def _iter_bytes(fp: IO[bytes]) -> Iterator[bytes]:
+    first = fp.read(READ_CHUNK)
+    if not first:
+        return
+    if first[:2] == GZIP_MAGIC:
+        dec = zlib.decompressobj(31)
+        chunk = first
+        while chunk:
+            data = chunk
+            while data:
+                # Bounded output per call keeps highly compressible input from ballooning memory
+                out = dec.decompress(data, READ_CHUNK * 4)
+                if out:
+                    yield out
+                data = dec.unconsumed_tail
+                if dec.eof and dec.unused_data:
+                    # Concatenated gzip members restart the decoder
+                    data = dec.unused_data
+                    dec = zlib.decompressobj(31)
+            chunk = fp.read(READ_CHUNK)
+        tail = dec.flush()
+        if tail:
+            yield tail
+        if not dec.eof:
+            raise ArchiveError("truncated gzip stream")
+        return
+    chunk = first
+    while chunk:
+        yield chunk
+        chunk = fp.read(READ_CHUNK)
+
+
+def iter_records(fp: IO[bytes]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Parse an archive incrementally, yielding (type, data) for every line.
+
+    The header is validated and yielded first; the footer is yielded last.
+    Raises ArchiveError on malformed input.
+    """
+    buf = b""
+    lineno = 0
+    seen_header = False
+
+    def parse(raw: bytes) -> Tuple[str, Dict[str, Any]]:
+        try:
+            obj = json.loads(raw)
+        except ValueError as e:
+            raise ArchiveError(f"line {lineno}: invalid JSON ({e})")
+        if not isinstance(obj, dict) or not isinstance(obj.get("type"), str) or not isinstance(obj.get("data"), dict):
+            raise ArchiveError(f"line {lineno}: expected {{type, data}}")
+        return obj["type"], obj["data"]
+
+    def check(kind: str, data: Dict[str, Any]) -> None:
+        nonlocal seen_header
+        if not seen_header:
+            if kind != "header" or data.get("format") != FORMAT:
+                raise ArchiveError("not a graph-planner NDJSON archive")
+            if int(data.get("version") or 0) > VERSION:
+                raise ArchiveError(f"unsupported archive version {data.get('version')}")
+            seen_header = True
+
+    for chunk in _iter_bytes(fp):
+        buf += chunk
+        lines = buf.split(b"\n")
+        buf = lines.pop()
+        for raw in lines:
+            lineno += 1
+            if not raw.strip():
+                continue
+            kind, data = parse(raw)
+            check(kind, data)
+            yield kind, data
+    if buf.strip():
+        lineno += 1
+        kind, data = parse(buf)
+        check(kind, data)
+        yield kind, data
+    if not seen_header:
+        raise ArchiveError("empty archive")
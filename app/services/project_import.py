@@ -0,0 +1,484 @@
+"""Resumable, batched import of NDJSON project archives (see project_archive).
+
+An import is a BackgroundJob (type "import") whose meta_json is the
+checkpoint: archive path, id mode, number of records consumed and forward
+parent links still waiting for their parent. Every batch of rows is inserted
+and the checkpoint advanced in the same transaction, so after a crash
+`run_import(job_id)` resumes at the first uncommitted record.
+
+Ids: when the archived project id is free the archive is restored with its
+own ids; otherwise (or with remap=True) every id is replaced by
+uuid5(job namespace, old id). The mapping is a pure function of the job, so
+nothing has to be remembered between batches. Inserts use ON CONFLICT DO
+NOTHING, which makes replaying a partly committed batch harmless.
+
+Starting or resuming claims the job with one conditional UPDATE
+(`claim_import_job`), so concurrent resumers cannot both run it. A job left
+"running" by a worker that died can be claimed once the worker is known to be
+gone: same process and no longer in its active set, or another process and
+the job's `updated_at` (bumped by every checkpoint) is older than the stale
+window. Uploaded archives (`owns_source`) are deleted when the import
+finishes or fails on the archive itself; transient failures keep them for a
+resume.
+
+Users referenced by comments, time entries and attachments fall back to a
+local user when they do not exist here; tags are matched by name.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from flask import Flask
+from sqlalchemy import bindparam, or_, select, update
+
+from ..extensions import db
+from ..models import (
+    Project, Node, Edge, NodeLayout, NodeTranslation, Comment, CommentTranslation, TimeEntry, CostEntry,
+    StatusChange, Tag, User, Attachment, BackgroundJob, comment_attachment, node_tag, generate_uuid,
+)
+from . import graph_cache
+from .project_archive import ArchiveError, iter_records
+from .revisions import record_graph_changes
+
+
+JOB_TYPE = "import"
+# Seconds without a checkpoint after which a "running" job from another process counts as dead
+STALE_AFTER = 300
+
+# Jobs claimed by this process and not yet done
+_active: Set[str] = set()
+_active_lock = threading.Lock()
+# Fixed namespace for remapped ids; combined with the job id per import
+IMPORT_NAMESPACE = uuid.UUID("6f1c2a8e-3b4d-4f6a-9c1e-7d2b5a8e0f13")
+
+TABLES = {
+    "project": Project.__table__,
+    "node": Node.__table__,
+    "edge": Edge.__table__,
+    "node_layout": NodeLayout.__table__,
+    "node_translation": NodeTranslation.__table__,
+    "status_change": StatusChange.__table__,
+    "time_entry": TimeEntry.__table__,
+    "cost_entry": CostEntry.__table__,
+    "comment": Comment.__table__,
+    "comment_translation": CommentTranslation.__table__,
+    "attachment": Attachment.__table__,
+    "comment_attachment": comment_attachment,
+    "node_tag": node_tag,
+}
+# Columns holding ids of archived rows (remapped together with the row ids)
+ID_COLUMNS = {
+    "project": ("id",),
+    "node": ("id", "project_id", "parent_id"),
+    "edge": ("id", "project_id", "source_node_id", "target_node_id"),
+    "node_layout": ("node_id",),
+    "node_translation": ("node_id",),
+    "node_tag": ("node_id",),
+    "status_change": ("id", "node_id"),
+    "time_entry": ("id", "node_id"),
+    "cost_entry": ("id", "node_id"),
+    "comment": ("id", "node_id"),
+    "comment_translation": ("comment_id",),
+    # Attachments describe shared files and keep their ids
+    "attachment": (),
+    "comment_attachment": ("comment_id",),
+}
+USER_COLUMNS = {"node": "assignee_id", "time_entry": "user_id", "comment": "user_id", "attachment": "uploader_user_id"}
+
+
+class ImportJobError(ValueError):
+    """Import cannot start or resume (bad archive, unknown job, job not resumable)."""
+
+
+def _insert(table):
+    if db.engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table).on_conflict_do_nothing()
+
+
+def _load_meta(job: BackgroundJob) -> Dict[str, Any]:
+    try:
+        return json.loads(job.meta_json or "{}")
+    except ValueError:
+        return {}
+
+
+def _count_total(counts: Any) -> int:
+    if not isinstance(counts, dict):
+        return 0
+    return sum(int(n or 0) for n in counts.values())
+
+
+def import_job_active(job: BackgroundJob, stale_after: float = STALE_AFTER) -> bool:
+    """True while a worker may still be running `job` (see module docstring)."""
+    if job.status != "running":
+        return False
+    worker = _load_meta(job).get("worker") or {}
+    if worker.get("pid") == os.getpid():
+        with _active_lock:
+            return job.id in _active
+    try:
+        beat = datetime.fromisoformat(str(job.updated_at).rstrip("Z"))
+    except ValueError:
+        return False
+    return (datetime.utcnow() - beat).total_seconds() < stale_after
+
+
+def resume_blocker(job: BackgroundJob, stale_after: float = STALE_AFTER) -> Optional[str]:
+    """Why `job` cannot be (re)started now, or None when it can."""
+    if job.status == "finished":
+        return "job is finished"
+    if import_job_active(job, stale_after):
+        return "job is still running"
+    if not os.path.exists(_load_meta(job).get("source") or ""):
+        return "archive is no longer available"
+    return None
+
+
+def claim_import_job(job_id: str, stale_after: float = STALE_AFTER) -> Optional[str]:
+    """Atomically mark an import job running for this process and commit.
+
+    Returns None on success, otherwise why the job cannot be claimed. The
+    UPDATE only matches a job that is not finished and either not running or
+    no longer live (stale heartbeat, or the exact row version this process
+    judged dead), so of two concurrent claimers at most one gets the row.
+    """
+    job = db.session.get(BackgroundJob, job_id)
+    if job is None or job.type != JOB_TYPE:
+        return "unknown import job"
+    blocker = resume_blocker(job, stale_after)
+    if blocker:
+        return blocker
+    now = datetime.utcnow()
+    # A dead worker of this process is known from `_active`, not the heartbeat: accept exactly the row version inspected
+    own = (_load_meta(job).get("worker") or {}).get("pid") == os.getpid()
+    seen = job.updated_at if job.status == "running" and own else None
+    bt = BackgroundJob.__table__
+    claimed = db.session.execute(
+        update(bt)
+        .where(
+            bt.c.id == job_id,
+            bt.c.status != "finished",
+            or_(bt.c.status != "running", bt.c.updated_at < (now - timedelta(seconds=stale_after)).isoformat() + "Z",
+                bt.c.updated_at == seen),
+        )
+        .values(status="running", error=None, updated_at=now.isoformat() + "Z")
+    ).rowcount
+    if claimed != 1:
+        db.session.rollback()
+        return "job is already being resumed"
+    db.session.refresh(job)
+    meta = _load_meta(job)
+    meta["worker"] = {"pid": os.getpid()}
+    job.meta_json = json.dumps(meta)
+    with _active_lock:
+        _active.add(job_id)
+    db.session.commit()
+    return None
+
+
+def _discard_source(meta: Dict[str, Any]) -> None:
+    if meta.get("owns_source") and meta.get("source"):
+        try:
+            os.remove(meta["source"])
+        except OSError:
+            pass
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as fp:
+        for kind, data in iter_records(fp):
+            return data
+    raise ArchiveError("empty archive")
+
+
+def create_import_job(path: str, batch_size: int = 1000, remap: Optional[bool] = None, owns_source: bool = False) -> str:
+    """Validate the archive header and register a queued import job. Returns the job id.
+
+    `owns_source` marks `path` as a private copy (an upload) that the import may delete.
+    """
+    header = read_header(path)
+    source_pid = str(header.get("project_id") or "")
+    if not source_pid:
+        raise ArchiveError("archive header has no project_id")
+    # Archives with header counts give progress a total up front; older ones get it from the footer
+    job = BackgroundJob(type=JOB_TYPE, status="queued", total=_count_total(header.get("counts")), done=0,
+                        translated=0, skipped=0)
+    db.session.add(job)
+    db.session.flush()
+    if remap is None:
+        remap = db.session.get(Project, source_pid) is not None
+    target_pid = str(uuid.uuid5(uuid.uuid5(IMPORT_NAMESPACE, job.id), source_pid)) if remap else source_pid
+    job.meta_json = json.dumps({
+        "source": path,
+        "source_project_id": source_pid,
+        "exported_at": header.get("exported_at"),
+        "project_id": target_pid,
+        "remap": bool(remap),
+        "owns_source": bool(owns_source),
+        "batch_size": max(1, int(batch_size)),
+        "records": 0,
+        "pending_parents": {},
+        "inserted": {},
+    })
+    db.session.commit()
+    return job.id
+
+
+class _Batch:
+    """Per-run state: id mapping, user/tag lookups, pending parent links."""
+
+    def __init__(self, job: BackgroundJob, meta: Dict[str, Any], fallback_user_id: Optional[str]) -> None:
+        self.job = job
+        self.meta = meta
+        self.pid = meta["project_id"]
+        ns = uuid.uuid5(IMPORT_NAMESPACE, job.id)
+        if meta.get("remap"):
+            self.map_id: Callable[[Any], Any] = lambda v: str(uuid.uuid5(ns, str(v))) if v else v
+        else:
+            self.map_id = lambda v: v
+        self.pending: Dict[str, str] = dict(meta.get("pending_parents") or {})
+        self.inserted: Dict[str, int] = dict(meta.get("inserted") or {})
+        self._users: Dict[str, bool] = {}
+        self._fallback_user_id = fallback_user_id
+        self._tags: Dict[str, str] = {}
+
+    # --- lookups ---------------------------------------------------------------------
+
+    def _fallback_user(self) -> str:
+        if self._fallback_user_id is None:
+            u = db.session.query(User).filter_by(email="demo@example.com").first()
+            if u is None:
+                u = User(email="demo@example.com", name="Demo User")
+                db.session.add(u)
+                db.session.flush()
+            self._fallback_user_id = u.id
+        return self._fallback_user_id
+
+    def user(self, uid: Any, nullable: bool) -> Optional[str]:
+        if uid:
+            known = self._users.get(uid)
+            if known is None:
+                known = db.session.get(User, uid) is not None
+                self._users[uid] = known
+            if known:
+                return uid
+        return None if nullable else self._fallback_user()
+
+    def tag_id(self, name: str) -> str:
+        tid = self._tags.get(name)
+        if tid is None:
+            tt = Tag.__table__
+            db.session.execute(_insert(tt), [{"id": generate_uuid(), "name": name}])
+            tid = db.session.execute(select(tt.c.id).where(tt.c.name == name)).scalar_one()
+            self._tags[name] = tid
+        return tid
+
+    # --- rows ----------------------------------------------------------------------------
+
+    def prepare(self, kind: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if kind == "node_tag":
+            if not data.get("node_id") or not data.get("tag"):
+                return None
+            return {"node_id": self.map_id(data["node_id"]), "tag_id": self.tag_id(str(data["tag"]))}
+        cols = TABLES[kind].c
+        row = {k: v for k, v in data.items() if k in cols}
+        for col in ID_COLUMNS[kind]:
+            if row.get(col):
+                row[col] = self.map_id(row[col])
+        if kind == "project":
+            row["id"] = self.pid
+            row.pop("revision", None)
+            if self.meta.get("remap") and row.get("name"):
+                row["name"] = f"{row['name']} (import)"
+        elif kind in ("node", "edge"):
+            row["project_id"] = self.pid
+        elif kind == "node_layout":
+            # Local R*Tree key; the insert trigger assigns a fresh one
+            row.pop("spatial_id", None)
+        ucol = USER_COLUMNS.get(kind)
+        if ucol and ucol in row:
+            row[ucol] = self.user(row[ucol], nullable=cols[ucol].nullable)
+        return row
+
+    def _existing(self, table, ids: Iterable[str]) -> Set[str]:
+        ids = list(set(ids))
+        found: Set[str] = set()
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            found.update(db.session.execute(select(table.c.id).where(table.c.id.in_(chunk))).scalars())
+        return found
+
+    def insert(self, kind: str, rows: List[Dict[str, Any]]) -> None:
+        table = TABLES[kind]
+        if kind == "node":
+            rows = self._split_parents(rows)
+        elif kind == "comment_attachment":
+            present = self._existing(Attachment.__table__, [r["attachment_id"] for r in rows if r.get("attachment_id")])
+            rows = [r for r in rows if r.get("attachment_id") in present]
+        # executemany needs one key set per statement: insert consecutive runs with equal keys
+        start = 0
+        for k in range(1, len(rows) + 1):
+            if k == len(rows) or rows[k].keys() != rows[start].keys():
+                result = db.session.execute(_insert(table), rows[start:k])
+                count = result.rowcount if result.rowcount is not None and result.rowcount >= 0 else k - start
+                self.inserted[kind] = self.inserted.get(kind, 0) + count
+                start = k
+        if kind == "node":
+            self._resolve_pending()
+
+    def _split_parents(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep parent links whose parent precedes the child; defer the rest."""
+        wanted = {r["parent_id"] for r in rows if r.get("parent_id")}
+        present = self._existing(Node.__table__, wanted) if wanted else set()
+        seen: Set[str] = set()
+        for r in rows:
+            parent = r.get("parent_id")
+            if parent and parent not in present and parent not in seen:
+                self.pending[r["id"]] = parent
+                r["parent_id"] = None
+            seen.add(r["id"])
+        return rows
+
+    def _resolve_pending(self) -> None:
+        if not self.pending:
+            return
+        present = self._existing(Node.__table__, self.pending.values())
+        ready = [(c, p) for c, p in self.pending.items() if p in present]
+        if not ready:
+            return
+        nt = Node.__table__
+        db.session.execute(
+            update(nt).where(nt.c.id == bindparam("b_id")).values(parent_id=bindparam("b_parent")),
+            [{"b_id": c, "b_parent": p} for c, p in ready],
+        )
+        for c, _p in ready:
+            del self.pending[c]
+
+
+def _checkpoint(state: _Batch, records: int, **fields: Any) -> None:
+    meta = state.meta
+    meta["records"] = records
+    meta["pending_parents"] = state.pending
+    meta["inserted"] = state.inserted
+    meta.update(fields)
+    state.job.meta_json = json.dumps(meta)
+    state.job.done = records
+
+
+def run_import(job_id: str, fallback_user_id: Optional[str] = None, progress: Optional[Callable[[int], None]] = None,
+               stale_after: float = STALE_AFTER, claimed: bool = False) -> Dict[str, Any]:
+    """Run (or resume) an import job to completion. Returns the final checkpoint.
+
+    Claims the job first unless the caller already did (`claimed=True`, e.g.
+    a route that answered 409 itself). Each batch commits rows and checkpoint
+    together; on error the transaction is rolled back, the job is marked
+    failed and the exception re-raised.
+    """
+    if not claimed:
+        blocker = claim_import_job(job_id, stale_after)
+        if blocker:
+            raise ImportJobError(f"import job {job_id}: {blocker}")
+    try:
+        return _run_claimed(job_id, fallback_user_id, progress)
+    finally:
+        with _active_lock:
+            _active.discard(job_id)
+
+
+def _run_claimed(job_id: str, fallback_user_id: Optional[str], progress: Optional[Callable[[int], None]]) -> Dict[str, Any]:
+    job = db.session.get(BackgroundJob, job_id)
+    if job is None or job.type != JOB_TYPE:
+        raise ImportJobError(f"unknown import job {job_id}")
+    meta = _load_meta(job)
+    state = _Batch(job, meta, fallback_user_id)
+    skip = int(meta.get("records") or 0)
+    batch_size = int(meta.get("batch_size") or 1000)
+    try:
+        consumed = 0
+        buffer: List[Tuple[str, Dict[str, Any]]] = []
+        footer: Optional[Dict[str, Any]] = None
+        unknown = int(meta.get("unknown") or 0)
+
+        def flush() -> None:
+            start = 0
+            for k in range(1, len(buffer) + 1):
+                if k == len(buffer) or buffer[k][0] != buffer[start][0]:
+                    kind = buffer[start][0]
+                    rows = [r for r in (state.prepare(kind, d) for _k, d in buffer[start:k]) if r is not None]
+                    if rows:
+                        state.insert(kind, rows)
+                    start = k
+            if job.project_id is None and any(k == "project" for k, _d in buffer):
+                job.project_id = state.pid
+            _checkpoint(state, consumed, unknown=unknown)
+            db.session.commit()
+            buffer.clear()
+            if progress:
+                progress(consumed)
+
+        with open(meta["source"], "rb") as fp:
+            records = iter_records(fp)
+            header = next(records)[1]
+            if str(header.get("project_id")) != meta.get("source_project_id") or header.get("exported_at") != meta.get("exported_at"):
+                raise ImportJobError("archive does not match the job checkpoint")
+            for kind, data in records:
+                if kind == "footer":
+                    footer = data
+                    job.total = _count_total(data.get("counts")) or job.total
+                    break
+                consumed += 1
+                if consumed <= skip:
+                    continue
+                if kind not in ID_COLUMNS:
+                    unknown += 1
+                    continue
+                buffer.append((kind, data))
+                if len(buffer) >= batch_size:
+                    flush()
+            flush()
+        if footer is None:
+            raise ArchiveError("archive has no footer (truncated?)")
+        graph_cache.drop(state.pid)
+        record_graph_changes(state.pid, [])
+        job.total = max(job.total or 0, consumed)
+        job.status = "finished"
+        _checkpoint(state, consumed, unknown=unknown, expected=footer.get("counts") or {})
+        db.session.commit()
+        _discard_source(state.meta)
+        return state.meta
+    except Exception as e:
+        db.session.rollback()
+        failed = db.session.get(BackgroundJob, job_id)
+        if failed is not None:
+            failed.status = "failed"
+            failed.error = str(e)
+            db.session.commit()
+        if isinstance(e, (ArchiveError, ImportJobError)):
+            # The archive itself is bad: a resume would fail the same way
+            _discard_source(meta)
+        raise
+
+
+def enqueue_import(app: Flask, job_id: str, fallback_user_id: Optional[str] = None, claimed: bool = False) -> None:
+    """Run an import job in a daemon thread (progress via GET /jobs/<id>)."""
+
+    def _runner() -> None:
+        with app.app_context():
+            try:
+                run_import(job_id, fallback_user_id=fallback_user_id, claimed=claimed)
+                logging.info(f"[import job {job_id}] finished")
+            except Exception:
+                logging.exception(f"[import job {job_id}] failed")
+            finally:
+                db.session.remove()
+
+    threading.Thread(target=_runner, name=f"import-{job_id}", daemon=True).start()
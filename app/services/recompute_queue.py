@@ -0,0 +1,124 @@
+"""Deferred, coalesced recomputation of derived node fields after writes.
+
+Routes call `schedule_recompute(scores=..., groups=...)` instead of running
+importance-score and group-status updates inline. Node ids are deduplicated
+and processed once, in one transaction, according to RECOMPUTE_MODE:
+
+- sync: run immediately (strong consistency; used by tests)
+- request: collect per request in `flask.g` and run in `after_request`
+- background: hand off to a single worker thread that drains a shared set
+
+Responses in request/background modes may carry the previous score; clients
+pick up the recomputed values through the revision/changes feed.
+"""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List
+
+from flask import Flask, current_app, g, has_request_context
+
+from ..extensions import db
+from .nodes import recompute_group_status, recompute_importance_scores
+
+
+MODES = {"sync", "request", "background"}
+
+_executor = ThreadPoolExecutor(max_workers=1)
+_lock = threading.Lock()
+_pending_scores: Dict[str, None] = {}
+_pending_groups: Dict[str, None] = {}
+_draining = False
+
+
+def _mode() -> str:
+    mode = str(current_app.config.get("RECOMPUTE_MODE") or "request").lower()
+    return mode if mode in MODES else "request"
+
+
+def run_recompute(score_ids: Iterable[str], group_ids: Iterable[str]) -> None:
+    """Apply group-status rollups, then importance scores, and commit once."""
+    for gid in dict.fromkeys(group_ids):
+        recompute_group_status(gid)
+    ids = list(dict.fromkeys(score_ids))
+    if ids:
+        recompute_importance_scores(node_ids=ids)
+    db.session.commit()
+
+
+def schedule_recompute(scores: Iterable[str | None] = (), groups: Iterable[str | None] = ()) -> None:
+    score_ids = [i for i in scores if i]
+    group_ids = [i for i in groups if i]
+    if not score_ids and not group_ids:
+        return
+    mode = _mode()
+    if mode == "background":
+        _enqueue_background(current_app._get_current_object(), score_ids, group_ids)
+        return
+    if mode == "sync" or not has_request_context():
+        run_recompute(score_ids, group_ids)
+        return
+    pending = g.setdefault("_recompute_pending", ({}, {}))
+    pending[0].update(dict.fromkeys(score_ids))
+    pending[1].update(dict.fromkeys(group_ids))
+
+
+def _flush_request(response):
+    pending = g.pop("_recompute_pending", None)
+    if pending and (pending[0] or pending[1]):
+        try:
+            run_recompute(pending[0], pending[1])
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception('[recompute] deferred recompute failed')
+    return response
+
+
+def _enqueue_background(app: Flask, score_ids: List[str], group_ids: List[str]) -> None:
+    global _draining
+    with _lock:
+        _pending_scores.update(dict.fromkeys(score_ids))
+        _pending_groups.update(dict.fromkeys(group_ids))
+        if _draining:
+            return
+        _draining = True
+    _executor.submit(_drain, app)
+
+
+def _drain(app: Flask) -> None:
+    global _draining
+    while True:
+        with _lock:
+            scores = list(_pending_scores)
+            groups = list(_pending_groups)
+            _pending_scores.clear()
+            _pending_groups.clear()
+            if not scores and not groups:
+                _draining = False
+                return
+        with app.app_context():
+            try:
+                run_recompute(scores, groups)
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('[recompute] background recompute failed')
+            finally:
+                db.session.remove()
+
+
+def wait_idle(timeout: float = 5.0) -> bool:
+    """Block until the background queue is drained (tests/CLI). Returns False on timeout."""
+    import time
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with _lock:
+            if not _draining:
+                return True
+        time.sleep(0.01)
+    return False
+
+
+def init_app(app: Flask) -> None:
+    app.after_request(_flush_request)
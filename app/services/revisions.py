@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import event, insert, or_, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..extensions import db
+from ..models import Project, Node, Edge, NodeLayout, NodeTranslation, GraphChange, generate_uuid
+
+
+# (entity, entity_id, op, lang)
+Change = Tuple[str, str, str, "str | None"]
+
+
+def current_revision(project_id: str) -> int | None:
+    """Return the project's graph revision, or None if the project does not exist."""
+    rev = db.session.execute(select(Project.revision).where(Project.id == project_id)).scalar_one_or_none()
+    return int(rev or 0) if rev is not None else None
+
+
+def bump_revision(session: Session, project_id: str, changes: Iterable[Change]) -> int:
+    """Increment the project revision and append change-log rows, using Core statements.
+
+    Safe to call from flush hooks and from bulk code paths that bypass the ORM
+    unit of work (executemany inserts, bulk UPDATEs). Returns the new revision.
+    """
+    pt = Project.__table__
+    session.execute(update(pt).where(pt.c.id == project_id).values(revision=pt.c.revision + 1))
+    rev = int(session.execute(select(pt.c.revision).where(pt.c.id == project_id)).scalar() or 0)
+    rows = [
+        {"project_id": project_id, "revision": rev, "entity": ent, "entity_id": eid, "op": op, "lang": lang}
+        for (ent, eid, op, lang) in changes
+    ]
+    if rows:
+        session.execute(insert(GraphChange.__table__), rows)
+    # Keep an already-loaded Project instance in sync without marking it dirty
+    for obj in session.identity_map.values():
+        if isinstance(obj, Project) and obj.id == project_id:
+            set_committed_value(obj, "revision", rev)
+            break
+    return rev
+
+
+def record_graph_changes(project_id: str, changes: Iterable[Change], structural: bool = True) -> int:
+    """Public helper for bulk writers: bump revision in the current session transaction.
+
+    Pass structural=False for writes that touch neither edges, parents nor
+    planned hours (e.g. score columns) so cached adjacency stays valid.
+    """
+    session = db.session()
+    rev = bump_revision(session, project_id, list(changes))
+    seen = session.info.setdefault("graph_revisions", {})
+    if structural:
+        # Bulk writes are invisible to write-through caches: a None base forces a rebuild
+        seen[project_id] = (None, rev)
+    else:
+        seen[project_id] = (seen[project_id][0] if project_id in seen else rev - 1, rev)
+    return rev
+
+
+def _project_ids_for_nodes(session: Session, node_ids: Iterable[str]) -> Dict[str, str]:
+    ids = [i for i in set(node_ids) if i]
+    if not ids:
+        return {}
+    out: Dict[str, str] = {}
+    for obj in session.identity_map.values():
+        if isinstance(obj, Node) and obj.id in ids and obj.project_id:
+            out[obj.id] = obj.project_id
+    missing = [i for i in ids if i not in out]
+    if missing:
+        for nid, pid in session.execute(select(Node.id, Node.project_id).where(Node.id.in_(missing))).all():
+            out[nid] = pid
+    return out
+
+
+@event.listens_for(Session, "before_flush")
+def _track_graph_writes(session: Session, flush_context, instances) -> None:  # type: ignore[no-redef]
+    """Collect graph entity writes of this flush and bump the owning projects' revisions."""
+    deleted = [o for o in session.deleted if isinstance(o, (Node, Edge, NodeLayout, NodeTranslation))]
+    new = [o for o in session.new if isinstance(o, (Node, Edge, NodeLayout, NodeTranslation))]
+    dirty = [
+        o for o in session.dirty
+        if isinstance(o, (Node, Edge, NodeLayout, NodeTranslation)) and session.is_modified(o, include_collections=False)
+    ]
+    if not (deleted or new or dirty):
+        return
+
+    by_project: Dict[str, List[Change]] = defaultdict(list)
+    with session.no_autoflush:
+        # Ids are generated at INSERT time; assign them now so the change log can reference them
+        for o in new:
+            if isinstance(o, (Node, Edge)) and not o.id:
+                o.id = generate_uuid()
+        child_rows = [o for o in new + dirty + deleted if isinstance(o, (NodeLayout, NodeTranslation))]
+        node_projects = _project_ids_for_nodes(session, [o.node_id for o in child_rows])
+
+        for o in new + dirty:
+            if isinstance(o, Node):
+                by_project[o.project_id].append(("node", o.id, "upsert", None))
+            elif isinstance(o, Edge):
+                by_project[o.project_id].append(("edge", o.id, "upsert", None))
+            elif isinstance(o, NodeLayout):
+                pid = node_projects.get(o.node_id)
+                if pid:
+                    by_project[pid].append(("position", o.node_id, "upsert", None))
+            elif isinstance(o, NodeTranslation):
+                pid = node_projects.get(o.node_id)
+                if pid:
+                    by_project[pid].append(("translation", o.node_id, "upsert", o.lang))
+
+        deleted_node_ids = {o.id for o in deleted if isinstance(o, Node)}
+        for o in deleted:
+            if isinstance(o, Node):
+                by_project[o.project_id].append(("node", o.id, "delete", None))
+                by_project[o.project_id].append(("position", o.id, "delete", None))
+            elif isinstance(o, Edge):
+                by_project[o.project_id].append(("edge", o.id, "delete", None))
+            elif isinstance(o, NodeLayout):
+                pid = node_projects.get(o.node_id)
+                if pid and o.node_id not in deleted_node_ids:
+                    by_project[pid].append(("position", o.node_id, "delete", None))
+            elif isinstance(o, NodeTranslation):
+                pid = node_projects.get(o.node_id)
+                if pid and o.node_id not in deleted_node_ids:
+                    by_project[pid].append(("translation", o.node_id, "delete", o.lang))
+        # Edges removed through node delete cascades never show up in session.deleted
+        if deleted_node_ids:
+            explicit = {o.id for o in deleted if isinstance(o, Edge)}
+            q = select(Edge.id, Edge.project_id).where(
+                or_(Edge.source_node_id.in_(deleted_node_ids), Edge.target_node_id.in_(deleted_node_ids))
+            )
+            for eid, pid in session.execute(q).all():
+                if eid not in explicit:
+                    by_project[pid].append(("edge", eid, "delete", None))
+
+        # Projects created or deleted in this same flush have no clients to sync
+        pending = {o.id: o for o in session.new if isinstance(o, Project)}
+        dropped = {o.id for o in session.deleted if isinstance(o, Project)}
+        for pid, changes in by_project.items():
+            if not pid or pid in dropped:
+                continue
+            if pid in pending:
+                pending[pid].revision = int(pending[pid].revision or 0) + 1
+                continue
+            rev = bump_revision(session, pid, changes)
+            # (revision before this transaction's first bump, latest revision) for write-through caches
+            seen = session.info.setdefault("graph_revisions", {})
+            seen[pid] = (seen[pid][0] if pid in seen else rev - 1, rev)
+
+
+def changes_since(project_id: str, since: int, upto: int) -> Dict[str, Dict[Tuple[str, "str | None"], str]]:
+    """Collapse change-log rows in (since, upto] to the last op per entity.
+
+    Returns {entity: {(entity_id, lang): op}}.
+    """
+    q = (
+        select(GraphChange.entity, GraphChange.entity_id, GraphChange.lang, GraphChange.op)
+        .where(GraphChange.project_id == project_id, GraphChange.revision > since, GraphChange.revision <= upto)
+        .order_by(GraphChange.id)
+    )
+    out: Dict[str, Dict[Tuple[str, "str | None"], str]] = defaultdict(dict)
+    for ent, eid, lang, op in db.session.execute(q).all():
+        out[ent][(eid, lang)] = op
+    return out
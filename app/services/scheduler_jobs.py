@@ -56,3 +56,41 @@ def backup_db_job() -> None:
             print('[scheduler] backup failed (no logger available)')
 
 
+
+
+def sqlite_maintenance_job() -> None:
+    """APScheduler job: checkpoint the WAL and let SQLite refresh planner statistics.
+
+    `wal_checkpoint(TRUNCATE)` keeps the -wal file from growing without bound while
+    readers are active; `PRAGMA optimize` runs ANALYZE only where it is likely useful.
+    """
+    try:
+        try:
+            app = current_app._get_current_object()
+            push_ctx = False
+        except Exception:
+            from .. import create_app
+            app = create_app()
+            push_ctx = True
+
+        ctx = app.app_context() if push_ctx else None
+        if ctx:
+            ctx.push()
+        try:
+            from ..extensions import db
+
+            engine = db.engine
+            if engine.dialect.name != "sqlite":
+                return
+            with engine.connect() as conn:
+                busy, log_frames, checkpointed = conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").one()
+                conn.exec_driver_sql("PRAGMA optimize")
+            app.logger.info('[scheduler] sqlite maintenance: busy=%s log=%s checkpointed=%s', busy, log_frames, checkpointed)
+        finally:
+            if ctx:
+                ctx.pop()
+    except Exception:
+        try:
+            app.logger.exception('[scheduler] sqlite maintenance failed')  # type: ignore[name-defined]
+        except Exception:
+            print('[scheduler] sqlite maintenance failed (no logger available)')
@@ -0,0 +1,110 @@
+"""Critical path method (CPM) schedule over a project's cached graph.
+
+Durations are node `planned_hours`; an edge u -> v with weight w means v may
+start w hours after u finishes (finish-to-start with lag). Both passes run as
+flat loops over edges sorted by the topological position of their source, so
+each pass is a single sweep without per-node adjacency lookups.
+
+Nodes on dependency cycles have no valid schedule; they are reported in
+`cyclic_node_ids` and excluded from the passes (edges touching them included).
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from .graph_cache import ProjectGraph, get_graph
+
+
+EPS = 1e-9
+
+
+def compute_schedule(g: ProjectGraph) -> Dict[str, Any]:
+    """Compute ES/EF/LS/LF and total/free float for every node. Caller must hold `g.lock`."""
+    n = len(g.ids)
+    slots = g.node_slots()
+    indeg = [0] * n
+    for i in slots:
+        indeg[i] = len(g.pred[i])
+    q = deque(i for i in slots if indeg[i] == 0)
+    topo: List[int] = []
+    succ = g.succ
+    while q:
+        u = q.popleft()
+        topo.append(u)
+        for v in succ[u]:
+            indeg[v] -= 1
+            if indeg[v] == 0:
+                q.append(v)
+    pos = [-1] * n
+    for p, i in enumerate(topo):
+        pos[i] = p
+    cyclic = [i for i in slots if pos[i] < 0]
+
+    dur = g.planned
+    # Edges among scheduled nodes, ordered by source position
+    edges = sorted(
+        ((pos[s], s, t, w) for (s, t, w) in g.edges.values() if pos[s] >= 0 and pos[t] >= 0),
+    )
+
+    # Forward pass: ES[t] = max(EF[s] + lag)
+    es = [0.0] * n
+    for _p, s, t, w in edges:
+        cand = es[s] + dur[s] + w
+        if cand > es[t]:
+            es[t] = cand
+    project_end = max((es[i] + dur[i] for i in topo), default=0.0)
+
+    # Backward pass: LF[s] = min(LS[t] - lag), visiting sources in reverse order
+    lf = [project_end] * n
+    free = [project_end - (es[i] + dur[i]) for i in range(n)]
+    has_succ = [False] * n
+    for _p, s, t, w in reversed(edges):
+        cand = lf[t] - dur[t] - w
+        if cand < lf[s]:
+            lf[s] = cand
+        slack = es[t] - w - (es[s] + dur[s])
+        if not has_succ[s] or slack < free[s]:
+            free[s] = slack
+            has_succ[s] = True
+
+    rows: List[Dict[str, Any]] = []
+    critical: List[str] = []
+    for i in topo:
+        ef = es[i] + dur[i]
+        ls = lf[i] - dur[i]
+        total = ls - es[i]
+        is_crit = abs(total) < EPS
+        if is_crit:
+            critical.append(g.ids[i])
+        rows.append({
+            "id": g.ids[i],
+            "duration": dur[i],
+            "es": es[i],
+            "ef": ef,
+            "ls": ls,
+            "lf": lf[i],
+            "total_float": total,
+            "free_float": max(0.0, free[i]),
+            "critical": is_crit,
+        })
+    return {
+        "project_end": project_end,
+        "critical_node_ids": critical,
+        "cyclic_node_ids": [g.ids[i] for i in cyclic],
+        "nodes": rows,
+    }
+
+
+def project_schedule(project_id: str) -> Optional[Dict[str, Any]]:
+    """CPM schedule for a project, memoized per cached graph revision. None if no such project."""
+    g = get_graph(project_id)
+    if g is None:
+        return None
+    with g.lock:
+        memo = getattr(g, "schedule", None)
+        if memo is not None and memo[0] == g.revision:
+            return memo[1]
+        result = compute_schedule(g)
+        g.schedule = (g.revision, result)  # type: ignore[attr-defined]
+        return result
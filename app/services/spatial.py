@@ -0,0 +1,116 @@
+"""Viewport queries over node positions, backed by an SQLite R*Tree when available.
+
+`node_layout_rtree` mirrors node_layout as degenerate boxes (x..x, y..y) keyed
+by `node_layout.spatial_id` and is kept in sync by triggers, so every writer
+(ORM, Core upserts, raw SQL) updates it. The insert trigger assigns spatial_id
+(max + 1, via its unique index) when the writer left it NULL; it is a real
+column, so VACUUM does not renumber it the way it may renumber rowids of a
+table without an INTEGER PRIMARY KEY. The triggers delete-then-insert rather
+than INSERT OR REPLACE: an outer statement's conflict policy (e.g. an UPSERT)
+overrides the one inside a trigger. Tables created via create_all get it from an
+after_create hook; existing databases from the Alembic migration.
+
+When the rtree module is missing, queries fall back to a plain range filter.
+"""
+from __future__ import annotations
+
+from typing import List
+
+from flask import current_app
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..extensions import db
+from ..models import Node, NodeLayout
+
+
+RTREE_TABLE = "node_layout_rtree"
+
+DDL_STATEMENTS = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {RTREE_TABLE} USING rtree(id, min_x, max_x, min_y, max_y)",
+    # rowid is only used to find the row just inserted by the same statement
+    f"""CREATE TRIGGER IF NOT EXISTS node_layout_rtree_ai AFTER INSERT ON node_layout BEGIN
+        UPDATE node_layout SET spatial_id = (SELECT COALESCE(MAX(spatial_id), 0) + 1 FROM node_layout)
+            WHERE rowid = NEW.rowid AND spatial_id IS NULL;
+        DELETE FROM {RTREE_TABLE} WHERE id = (SELECT spatial_id FROM node_layout WHERE rowid = NEW.rowid);
+        INSERT INTO {RTREE_TABLE}(id, min_x, max_x, min_y, max_y)
+            SELECT spatial_id, x, x, y, y FROM node_layout WHERE rowid = NEW.rowid;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS node_layout_rtree_au AFTER UPDATE OF x, y ON node_layout
+        WHEN NEW.spatial_id IS NOT NULL BEGIN
+        DELETE FROM {RTREE_TABLE} WHERE id = NEW.spatial_id;
+        INSERT INTO {RTREE_TABLE}(id, min_x, max_x, min_y, max_y) VALUES (NEW.spatial_id, NEW.x, NEW.x, NEW.y, NEW.y);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS node_layout_rtree_ad AFTER DELETE ON node_layout BEGIN
+        DELETE FROM {RTREE_TABLE} WHERE id = OLD.spatial_id;
+    END""",
+]
+
+
+@event.listens_for(NodeLayout.__table__, "after_create")
+def _create_rtree(target, connection, **kw) -> None:  # type: ignore[no-redef]
+    if connection.dialect.name != "sqlite":
+        return
+    try:
+        for stmt in DDL_STATEMENTS:
+            connection.exec_driver_sql(stmt)
+    except SQLAlchemyError:
+        # SQLite built without the rtree module: viewport queries use the range fallback
+        pass
+
+
+def rtree_available() -> bool:
+    try:
+        row = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"), {"n": RTREE_TABLE}
+        ).first()
+        return row is not None
+    except SQLAlchemyError:
+        return False
+
+
+def rebuild_spatial_index() -> int:
+    """Repopulate the R*Tree from node_layout (after a restore or manual edits). Does not commit."""
+    db.session.execute(text(
+        "UPDATE node_layout SET spatial_id = (SELECT COALESCE(MAX(spatial_id), 0) FROM node_layout) + rowid "
+        "WHERE spatial_id IS NULL"
+    ))
+    db.session.execute(text(f"DELETE FROM {RTREE_TABLE}"))
+    db.session.execute(text(
+        f"INSERT INTO {RTREE_TABLE}(id, min_x, max_x, min_y, max_y) SELECT spatial_id, x, x, y, y FROM node_layout"
+    ))
+    return int(db.session.execute(text(f"SELECT count(*) FROM {RTREE_TABLE}")).scalar() or 0)
+
+
+def node_ids_in_bbox(project_id: str, x1: float, y1: float, x2: float, y2: float, include_hidden: bool = False) -> List[str]:
+    """Ids of project nodes whose saved position lies inside the box (inclusive).
+
+    Nodes without a saved position are never returned.
+    """
+    x1, x2 = min(x1, x2), max(x1, x2)
+    y1, y2 = min(y1, y2), max(y1, y2)
+    params = {"pid": project_id, "x1": x1, "x2": x2, "y1": y1, "y2": y2}
+    hidden_sql = "" if include_hidden else " AND n.is_hidden = 0"
+    if db.engine.dialect.name == "sqlite" and rtree_available():
+        # rtree stores 32-bit floats rounded outward; the exact x/y filter trims the margin
+        sql = (
+            f"SELECT nl.node_id FROM {RTREE_TABLE} r "
+            "JOIN node_layout nl ON nl.spatial_id = r.id "
+            "JOIN node n ON n.id = nl.node_id "
+            "WHERE r.min_x <= :x2 AND r.max_x >= :x1 AND r.min_y <= :y2 AND r.max_y >= :y1 "
+            "AND nl.x BETWEEN :x1 AND :x2 AND nl.y BETWEEN :y1 AND :y2 "
+            f"AND n.project_id = :pid{hidden_sql}"
+        )
+        try:
+            return [r[0] for r in db.session.execute(text(sql), params).all()]
+        except SQLAlchemyError:
+            current_app.logger.warning('[spatial] rtree query failed; using range fallback')
+    q = (
+        db.session.query(NodeLayout.node_id)
+        .join(Node, Node.id == NodeLayout.node_id)
+        .filter(Node.project_id == project_id)
+        .filter(NodeLayout.x.between(x1, x2), NodeLayout.y.between(y1, y2))
+    )
+    if not include_hidden:
+        q = q.filter(Node.is_hidden == False)  # noqa: E712
+    return [r[0] for r in q.all()]
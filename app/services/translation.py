@@ -1,23 +1,52 @@
 from __future__ import annotations
 
+import hashlib
 import os
+import re
+import threading
 import time
+import unicodedata
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import Iterable, List
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Tuple
 import logging
 
 import requests
 import json
+from flask import has_app_context
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ..extensions import db
+from ..models import TranslationMemory
+
+
+MEMORY_LOOKUP_CHUNK = 500
+HTTP_TIMEOUT = 30
+RETRY_STATUSES = (429, 500, 502, 503, 504)
 
 
 @dataclass
 class TranslatedItem:
     text: str
     detected_source_lang: str | None
+    # False when a provider fell back to the source text; such results are not memorized
+    cacheable: bool = True
 
 
 class TranslationError(Exception):
-    pass
+    """Provider failure. `status` is the HTTP status when there was one (408 for client timeouts)."""
+
+    def __init__(self, message: str = "", status: int | None = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _request_failed(provider: str, e: requests.RequestException) -> TranslationError:
+    status = 408 if isinstance(e, requests.Timeout) else None
+    return TranslationError(f"{provider} request failed: {e}", status=status)
 
 
 def _preview(text: str, max_len: int = 160) -> str:
@@ -27,13 +56,53 @@ def _preview(text: str, max_len: int = 160) -> str:
     return t[:max_len] + "…"
 
 
+def pooled_session(pool_size: int = 4, retries: int | None = None) -> requests.Session:
+    """Keep-alive session whose adapter holds up to `pool_size` connections per host.
+
+    urllib3 only retries connection failures (the request never reached the
+    provider). Responses are returned as-is and read timeouts raise, so status
+    retries stay in one place: `_translate_batch`.
+    """
+    if retries is None:
+        retries = int(os.getenv("TRANSLATION_HTTP_RETRIES", "2"))
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=0.5,
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, pool_size), max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _provider_session(name: str, cls: type) -> requests.Session:
+    # One connection per concurrent dispatch slot, so pooled connections are never discarded
+    return pooled_session(get_limiter(name, cls).concurrency)
+
+
 class DeepLProvider:
-    def __init__(self, api_key: str | None = None, api_url: str | None = None) -> None:
+    # Dispatch defaults; override with TRANSLATION_DEEPL_CONCURRENCY / _RATE_LIMIT / _BURST
+    concurrency = 4
+    rate_limit = 10.0
+    # API limits: 50 texts and 128 KiB request body per call
+    max_batch_items = 50
+    max_batch_bytes = 120_000
+    env_keys = ("DEEPL_API_KEY", "DEEPL_API_URL")
+
+    def __init__(self, api_key: str | None = None, api_url: str | None = None, session: requests.Session | None = None) -> None:
         self.api_key = api_key or os.getenv("DEEPL_API_KEY")
         # free vs pro endpoints; allow override
         self.api_url = api_url or os.getenv("DEEPL_API_URL") or "https://api-free.deepl.com/v2/translate"
         if not self.api_key:
             raise TranslationError("DEEPL_API_KEY is not configured")
+        self.session = session or _provider_session("deepl", type(self))
 
     def translate(self, texts: List[str], target_lang: str) -> List[TranslatedItem]:
         # DeepL supports batching via repeated 'text' params
@@ -41,9 +110,12 @@ class DeepLProvider:
         data = [("auth_key", self.api_key), ("target_lang", target_lang.upper())]
         for t in texts:
             data.append(("text", t))
-        resp = requests.post(self.api_url, data=data, timeout=30)
+        try:
+            resp = self.session.post(self.api_url, data=data, timeout=HTTP_TIMEOUT)
+        except requests.RequestException as e:
+            raise _request_failed("DeepL", e)
         if resp.status_code >= 400:
-            raise TranslationError(f"DeepL error: {resp.status_code} {resp.text}")
+            raise TranslationError(f"DeepL error: {resp.status_code} {resp.text}", status=resp.status_code)
         js = resp.json()
         out: List[TranslatedItem] = []
         for it in js.get("translations", []):
@@ -56,16 +128,29 @@ class DeepLProvider:
 
 
 class MockProvider:
+    concurrency = 4
+    rate_limit = 0.0
+    max_batch_items = 100
+    max_batch_bytes = 100_000
+    env_keys = ()
+
     def translate(self, texts: List[str], target_lang: str) -> List[TranslatedItem]:
         # Simple mock: prefix with target language code; no detection
         return [TranslatedItem(text=f"[{target_lang.upper()}] {t}", detected_source_lang=None) for t in texts]
 
 
 class LibreProvider:
-    def __init__(self, api_url: str | None = None, api_key: str | None = None) -> None:
+    concurrency = 2
+    rate_limit = 2.0
+    max_batch_items = 50
+    max_batch_bytes = 10_000  # public instances cap characters per request
+    env_keys = ("LT_API_URL", "LT_API_KEY")
+
+    def __init__(self, api_url: str | None = None, api_key: str | None = None, session: requests.Session | None = None) -> None:
         # Public demo endpoint; consider self-hosting for production usage
         self.api_url = api_url or os.getenv("LT_API_URL") or "https://libretranslate.com/translate"
         self.api_key = api_key or os.getenv("LT_API_KEY")
+        self.session = session or _provider_session("libre", type(self))
 
     def translate(self, texts: List[str], target_lang: str) -> List[TranslatedItem]:
         payload: dict = {
@@ -77,9 +162,12 @@ class LibreProvider:
         if self.api_key:
             payload["api_key"] = self.api_key
         logging.info("provider=libre target=%s items=%d sample=%s", target_lang, len(texts), _preview(texts[0] if texts else ""))
-        resp = requests.post(self.api_url, json=payload, timeout=30)
+        try:
+            resp = self.session.post(self.api_url, json=payload, timeout=HTTP_TIMEOUT)
+        except requests.RequestException as e:
+            raise _request_failed("LibreTranslate", e)
         if resp.status_code >= 400:
-            raise TranslationError(f"LibreTranslate error: {resp.status_code} {resp.text}")
+            raise TranslationError(f"LibreTranslate error: {resp.status_code} {resp.text}", status=resp.status_code)
         js = resp.json()
         # API returns a list of { translatedText }
         # Some deployments return an object for single-string input; normalize
@@ -105,9 +193,16 @@ class LibreProvider:
 
 
 class MyMemoryProvider:
-    def __init__(self, api_url: str | None = None) -> None:
+    concurrency = 2
+    rate_limit = 2.0
+    max_batch_items = 1  # one GET per text; dispatch each text on its own
+    max_batch_bytes = 500  # free tier limit per query; longer texts are split into sentences
+    env_keys = ("MM_API_URL",)
+
+    def __init__(self, api_url: str | None = None, session: requests.Session | None = None) -> None:
         # Public endpoint without key (rate limited)
         self.api_url = api_url or os.getenv("MM_API_URL") or "https://api.mymemory.translated.net/get"
+        self.session = session or _provider_session("mymemory", type(self))
 
     def translate(self, texts: List[str], target_lang: str) -> List[TranslatedItem]:
         out: List[TranslatedItem] = []
@@ -120,21 +215,22 @@ class MyMemoryProvider:
                     "q": t,
                     "langpair": f"{src}|{target_lang.lower()}",
                 }
-                resp = requests.get(self.api_url, params=params, timeout=30)
+                resp = self.session.get(self.api_url, params=params, timeout=HTTP_TIMEOUT)
                 if resp.status_code >= 400:
-                    raise TranslationError(f"MyMemory error: {resp.status_code} {resp.text}")
+                    raise TranslationError(f"MyMemory error: {resp.status_code} {resp.text}", status=resp.status_code)
                 js = resp.json()
                 txt = ""
                 if isinstance(js, dict):
                     data = js.get("responseData", {})
                     txt = data.get("translatedText", "")
                 # Guard against instruction-like responses from MyMemory
-                if not txt or txt.strip().upper().startswith("PLEASE SELECT TWO DISTINCT LANGUAGES"):
+                fallback = not txt or txt.strip().upper().startswith("PLEASE SELECT TWO DISTINCT LANGUAGES")
+                if fallback:
                     txt = t
-                out.append(TranslatedItem(text=txt, detected_source_lang=None))
+                out.append(TranslatedItem(text=txt, detected_source_lang=None, cacheable=not fallback))
                 logging.info("provider=mymemory output=%s", _preview(txt))
             except requests.RequestException as e:
-                raise TranslationError(str(e))
+                raise _request_failed("MyMemory", e)
         return out
 
     @staticmethod
@@ -152,6 +248,12 @@ class MyMemoryProvider:
 
 
 class GeminiProvider:
+    concurrency = 2
+    rate_limit = 1.0
+    max_batch_items = 1
+    max_batch_bytes = 16_000
+    env_keys = ("GEMINI_API_KEY", "GEMINI_MODEL")
+
     def __init__(self, api_key: str | None = None, model_name: str | None = None) -> None:
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         if not self.api_key:
@@ -215,50 +317,509 @@ class GeminiProvider:
                     reason = getattr(feedback, "block_reason", None) or repr(feedback)
                     logging.warning("provider=gemini no_candidates_or_empty reason=%s", reason)
                     out_text = t  # fallback to original text to avoid hard failure
+                    results.append(TranslatedItem(text=out_text, detected_source_lang=None, cacheable=False))
+                    continue
 
                 results.append(TranslatedItem(text=out_text, detected_source_lang=None))
                 logging.info("provider=gemini output=%s", _preview(out_text))
             except Exception as e:  # pragma: no cover
                 # Do not fail the whole request; log and fallback to original text
                 logging.warning("provider=gemini exception=%s -- falling back to original text", e)
-                results.append(TranslatedItem(text=t, detected_source_lang=None))
+                results.append(TranslatedItem(text=t, detected_source_lang=None, cacheable=False))
         return results
 
-def translate_texts(texts: List[str], target_lang: str, provider: str | None = None) -> List[TranslatedItem]:
-    if not texts:
-        return []
+@dataclass
+class TranslationStats:
+    """Per-call (or summed per-job) accounting for translate_texts."""
+    requested: int = 0  # texts passed in
+    unique: int = 0  # distinct normalized texts among them
+    memory_hits: int = 0  # distinct texts served from translation memory
+    provider_items: int = 0  # texts actually sent to the provider
+    batches: int = 0  # successful provider requests
+    split_texts: int = 0  # texts split at sentence boundaries to fit a request
+    batch_splits: int = 0  # batches bisected after a 413/timeout
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Share of requested texts that were duplicates of another text in the same call."""
+        return 1.0 - self.unique / self.requested if self.requested else 0.0
+
+    def add(self, other: "TranslationStats") -> None:
+        self.requested += other.requested
+        self.unique += other.unique
+        self.memory_hits += other.memory_hits
+        self.provider_items += other.provider_items
+        self.batches += other.batches
+        self.split_texts += other.split_texts
+        self.batch_splits += other.batch_splits
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "requested": self.requested,
+            "unique": self.unique,
+            "memory_hits": self.memory_hits,
+            "provider_items": self.provider_items,
+            "batches": self.batches,
+            "split_texts": self.split_texts,
+            "batch_splits": self.batch_splits,
+            "dedup_ratio": round(self.dedup_ratio, 4),
+        }
+
+
+def normalize_source(text: str | None) -> str:
+    """Canonical form used for hashing: NFC, whitespace runs collapsed, trimmed. Case is kept."""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def source_hash(text: str | None) -> str:
+    return hashlib.sha256(normalize_source(text).encode("utf-8")).hexdigest()
+
+
+def resolve_provider_name(provider: str | None = None) -> str:
     prov = provider or os.getenv("TRANSLATION_PROVIDER")
     if not prov:
         prov = "deepl" if os.getenv("DEEPL_API_KEY") else "mock"
-    prov = prov.lower()
-    if prov == "deepl":
-        client = DeepLProvider()
-    elif prov == "libre":
-        client = LibreProvider()
-    elif prov == "mymemory":
-        client = MyMemoryProvider()
-    elif prov == "gemini":
-        client = GeminiProvider()
-    elif prov == "mock":
-        client = MockProvider()
+    return prov.lower()
+
+
+def _memory_lookup(hashes: Iterable[str], lang: str, provider: str) -> Dict[str, TranslatedItem]:
+    keys = list(dict.fromkeys(hashes))
+    found: Dict[str, TranslatedItem] = {}
+    tm = TranslationMemory
+    for i in range(0, len(keys), MEMORY_LOOKUP_CHUNK):
+        rows = (
+            db.session.query(tm.source_hash, tm.text, tm.detected_source_lang)
+            .filter(tm.lang == lang, tm.provider == provider, tm.source_hash.in_(keys[i : i + MEMORY_LOOKUP_CHUNK]))
+            .all()
+        )
+        for h, text, det in rows:
+            found[h] = TranslatedItem(text=text, detected_source_lang=det)
+    return found
+
+
+def _memory_store(entries: List[Tuple[str, TranslatedItem]], lang: str, provider: str) -> None:
+    rows = {h: it for h, it in entries if it.cacheable}
+    if not rows:
+        return
+    if db.engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
     else:
-        raise TranslationError(f"Unsupported provider: {prov}")
-
-    # batching with backoff
-    batch_size = int(os.getenv("TRANSLATION_BATCH_SIZE", "50"))
-    results: List[TranslatedItem] = []
-    for i in range(0, len(texts), batch_size):
-        chunk = texts[i : i + batch_size]
-        attempts = 0
+        from sqlalchemy.dialects.sqlite import insert
+    now = datetime.utcnow().isoformat() + "Z"
+    stmt = insert(TranslationMemory.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["source_hash", "lang", "provider"],
+        set_={"text": stmt.excluded.text, "detected_source_lang": stmt.excluded.detected_source_lang},
+    )
+    # Written in the caller's transaction; the caller commits together with the translations it stores
+    db.session.execute(stmt, [
+        {"source_hash": h, "lang": lang, "provider": provider, "text": it.text,
+         "detected_source_lang": it.detected_source_lang, "created_at": now}
+        for h, it in rows.items()
+    ])
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `burst` banked. rate <= 0 disables it."""
+
+    def __init__(self, rate: float, burst: int = 1, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until it is available. Returns the time waited."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
         while True:
-            attempts += 1
-            try:
-                results.extend(client.translate(chunk, target_lang))
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                delay = (1.0 - self._tokens) / self.rate
+            self._sleep(delay)
+            waited += delay
+
+
+class ProviderLimiter:
+    """Process-wide request gate for one provider: token-bucket rate plus an in-flight cap."""
+
+    def __init__(self, concurrency: int, rate: float, burst: int) -> None:
+        self.concurrency = max(1, concurrency)
+        self.bucket = TokenBucket(rate, burst)
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+
+    def call(self, fn: Callable[[], List[TranslatedItem]]) -> List[TranslatedItem]:
+        with self._slots:
+            self.bucket.acquire()
+            return fn()
+
+
+_limiters: Dict[Tuple[str, int, float, int], ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _env_number(name: str, cast, default):
+    raw = os.getenv(name)
+    if raw in (None, ""):
+        return default
+    try:
+        return cast(raw)
+    except ValueError:
+        logging.warning("ignoring invalid %s=%r", name, raw)
+        return default
+
+
+def _setting(provider: str, name: str, cast, default):
+    """TRANSLATION_<PROVIDER>_<NAME>, then TRANSLATION_<NAME>, then `default`."""
+    return _env_number(f"TRANSLATION_{provider.upper()}_{name}", cast, _env_number(f"TRANSLATION_{name}", cast, default))
+
+
+def get_limiter(provider: str, client: object | None = None) -> ProviderLimiter:
+    """Limiter shared by every call for `provider`, so concurrent jobs share one quota.
+
+    Settings resolve as TRANSLATION_<PROVIDER>_{CONCURRENCY,RATE_LIMIT,BURST}, then
+    TRANSLATION_{CONCURRENCY,RATE_LIMIT,BURST}, then the provider class defaults.
+    """
+    concurrency = _setting(provider, "CONCURRENCY", int, getattr(client, "concurrency", 4))
+    rate = _setting(provider, "RATE_LIMIT", float, getattr(client, "rate_limit", 0.0))
+    burst = _setting(provider, "BURST", int, max(1, concurrency))
+    key = (provider, concurrency, rate, burst)
+    with _limiters_lock:
+        lim = _limiters.get(key)
+        if lim is None:
+            lim = _limiters[key] = ProviderLimiter(concurrency, rate, burst)
+        return lim
+
+
+_SENTENCE_END = re.compile(r"[.!?…。！？]+[\"'»”)\]]*\s+|\n+")
+
+
+def _utf8_len(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _hard_split(text: str, max_bytes: int) -> List[str]:
+    # Whitespace first, then raw characters for unbroken runs (URLs, CJK without spaces)
+    parts: List[str] = []
+    buf = ""
+    for word in re.findall(r"\S+\s*|\s+", text):
+        if buf and _utf8_len(buf + word) > max_bytes:
+            parts.append(buf)
+            buf = ""
+        if _utf8_len(word) <= max_bytes:
+            buf += word
+            continue
+        for ch in word:
+            if buf and _utf8_len(buf + ch) > max_bytes:
+                parts.append(buf)
+                buf = ""
+            buf += ch
+    if buf:
+        parts.append(buf)
+    return parts
+
+
+def split_text(text: str, max_bytes: int) -> List[str]:
+    """Split `text` into pieces of at most `max_bytes` UTF-8 bytes, preferring sentence boundaries.
+
+    Consecutive sentences are packed together so pieces keep as much context as
+    possible; `"".join(split_text(t, n)) == t` always holds.
+    """
+    if _utf8_len(text) <= max_bytes:
+        return [text]
+    sentences: List[str] = []
+    start = 0
+    for m in _SENTENCE_END.finditer(text):
+        sentences.append(text[start : m.end()])
+        start = m.end()
+    if start < len(text):
+        sentences.append(text[start:])
+    parts: List[str] = []
+    buf = ""
+    for sent in sentences:
+        if buf and _utf8_len(buf + sent) > max_bytes:
+            parts.append(buf)
+            buf = ""
+        if _utf8_len(sent) > max_bytes:
+            pieces = _hard_split(sent, max_bytes)
+            parts.extend(pieces[:-1])
+            sent = pieces[-1]
+        buf += sent
+    if buf:
+        parts.append(buf)
+    return parts
+
+
+class AdaptiveBatcher:
+    """AIMD batch sizing for one provider, shared by every call in the process.
+
+    Budgets start at the provider caps (items and UTF-8 bytes per request). A 413,
+    a client timeout or a response slower than `target_latency` halves them;
+    a fast response to a batch that filled its budget grows them additively
+    back toward the caps.
+    """
+
+    def __init__(self, max_items: int, max_bytes: int, target_latency: float, min_bytes: int = 1024) -> None:
+        self.max_items = max(1, max_items)
+        self.max_bytes = max(1, max_bytes)
+        self.min_bytes = min(min_bytes, self.max_bytes)
+        self.target_latency = target_latency
+        self.items = self.max_items
+        self.bytes = self.max_bytes
+        self._lock = threading.Lock()
+
+    def limits(self) -> Tuple[int, int]:
+        with self._lock:
+            return self.items, self.bytes
+
+    def observe(self, items: int, size: int, latency: float, full: bool) -> None:
+        with self._lock:
+            if self.target_latency > 0 and latency > self.target_latency:
+                self._shrink(items, size)
+            elif full:
+                self.items = min(self.max_items, self.items + max(1, self.max_items // 10))
+                self.bytes = min(self.max_bytes, self.bytes + max(1, self.max_bytes // 10))
+
+    def too_large(self, items: int, size: int) -> None:
+        with self._lock:
+            self._shrink(items, size)
+
+    def _shrink(self, items: int, size: int) -> None:
+        # Halve relative to what was actually sent, not the (possibly larger) budget
+        self.items = max(1, min(self.items, items) // 2)
+        self.bytes = max(self.min_bytes, min(self.bytes, size) // 2)
+
+
+_batchers: Dict[Tuple[str, int, int, float], AdaptiveBatcher] = {}
+
+
+def get_batcher(provider: str, client: object | None = None) -> AdaptiveBatcher:
+    """Process-wide batcher for `provider`.
+
+    TRANSLATION_[<PROVIDER>_]BATCH_SIZE caps items per request (also bounded by the
+    provider's own limit), TRANSLATION_[<PROVIDER>_]MAX_BATCH_BYTES the request size and
+    TRANSLATION_[<PROVIDER>_]TARGET_LATENCY_MS the response time above which batches shrink.
+    """
+    cap = getattr(client, "max_batch_items", 50)
+    max_items = max(1, min(_setting(provider, "BATCH_SIZE", int, 50), cap))
+    max_bytes = _setting(provider, "MAX_BATCH_BYTES", int, getattr(client, "max_batch_bytes", 100_000))
+    target = _setting(provider, "TARGET_LATENCY_MS", float, 10_000.0) / 1000.0
+    key = (provider, max_items, max_bytes, target)
+    with _limiters_lock:
+        batcher = _batchers.get(key)
+        if batcher is None:
+            batcher = _batchers[key] = AdaptiveBatcher(max_items, max_bytes, target)
+        return batcher
+
+
+def _retryable(e: TranslationError) -> bool:
+    # Connection errors were already retried by the session; other client errors fail the same way again.
+    # 408/413 are not retried either: _translate_units shrinks the batch on the first one.
+    return e.status in RETRY_STATUSES
+
+
+def _translate_batch(client, limiter: ProviderLimiter, chunk: List[str], target_lang: str) -> List[TranslatedItem]:
+    # Backoff sleeps happen outside the limiter so they do not hold a concurrency slot
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            return limiter.call(lambda: client.translate(chunk, target_lang))
+        except TranslationError as e:
+            if attempts >= 3 or not _retryable(e):
+                raise
+            time.sleep(1.5 * attempts)
+
+
+def _translate_units(client, limiter: ProviderLimiter, batcher: AdaptiveBatcher, units: List[str],
+                     target_lang: str, full: bool) -> Tuple[List[TranslatedItem], int, int]:
+    """Send one packed batch, feeding latency back to the batcher and bisecting on 413/timeout.
+
+    Returns (items, successful requests, bisections).
+    """
+    size = sum(_utf8_len(u) for u in units)
+    started = time.monotonic()
+    try:
+        out = _translate_batch(client, limiter, units, target_lang)
+    except TranslationError as e:
+        if e.status not in (408, 413):
+            raise
+        batcher.too_large(len(units), size)
+        if len(units) == 1:
+            raise
+        mid = len(units) // 2
+        left, lreq, lsplit = _translate_units(client, limiter, batcher, units[:mid], target_lang, False)
+        right, rreq, rsplit = _translate_units(client, limiter, batcher, units[mid:], target_lang, False)
+        return left + right, lreq + rreq, lsplit + rsplit + 1
+    if len(out) != len(units):
+        # Results are matched to inputs by position; a short list would misalign or drop texts
+        raise TranslationError(f"Provider returned {len(out)} translations for {len(units)} texts", status=502)
+    batcher.observe(len(units), size, time.monotonic() - started, full)
+    return out, 1, 0
+
+
+PROVIDERS: Dict[str, type] = {
+    "deepl": DeepLProvider,
+    "libre": LibreProvider,
+    "mymemory": MyMemoryProvider,
+    "gemini": GeminiProvider,
+    "mock": MockProvider,
+}
+_providers: Dict[Tuple, object] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(name: str):
+    """Process-wide provider client (and its pooled session) for `name`.
+
+    Keyed by the provider's configuration env vars and pool size, so changing
+    credentials or concurrency yields a fresh client instead of a stale one.
+    """
+    cls = PROVIDERS.get(name)
+    if cls is None:
+        raise TranslationError(f"Unsupported provider: {name}")
+    key = (name, get_limiter(name, cls).concurrency) + tuple(os.getenv(k) for k in cls.env_keys)
+    with _providers_lock:
+        client = _providers.get(key)
+        if client is None:
+            client = _providers[key] = cls()
+        return client
+
+
+def translate_texts(
+    texts: List[str],
+    target_lang: str,
+    provider: str | None = None,
+    refresh: bool = False,
+    stats: TranslationStats | None = None,
+) -> List[TranslatedItem]:
+    """Translate `texts`, returning one item per input in the same order.
+
+    Inputs that are identical after `normalize_source` are translated once and
+    fanned back out. Inside an app context results are memorized in
+    `translation_memory` keyed by (source_hash, lang, provider); hits skip the
+    provider entirely. `refresh` bypasses the lookup but still overwrites the
+    stored entries. Memory rows join the session's transaction and are not
+    committed here. Pass `stats` to accumulate counters for the call.
+    """
+    if not texts:
+        return []
+    prov = resolve_provider_name(provider)
+    client = get_provider(prov)
+
+    lang = target_lang.lower()
+    keys = [normalize_source(t) for t in texts]
+    first: Dict[str, int] = {}
+    for i, k in enumerate(keys):
+        first.setdefault(k, i)
+    call_stats = TranslationStats(requested=len(texts), unique=len(first))
+
+    use_memory = has_app_context()
+    hashes = {k: hashlib.sha256(k.encode("utf-8")).hexdigest() for k in first} if use_memory else {}
+    done: Dict[str, TranslatedItem] = {}
+    if use_memory and not refresh:
+        memo = _memory_lookup(hashes.values(), lang, prov)
+        for k, h in hashes.items():
+            if h in memo:
+                done[k] = memo[h]
+        call_stats.memory_hits = len(done)
+    pending = [k for k in first if k not in done]
+    call_stats.provider_items = len(pending)
+
+    # Pending texts become units (sentence-split when larger than one request may
+    # carry) that are packed into batches lazily, so budget changes from the
+    # adaptive batcher apply to the rest of this call. Batches run concurrently
+    # under the provider's limiter; memory writes stay on this thread (they need
+    # the app context) and happen as soon as every unit of a text is back.
+    limiter = get_limiter(prov, client)
+    batcher = get_batcher(prov, client)
+    queue: deque = deque()
+    segments: Dict[str, List[TranslatedItem | None]] = {}
+    pieces_of: Dict[str, List[Tuple[str, str]]] = {}
+    for k in pending:
+        # Send the first occurrence verbatim; duplicates only differ in whitespace/normalization
+        pieces = split_text(texts[first[k]], batcher.max_bytes)
+        segments[k] = [None] * len(pieces)
+        if len(pieces) == 1:
+            queue.append((k, 0, pieces[0]))
+            continue
+        call_stats.split_texts += 1
+        # Providers trim whitespace, so send each piece's core and restore its edges on reassembly
+        pieces_of[k] = [(p[: len(p) - len(p.lstrip())], p[len(p.rstrip()):]) for p in pieces]
+        for j, p in enumerate(pieces):
+            queue.append((k, j, p.strip()))
+
+    def next_batch() -> Tuple[List[Tuple[str, int, str]], bool]:
+        max_items, max_bytes = batcher.limits()
+        batch: List[Tuple[str, int, str]] = []
+        size = 0
+        while queue and len(batch) < max_items:
+            b = _utf8_len(queue[0][2])
+            if batch and size + b > max_bytes:
                 break
-            except TranslationError as e:
-                if attempts >= 3:
-                    raise
-                time.sleep(1.5 * attempts)
-    return results
+            batch.append(queue.popleft())
+            size += b
+        return batch, bool(queue)
 
+    def run(batch: List[Tuple[str, int, str]], full: bool) -> Tuple[List[TranslatedItem], int, int]:
+        return _translate_units(client, limiter, batcher, [u[2] for u in batch], target_lang, full)
+
+    def finish(batch: List[Tuple[str, int, str]], result: Tuple[List[TranslatedItem], int, int]) -> None:
+        out, requests_made, bisections = result
+        call_stats.batches += requests_made
+        call_stats.batch_splits += bisections
+        completed: List[Tuple[str, TranslatedItem]] = []
+        for (k, j, _), item in zip(batch, out):
+            segs = segments[k]
+            segs[j] = item
+            if all(seg is not None for seg in segs):
+                if len(segs) == 1:
+                    merged = segs[0]
+                else:
+                    merged = TranslatedItem(
+                        text="".join(lead + seg.text + trail for (lead, trail), seg in zip(pieces_of[k], segs)).strip(),
+                        detected_source_lang=next((seg.detected_source_lang for seg in segs if seg.detected_source_lang), None),
+                        cacheable=all(seg.cacheable for seg in segs),
+                    )
+                done[k] = merged
+                completed.append((k, merged))
+        if use_memory and completed:
+            _memory_store([(hashes[k], item) for k, item in completed], lang, prov)
+
+    if limiter.concurrency <= 1:
+        while queue:
+            batch, full = next_batch()
+            finish(batch, run(batch, full))
+    else:
+        with ThreadPoolExecutor(max_workers=limiter.concurrency, thread_name_prefix=f"translate-{prov}") as ex:
+            running: Dict = {}
+            while queue or running:
+                while queue and len(running) < limiter.concurrency:
+                    batch, full = next_batch()
+                    running[ex.submit(run, batch, full)] = batch
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    batch = running.pop(fut)
+                    if fut.exception() is not None:
+                        for other in running:
+                            other.cancel()
+                        raise fut.exception()
+                    finish(batch, fut.result())
 
+    logging.info(
+        "translate provider=%s target=%s requested=%d unique=%d memory_hits=%d provider_items=%d",
+        prov, lang, call_stats.requested, call_stats.unique, call_stats.memory_hits, call_stats.provider_items,
+    )
+    if stats is not None:
+        stats.add(call_stats)
+    return [done[k] for k in keys]
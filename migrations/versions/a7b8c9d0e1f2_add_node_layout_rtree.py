@@ -0,0 +1,78 @@
+"""add R*Tree mirror of node_layout for viewport queries
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7b8c9d0e1f2'
+down_revision = 'f6a7b8c9d0e1'
+branch_labels = None
+depends_on = None
+
+
+# Keyed by node_layout.spatial_id, not rowid: node_layout has no INTEGER PRIMARY
+# KEY, so VACUUM may renumber its rowids. Delete-then-insert instead of INSERT OR
+# REPLACE, because an outer UPSERT's conflict policy overrides the trigger's.
+STATEMENTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS node_layout_rtree USING rtree(id, min_x, max_x, min_y, max_y)",
+    """CREATE TRIGGER IF NOT EXISTS node_layout_rtree_ai AFTER INSERT ON node_layout BEGIN
+        UPDATE node_layout SET spatial_id = (SELECT COALESCE(MAX(spatial_id), 0) + 1 FROM node_layout)
+            WHERE rowid = NEW.rowid AND spatial_id IS NULL;
+        DELETE FROM node_layout_rtree WHERE id = (SELECT spatial_id FROM node_layout WHERE rowid = NEW.rowid);
+        INSERT INTO node_layout_rtree(id, min_x, max_x, min_y, max_y)
+            SELECT spatial_id, x, x, y, y FROM node_layout WHERE rowid = NEW.rowid;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS node_layout_rtree_au AFTER UPDATE OF x, y ON node_layout
+        WHEN NEW.spatial_id IS NOT NULL BEGIN
+        DELETE FROM node_layout_rtree WHERE id = NEW.spatial_id;
+        INSERT INTO node_layout_rtree(id, min_x, max_x, min_y, max_y) VALUES (NEW.spatial_id, NEW.x, NEW.x, NEW.y, NEW.y);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS node_layout_rtree_ad AFTER DELETE ON node_layout BEGIN
+        DELETE FROM node_layout_rtree WHERE id = OLD.spatial_id;
+    END""",
+]
+
+
+def upgrade() -> None:
+    op.add_column('node_layout', sa.Column('spatial_id', sa.Integer(), nullable=True))
+    op.create_index('ux_node_layout_spatial_id', 'node_layout', ['spatial_id'], unique=True)
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    # One-time seed from the current rowids; from here on the value is stored
+    op.execute(sa.text("UPDATE node_layout SET spatial_id = rowid"))
+    try:
+        for stmt in STATEMENTS:
+            op.execute(sa.text(stmt))
+    except Exception:
+        # SQLite without the rtree module: the app falls back to range queries
+        return
+    op.execute(sa.text(
+        "INSERT INTO node_layout_rtree(id, min_x, max_x, min_y, max_y) "
+        "SELECT spatial_id, x, x, y, y FROM node_layout"
+    ))
+
+
+def downgrade() -> None:
+    for stmt in (
+        "DROP TRIGGER IF EXISTS node_layout_rtree_ai",
+        "DROP TRIGGER IF EXISTS node_layout_rtree_au",
+        "DROP TRIGGER IF EXISTS node_layout_rtree_ad",
+        "DROP TABLE IF EXISTS node_layout_rtree",
+    ):
+        try:
+            op.execute(sa.text(stmt))
+        except Exception:
+            pass
+    try:
+        op.drop_index('ux_node_layout_spatial_id', table_name='node_layout')
+        with op.batch_alter_table('node_layout') as batch_op:
+            batch_op.drop_column('spatial_id')
+    except Exception:
+        pass
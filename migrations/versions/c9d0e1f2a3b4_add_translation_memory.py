@@ -0,0 +1,35 @@
+"""add translation_memory
+
+Revision ID: c9d0e1f2a3b4
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9d0e1f2a3b4'
+down_revision = 'a7b8c9d0e1f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'translation_memory',
+        sa.Column('source_hash', sa.String(), primary_key=True),
+        sa.Column('lang', sa.String(), primary_key=True),
+        sa.Column('provider', sa.String(), primary_key=True),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('detected_source_lang', sa.String(), nullable=True),
+        sa.Column('created_at', sa.String(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    try:
+        op.drop_table('translation_memory')
+    except Exception:
+        pass
@@ -0,0 +1,50 @@
+"""add project revision and graph_change log
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9, a9e1f0a1b2c3
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+# Also merges the two previous heads (node columns branch and attachments/google branch).
+revision = 'e5f6a7b8c9d0'
+down_revision = ('d4e5f6a7b8c9', 'a9e1f0a1b2c3')
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('project') as batch_op:
+        batch_op.add_column(sa.Column('revision', sa.Integer(), nullable=False, server_default=sa.text('0')))
+
+    op.create_table(
+        'graph_change',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('project_id', sa.String(), sa.ForeignKey('project.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('revision', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.String(), nullable=False),
+        sa.Column('op', sa.String(), nullable=False),
+        sa.Column('lang', sa.String(), nullable=True),
+    )
+    op.create_index('ix_graph_change_project_revision', 'graph_change', ['project_id', 'revision'])
+
+
+def downgrade() -> None:
+    try:
+        op.drop_index('ix_graph_change_project_revision', table_name='graph_change')
+    except Exception:
+        pass
+    try:
+        op.drop_table('graph_change')
+    except Exception:
+        pass
+    try:
+        with op.batch_alter_table('project') as batch_op:
+            batch_op.drop_column('revision')
+    except Exception:
+        pass
@@ -0,0 +1,46 @@
+"""add indexes for hot read paths
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6a7b8c9d0e1'
+down_revision = 'e5f6a7b8c9d0'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns) — kept in sync with __table_args__ in app/models
+INDEXES = [
+    ('ix_node_project_id', 'node', ['project_id']),
+    ('ix_node_parent_id', 'node', ['parent_id']),
+    ('ix_edge_project_id', 'edge', ['project_id']),
+    ('ix_edge_source_node_id', 'edge', ['source_node_id']),
+    ('ix_edge_target_node_id', 'edge', ['target_node_id']),
+    ('ix_comment_node_id_created_at', 'comment', ['node_id', 'created_at']),
+    ('ix_time_entry_node_id', 'time_entry', ['node_id']),
+    ('ix_cost_entry_node_id', 'cost_entry', ['node_id']),
+    ('ix_status_change_node_id_created_at', 'status_change', ['node_id', 'created_at']),
+    ('ix_node_translation_lang', 'node_translation', ['lang']),
+]
+
+
+def upgrade() -> None:
+    # Databases created via db.create_all() already have these indexes
+    for name, table, cols in INDEXES:
+        op.create_index(name, table, cols, if_not_exists=True)
+    op.execute(sa.text('ANALYZE'))
+
+
+def downgrade() -> None:
+    for name, table, _cols in reversed(INDEXES):
+        try:
+            op.drop_index(name, table_name=table)
+        except Exception:
+            pass
@@ -0,0 +1,95 @@
+"""Benchmark: marshmallow NodeSchema/EdgeSchema dumps vs precompiled row serializers.
+
+Seeds an in-memory database with N nodes (default 10k) and ~N edges, then times
+query + serialization for both paths. Prints a JSON summary.
+
+Usage: python scripts/benchmarks/bench_serializers.py [--nodes 10000] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app import create_app  # noqa: E402
+from app.config import TestingConfig  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Project, Node, Edge, generate_uuid  # noqa: E402
+from app.schemas import NodeSchema, EdgeSchema  # noqa: E402
+from app.schemas.fast import serializer_for  # noqa: E402
+
+
+def seed(n: int) -> str:
+    p = Project(name="bench")
+    db.session.add(p)
+    db.session.commit()
+    ids = [generate_uuid() for _ in range(n)]
+    statuses = ["planned", "in-progress", "done", "blocked"]
+    db.session.execute(Node.__table__.insert(), [
+        {"id": nid, "project_id": p.id, "title": f"Task {i}", "status": statuses[i % 4], "importance_score": 0.0,
+         "planned_hours": float(i % 13), "actual_hours": 0.0, "planned_cost": 0.0, "actual_cost": 0.0,
+         "link_open_in_new_tab": True, "is_group": False, "is_hidden": False, "priority": "normal",
+         "created_at": "2025-01-01T00:00:00Z", "updated_at": "2025-01-01T00:00:00Z"}
+        for i, nid in enumerate(ids)
+    ])
+    db.session.execute(Edge.__table__.insert(), [
+        {"id": generate_uuid(), "project_id": p.id, "source_node_id": ids[i], "target_node_id": ids[(i * 7 + 1) % n],
+         "type": "dependency", "weight": 1.0, "created_at": "2025-01-01T00:00:00Z", "updated_at": "2025-01-01T00:00:00Z"}
+        for i in range(n) if ids[i] != ids[(i * 7 + 1) % n]
+    ])
+    db.session.commit()
+    return p.id
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        db.session.expunge_all()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--nodes", type=int, default=10000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    TestingConfig.SCHEDULER_ENABLED = False
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+        pid = seed(args.nodes)
+        nser = serializer_for(NodeSchema, Node)
+        eser = serializer_for(EdgeSchema, Edge)
+
+        def mm_nodes():
+            return NodeSchema(many=True).dump(db.session.query(Node).filter_by(project_id=pid).all())
+
+        def fast_nodes():
+            return nser.dump_rows(db.session.query(*nser.columns()).filter(Node.project_id == pid).all())
+
+        def mm_edges():
+            return EdgeSchema(many=True).dump(db.session.query(Edge).filter_by(project_id=pid).all())
+
+        def fast_edges():
+            return eser.dump_rows(db.session.query(*eser.columns()).filter(Edge.project_id == pid).all())
+
+        assert sorted(fast_nodes(), key=lambda d: d["id"]) == sorted(mm_nodes(), key=lambda d: d["id"])
+        out = {"nodes": args.nodes}
+        for name, mm, fast in (("nodes", mm_nodes, fast_nodes), ("edges", mm_edges, fast_edges)):
+            t_mm = timed(mm, args.repeat)
+            t_fast = timed(fast, args.repeat)
+            out[name] = {"marshmallow_s": round(t_mm, 4), "fast_s": round(t_fast, 4), "speedup": round(t_mm / t_fast, 2) if t_fast else None}
+        print(json.dumps(out, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
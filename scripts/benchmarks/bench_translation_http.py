@@ -0,0 +1,119 @@
+"""Benchmark: per-batch latency of DeepLProvider with bare requests.post vs a pooled keep-alive session.
+
+Starts a local DeepL-shaped stub (ThreadingHTTPServer, HTTP/1.1 keep-alive) and
+sends N batches through each path. `--connect-delay-ms` makes the stub stall
+once per new connection to stand in for the TCP+TLS handshake of a real remote
+API (0 measures only local connection setup). Prints a JSON summary.
+
+Usage: python scripts/benchmarks/bench_translation_http.py [--batches 200] [--batch-size 50] [--connect-delay-ms 20]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.services.translation import DeepLProvider, pooled_session  # noqa: E402
+
+
+def start_stub(connect_delay: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def setup(self) -> None:
+            super().setup()
+            self.server.connections += 1  # type: ignore[attr-defined]
+            if connect_delay:
+                time.sleep(connect_delay)
+
+        def do_POST(self) -> None:
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            texts = parse_qs(body.decode()).get("text", [])
+            payload = json.dumps({"translations": [{"text": t, "detected_source_language": "EN"} for t in texts]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.connections = 0  # type: ignore[attr-defined]
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    return server
+
+
+class _Unpooled:
+    """What the providers did before: module-level requests.post, a new connection per call."""
+    post = staticmethod(requests.post)
+    get = staticmethod(requests.get)
+
+
+def run(make_client, batches: int, texts: list[str]) -> list[float]:
+    timings = []
+    for _ in range(batches):
+        t0 = time.perf_counter()
+        make_client().translate(texts, "de")
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+
+def summary(timings: list[float], connections: int) -> dict:
+    ms = sorted(t * 1000 for t in timings)
+    return {
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(ms[len(ms) // 2], 3),
+        "p95_ms": round(ms[int(len(ms) * 0.95) - 1], 3),
+        "connections": connections,
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--batches", type=int, default=200)
+    ap.add_argument("--batch-size", type=int, default=50)
+    ap.add_argument("--connect-delay-ms", type=float, default=20.0)
+    args = ap.parse_args()
+
+    server = start_stub(args.connect_delay_ms / 1000.0)
+    url = f"http://127.0.0.1:{server.server_port}/v2/translate"
+    texts = [f"Task title number {i}" for i in range(args.batch_size)]
+    try:
+        # Before: a fresh provider per translate_texts call, bare requests.post per batch
+        before = run(lambda: DeepLProvider(api_key="bench", api_url=url, session=_Unpooled()), args.batches, texts)
+        before_conns = server.connections
+        # After: one process-wide provider with a pooled keep-alive session
+        shared = DeepLProvider(api_key="bench", api_url=url, session=pooled_session(4))
+        after = run(lambda: shared, args.batches, texts)
+        after_conns = server.connections - before_conns
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    b, a = summary(before, before_conns), summary(after, after_conns)
+    print(json.dumps({
+        "batches": args.batches,
+        "batch_size": args.batch_size,
+        "connect_delay_ms": args.connect_delay_ms,
+        "unpooled": b,
+        "pooled": a,
+        "speedup_mean": round(b["mean_ms"] / a["mean_ms"], 2) if a["mean_ms"] else None,
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
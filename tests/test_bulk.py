@@ -0,0 +1,128 @@
+from app import create_app
+from app.extensions import db
+from app.models import Project, Node, Edge, NodeLayout, StatusChange
+from app.services import graph_cache
+
+
+def setup_app():
+    app = create_app("testing")
+    app.config["LOGIN_DISABLED"] = True
+    with app.app_context():
+        db.create_all()
+    graph_cache.drop()
+    return app
+
+
+def seed():
+    p = Project(name="P")
+    db.session.add(p)
+    db.session.flush()
+    root = Node(project_id=p.id, title="Root", is_group=True)
+    db.session.add(root)
+    db.session.commit()
+    return p.id, root.id
+
+
+def test_bulk_creates_graph_with_temp_ids_in_one_revision():
+    app = setup_app()
+    with app.app_context():
+        pid, root = seed()
+        before = db.session.get(Project, pid).revision
+    payload = {
+        "nodes": [
+            {"temp_id": "a", "title": "A", "planned_hours": 3, "parent_id": root},
+            {"temp_id": "b", "title": "B", "status": "done", "parent_id": "a"},
+            {"temp_id": "c", "title": "C", "link_url": "example.com"},
+        ],
+        "edges": [{"source": "a", "target": "b", "weight": 2}, {"source": root, "target": "c"}],
+        "positions": [{"node_id": "a", "x": 10, "y": 20}, {"node_id": root, "x": 0, "y": 0}],
+        "parents": [{"node_id": "c", "parent_id": "a"}],
+    }
+    with app.test_client() as client:
+        res = client.post(f"/api/v1/projects/{pid}/bulk", json=payload)
+        assert res.status_code == 201
+        data = res.get_json()["data"]
+    assert data["revision"] == before + 1
+    assert data["counts"] == {"nodes": 3, "edges": 2, "positions": 2, "parents": 3}
+    ids = data["id_map"]
+    with app.app_context():
+        a, b, c = (db.session.get(Node, ids[k]) for k in "abc")
+        assert a.parent_id == root and b.parent_id == a.id and c.parent_id == a.id
+        assert c.link_url == "https://example.com"
+        assert db.session.query(StatusChange).filter(StatusChange.node_id.in_(ids.values())).count() == 3
+        edges = {(e.source_node_id, e.target_node_id, e.weight) for e in db.session.query(Edge).all()}
+        assert edges == {(a.id, b.id, 2.0), (root, c.id, 1.0)}
+        assert (db.session.get(NodeLayout, a.id).x, db.session.get(NodeLayout, a.id).y) == (10, 20)
+        # Derived data ran once after the insert: scores and group rollup
+        assert a.importance_score > 0
+        assert db.session.get(Project, pid).revision > before
+        # The graph cache sees the bulk rows
+        g = graph_cache.get_graph(pid)
+        assert g.node_count == 4 and g.edge_count == 2
+
+
+def test_bulk_rejects_unknown_refs_atomically():
+    app = setup_app()
+    with app.app_context():
+        pid, _root = seed()
+        other = Project(name="Q")
+        db.session.add(other)
+        db.session.flush()
+        foreign = Node(project_id=other.id, title="X")
+        db.session.add(foreign)
+        db.session.commit()
+        foreign_id = foreign.id
+    with app.test_client() as client:
+        url = f"/api/v1/projects/{pid}/bulk"
+        res = client.post(url, json={"nodes": [{"temp_id": "a", "title": "A"}], "edges": [{"source": "a", "target": foreign_id}]})
+        assert res.status_code == 400
+        assert client.post(url, json={"nodes": [{"temp_id": "a"}]}).status_code == 400
+        assert client.post(url, json={"nodes": [{"temp_id": "a", "title": "A"}, {"temp_id": "a", "title": "B"}]}).status_code == 400
+        assert client.post(url, json=[1]).status_code == 400
+        assert client.post("/api/v1/projects/missing/bulk", json={}).status_code == 404
+    with app.app_context():
+        assert db.session.query(Node).filter_by(project_id=pid).count() == 1
+
+
+def test_bulk_rejects_cycles_when_configured():
+    app = setup_app()
+    app.config["REJECT_CYCLIC_EDGES"] = True
+    with app.app_context():
+        pid, _root = seed()
+    with app.test_client() as client:
+        res = client.post(f"/api/v1/projects/{pid}/bulk", json={
+            "nodes": [{"temp_id": "a", "title": "A"}, {"temp_id": "b", "title": "B"}],
+            "edges": [{"source": "a", "target": "b"}, {"source": "b", "target": "a"}],
+        })
+        assert res.status_code == 409
+    with app.app_context():
+        assert db.session.query(Edge).count() == 0
+
+
+def test_bulk_rejects_parent_cycles_and_rescores_moved_nodes():
+    from app.services import bulk
+
+    app = setup_app()
+    with app.app_context():
+        pid, root = seed()
+        child = Node(project_id=pid, title="Child", parent_id=root)
+        other = Node(project_id=pid, title="Other", is_group=True)
+        db.session.add_all([child, other])
+        db.session.commit()
+        child_id, other_id = child.id, other.id
+    with app.test_client() as client:
+        url = f"/api/v1/projects/{pid}/bulk"
+        res = client.post(url, json={
+            "nodes": [{"temp_id": "a", "title": "A"}, {"temp_id": "b", "title": "B"}],
+            "parents": [{"node_id": "a", "parent_id": "b"}, {"node_id": "b", "parent_id": "a"}],
+        })
+        assert res.status_code == 409
+        # Closing a loop through existing nodes
+        res = client.post(url, json={"parents": [{"node_id": root, "parent_id": child_id}]})
+        assert res.status_code == 409
+    with app.app_context():
+        assert db.session.query(Node).filter_by(project_id=pid).count() == 3
+        result = bulk.bulk_create(pid, {"parents": [{"node_id": child_id, "parent_id": other_id}]})
+        assert {child_id, root, other_id} <= set(result.score_ids)
+        assert {root, other_id} <= set(result.group_ids)
+        db.session.rollback()
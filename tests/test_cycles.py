@@ -0,0 +1,67 @@
+from app import create_app
+from app.extensions import db
+from app.models import Project, Node, Edge
+from app.services import graph_cache
+from app.services.graph_analysis import would_create_cycle
+
+
+def setup_app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+    graph_cache.drop()
+    return app
+
+
+def seed(edges):
+    p = Project(name="P")
+    db.session.add(p)
+    db.session.flush()
+    nodes = {k: Node(project_id=p.id, title=k) for k in "ABCDEF"}
+    db.session.add_all(nodes.values())
+    db.session.flush()
+    for s, t in edges:
+        db.session.add(Edge(project_id=p.id, source_node_id=nodes[s].id, target_node_id=nodes[t].id))
+    db.session.commit()
+    return p.id, {k: v.id for k, v in nodes.items()}
+
+
+def test_cycles_endpoint_reports_components():
+    app = setup_app()
+    with app.app_context():
+        pid, ids = seed([("A", "B"), ("B", "C"), ("C", "A"), ("C", "D"), ("E", "F"), ("F", "E")])
+    with app.test_client() as client:
+        data = client.get(f"/api/v1/projects/{pid}/cycles").get_json()["data"]
+        assert data["acyclic"] is False
+        comps = [set(c["node_ids"]) for c in data["components"]]
+        assert comps == [{ids["A"], ids["B"], ids["C"]}, {ids["E"], ids["F"]}]
+        assert len(data["components"][0]["edge_ids"]) == 3
+        assert client.get("/api/v1/projects/missing/cycles").status_code == 404
+
+
+def test_would_create_cycle_uses_topological_bound():
+    app = setup_app()
+    with app.app_context():
+        pid, ids = seed([("A", "B"), ("B", "C"), ("C", "D"), ("A", "E")])
+        assert would_create_cycle(pid, ids["D"], ids["A"])
+        assert would_create_cycle(pid, ids["C"], ids["B"])
+        assert not would_create_cycle(pid, ids["A"], ids["D"])
+        assert not would_create_cycle(pid, ids["E"], ids["D"])
+        assert not would_create_cycle(pid, ids["D"], ids["E"])
+        assert would_create_cycle(pid, ids["F"], ids["F"])
+
+
+def test_create_edge_rejects_cycles_when_enabled():
+    app = setup_app()
+    app.config["LOGIN_DISABLED"] = True
+    with app.app_context():
+        pid, ids = seed([("A", "B"), ("B", "C")])
+    with app.test_client() as client:
+        body = {"source_node_id": ids["C"], "target_node_id": ids["A"]}
+        app.config["REJECT_CYCLIC_EDGES"] = True
+        res = client.post(f"/api/v1/projects/{pid}/edges", json=body)
+        assert res.status_code == 409
+        ok = client.post(f"/api/v1/projects/{pid}/edges", json={"source_node_id": ids["A"], "target_node_id": ids["C"]})
+        assert ok.status_code == 201
+        app.config["REJECT_CYCLIC_EDGES"] = False
+        assert client.post(f"/api/v1/projects/{pid}/edges", json=body).status_code == 201
@@ -0,0 +1,102 @@
+import gzip
+import io
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.models import (
+    Project, Node, Edge, NodeLayout, NodeTranslation, Comment, CommentTranslation, TimeEntry, CostEntry,
+    StatusChange, Tag, User, Attachment,
+)
+from app.services.project_archive import ArchiveError, FORMAT, iter_records
+
+
+def setup_app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed():
+    u = User(email="u@example.com", name="U")
+    p = Project(name="P")
+    other = Project(name="Other")
+    db.session.add_all([u, p, other])
+    db.session.flush()
+    a = Node(project_id=p.id, title="A")
+    b = Node(project_id=p.id, title="B")
+    stray = Node(project_id=other.id, title="Not exported")
+    db.session.add_all([a, b, stray])
+    db.session.flush()
+    b.parent_id = a.id
+    tag = Tag(name="infra")
+    tag.nodes.append(a)
+    c = Comment(node_id=a.id, user_id=u.id, body="hello")
+    att = Attachment(uploader_user_id=u.id, mime_type="image/png", kind="image", storage_path="x/1.png")
+    c.attachments.append(att)
+    db.session.add_all([
+        tag, c,
+        Edge(project_id=p.id, source_node_id=a.id, target_node_id=b.id),
+        NodeLayout(node_id=a.id, x=1, y=2),
+        NodeTranslation(node_id=a.id, lang="uk", text="А", provider="mock"),
+        StatusChange(node_id=a.id, old_status="planned", new_status="done"),
+        TimeEntry(node_id=a.id, user_id=u.id, hours=1.5),
+        CostEntry(node_id=b.id, amount=10, incurred_at="2025-01-01"),
+        StatusChange(node_id=stray.id, old_status="planned", new_status="done"),
+    ])
+    db.session.flush()
+    db.session.add(CommentTranslation(comment_id=c.id, lang="uk", text="привіт", provider="mock"))
+    db.session.commit()
+    return p.id
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "ndjson.gz"])
+def test_export_streams_every_project_entity(fmt):
+    app = setup_app()
+    with app.app_context():
+        pid = seed()
+    with app.test_client() as client:
+        res = client.get(f"/api/v1/projects/{pid}/export?format={fmt}")
+        assert res.status_code == 200
+        assert res.is_streamed
+        body = res.get_data()
+    if fmt == "ndjson.gz":
+        assert res.mimetype == "application/gzip"
+        assert gzip.decompress(body).startswith(b'{"type":"header"')
+    records = list(iter_records(io.BytesIO(body)))
+    kinds = [k for k, _ in records]
+    assert kinds[0] == "header" and kinds[-1] == "footer"
+    assert records[0][1]["format"] == FORMAT and records[0][1]["project_id"] == pid
+    counts = records[-1][1]["counts"]
+    assert counts == {
+        "project": 1, "node": 2, "edge": 1, "node_layout": 1, "node_translation": 1, "node_tag": 1,
+        "status_change": 1, "time_entry": 1, "cost_entry": 1, "comment": 1, "comment_translation": 1,
+        "attachment": 1, "comment_attachment": 1,
+    }
+    for kind, n in counts.items():
+        assert kinds.count(kind) == n
+    nodes = {d["title"]: d for k, d in records if k == "node"}
+    assert nodes["B"]["parent_id"] == nodes["A"]["id"]
+    assert [d["tag"] for k, d in records if k == "node_tag"] == ["infra"]
+
+
+def test_export_errors():
+    app = setup_app()
+    with app.app_context():
+        pid = seed()
+    with app.test_client() as client:
+        assert client.get(f"/api/v1/projects/{pid}/export?format=xml").status_code == 400
+        assert client.get("/api/v1/projects/missing/export").status_code == 404
+
+
+def test_iter_records_rejects_foreign_and_truncated_input():
+    with pytest.raises(ArchiveError):
+        list(iter_records(io.BytesIO(b'{"type":"node","data":{}}\n')))
+    with pytest.raises(ArchiveError):
+        list(iter_records(io.BytesIO(b"")))
+    archive = gzip.compress(b'{"type":"header","data":{"format":"%s","version":1}}\n' % FORMAT.encode() * 2000)
+    assert len(list(iter_records(io.BytesIO(archive)))) == 2000
+    with pytest.raises(ArchiveError):
+        list(iter_records(io.BytesIO(archive[: len(archive) // 2])))
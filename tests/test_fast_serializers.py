@@ -0,0 +1,82 @@
+from app import create_app
+from app.extensions import db
+from app.models import Project, Node, Edge, Comment, Attachment, User
+from app.schemas import NodeSchema, EdgeSchema, CommentWithAttachmentsSchema, AttachmentSchema
+from app.schemas.fast import serializer_for, dump_comments_with_attachments
+
+
+def setup_app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed():
+    u = User(email="u@example.com", name="U")
+    p = Project(name="P")
+    db.session.add_all([u, p])
+    db.session.flush()
+    a = Node(project_id=p.id, title="A", description=None, planned_hours=3, link_url="https://x.y", priority="high")
+    b = Node(project_id=p.id, title="B", description="d", status="done", is_group=True, is_hidden=True, actual_cost=1.25)
+    db.session.add_all([a, b])
+    db.session.flush()
+    b.parent_id = a.id
+    db.session.add(Edge(project_id=p.id, source_node_id=a.id, target_node_id=b.id, weight=2))
+    att1 = Attachment(uploader_user_id=u.id, mime_type="image/png", kind="image", original_name="a.png", storage_path="a", size_bytes=10, width=3, height=4)
+    att2 = Attachment(uploader_user_id=u.id, mime_type="text/plain", kind="file", original_name=None, storage_path="b")
+    c1 = Comment(node_id=a.id, user_id=u.id, body="one", body_html="<p>one</p>")
+    c2 = Comment(node_id=a.id, user_id=u.id, body="two")
+    c1.attachments = [att1, att2]
+    db.session.add_all([att1, att2, c1, c2])
+    db.session.commit()
+    return p.id, a.id
+
+
+def test_node_and_edge_parity_with_marshmallow():
+    app = setup_app()
+    with app.app_context():
+        pid, _ = seed()
+        nodes = db.session.query(Node).filter_by(project_id=pid).order_by(Node.title).all()
+        ser = serializer_for(NodeSchema, Node)
+        rows = db.session.query(*ser.columns()).filter(Node.project_id == pid).order_by(Node.title).all()
+        assert ser.dump_rows(rows) == NodeSchema(many=True).dump(nodes)
+        assert ser.dump_row(rows[0]) == NodeSchema().dump(nodes[0])
+
+        edges = db.session.query(Edge).filter_by(project_id=pid).all()
+        eser = serializer_for(EdgeSchema, Edge)
+        erows = db.session.query(*eser.columns()).filter(Edge.project_id == pid).all()
+        assert eser.dump_rows(erows) == EdgeSchema(many=True).dump(edges)
+
+
+def test_comment_with_attachments_parity():
+    app = setup_app()
+    with app.app_context():
+        _, nid = seed()
+        comments = db.session.query(Comment).filter_by(node_id=nid).order_by(Comment.body).all()
+        ser = serializer_for(CommentWithAttachmentsSchema, Comment)
+        rows = db.session.query(*ser.columns()).filter(Comment.node_id == nid).order_by(Comment.body).all()
+        fast = dump_comments_with_attachments(rows, CommentWithAttachmentsSchema)
+        expected = CommentWithAttachmentsSchema(many=True).dump(comments)
+        key = lambda a: a["id"]  # noqa: E731
+        for f, e in zip(fast, expected):
+            assert sorted(f.pop("attachments"), key=key) == sorted(e.pop("attachments"), key=key)
+        assert fast == expected
+
+
+def test_serializer_is_compiled_once_per_schema():
+    assert serializer_for(NodeSchema, Node) is serializer_for(NodeSchema, Node)
+    assert serializer_for(AttachmentSchema, Attachment).width == len(AttachmentSchema().dump_fields)
+
+
+def test_list_endpoints_keep_marshmallow_shape():
+    app = setup_app()
+    with app.app_context():
+        pid, nid = seed()
+        expected_nodes = {n["id"]: n for n in NodeSchema(many=True).dump(db.session.query(Node).filter_by(project_id=pid, is_hidden=False).all())}
+    with app.test_client() as client:
+        got = client.get(f"/api/v1/projects/{pid}/nodes").get_json()["data"]
+        assert {n["id"]: n for n in got} == expected_nodes
+        comments = client.get(f"/api/v1/nodes/{nid}/comments").get_json()["data"]
+        assert [c["body"] for c in comments] == ["one", "two"]
+        assert len(comments[0]["attachments"]) == 2 and comments[1]["attachments"] == []
@@ -0,0 +1,159 @@
+from app import create_app
+from app.extensions import db
+from app.models import Project, Node, Edge
+from app.services import graph_cache
+from app.services.graph_analysis import longest_path_by_planned_hours
+from app.services.revisions import record_graph_changes
+
+
+def setup_app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+    graph_cache.drop()
+    return app
+
+
+def seed():
+    p = Project(name="P")
+    db.session.add(p)
+    db.session.flush()
+    a = Node(project_id=p.id, title="A", planned_hours=2, is_group=True)
+    b = Node(project_id=p.id, title="B", planned_hours=3)
+    c = Node(project_id=p.id, title="C", planned_hours=5)
+    db.session.add_all([a, b, c])
+    db.session.flush()
+    b.parent_id = a.id
+    db.session.add(Edge(project_id=p.id, source_node_id=a.id, target_node_id=b.id))
+    db.session.commit()
+    return p.id, a.id, b.id, c.id
+
+
+def test_build_and_read_helpers():
+    app = setup_app()
+    with app.app_context():
+        pid, a, b, c = seed()
+        g = graph_cache.get_graph(pid)
+        assert g.node_count == 3 and g.edge_count == 1
+        ia, ib = g.index[a], g.index[b]
+        assert g.succ[ia] == [ib] and g.pred[ib] == [ia]
+        assert g.children[ia] == [ib] and g.parent[ib] == ia
+        assert graph_cache.get_graph(pid) is g
+        assert graph_cache.get_graph("missing") is None
+
+
+def test_commits_patch_cached_entry_in_place():
+    app = setup_app()
+    with app.app_context():
+        pid, a, b, c = seed()
+        g = graph_cache.get_graph(pid)
+        e = Edge(project_id=pid, source_node_id=b, target_node_id=c, weight=4)
+        db.session.add(e)
+        db.session.get(Node, c).planned_hours = 10
+        db.session.commit()
+        assert graph_cache.get_graph(pid) is g
+        assert g.edges[e.id] == (g.index[b], g.index[c], 4.0)
+        assert g.planned[g.index[c]] == 10.0
+        assert longest_path_by_planned_hours(pid) == ([a, b, c], 15.0)
+
+        db.session.delete(db.session.get(Node, b))
+        db.session.commit()
+        assert graph_cache.get_graph(pid) is g
+        assert g.node_count == 2 and g.edge_count == 0
+        assert g.children[g.index[a]] == []
+
+
+def test_rollback_and_bulk_writes_do_not_leave_stale_entries():
+    app = setup_app()
+    with app.app_context():
+        pid, a, b, c = seed()
+        g = graph_cache.get_graph(pid)
+        db.session.add(Edge(project_id=pid, source_node_id=b, target_node_id=c))
+        db.session.flush()
+        assert graph_cache.get_graph(pid) is not g  # private, uncommitted view
+        db.session.rollback()
+        assert graph_cache.get_graph(pid) is g and g.edge_count == 1
+
+        db.session.execute(Node.__table__.update().where(Node.id == c).values(planned_hours=50))
+        record_graph_changes(pid, [("node", c, "upsert", None)])
+        db.session.commit()
+        g2 = graph_cache.get_graph(pid)
+        assert g2 is not g and g2.planned[g2.index[c]] == 50.0
+
+
+def _reference_longest(pid):
+    """Full Kahn + DP recompute straight from the database."""
+    from app.services.graph_analysis import CriticalPath
+
+    return CriticalPath(graph_cache._build(pid, 0)).result()
+
+
+def test_critical_path_is_maintained_incrementally():
+    import random
+
+    app = setup_app()
+    with app.app_context():
+        p = Project(name="Big")
+        db.session.add(p)
+        db.session.flush()
+        rnd = random.Random(7)
+        nodes = [Node(project_id=p.id, title=f"n{i}", planned_hours=rnd.randint(0, 9)) for i in range(40)]
+        db.session.add_all(nodes)
+        db.session.flush()
+        ids = [n.id for n in nodes]
+        for _ in range(60):
+            a, b = sorted(rnd.sample(range(40), 2))
+            db.session.add(Edge(project_id=p.id, source_node_id=ids[a], target_node_id=ids[b]))
+        db.session.commit()
+
+        assert longest_path_by_planned_hours(p.id)[1] == _reference_longest(p.id)[1]
+        g = graph_cache.get_graph(p.id)
+        cp = g.critical_path
+        for step in range(30):
+            op = rnd.choice(["hours", "add", "delete"])
+            if op == "hours":
+                db.session.get(Node, rnd.choice(ids)).planned_hours = rnd.randint(0, 20)
+            elif op == "add":
+                a, b = sorted(rnd.sample(range(40), 2))
+                db.session.add(Edge(project_id=p.id, source_node_id=ids[a], target_node_id=ids[b]))
+            else:
+                e = db.session.query(Edge).filter_by(project_id=p.id).first()
+                db.session.delete(e)
+            db.session.commit()
+            path, weight = longest_path_by_planned_hours(p.id)
+            assert graph_cache.get_graph(p.id) is g
+            assert weight == _reference_longest(p.id)[1]
+            hours = {n.id: n.planned_hours for n in db.session.query(Node).filter_by(project_id=p.id)}
+            assert sum(hours[n] for n in path) == weight
+
+        # New nodes are slotted into the order by their first edge, in either direction
+        before = cp.full_recomputes
+        head = Node(project_id=p.id, title="head", planned_hours=7)
+        tail = Node(project_id=p.id, title="tail", planned_hours=4)
+        db.session.add_all([head, tail])
+        db.session.flush()
+        db.session.add_all([
+            Edge(project_id=p.id, source_node_id=head.id, target_node_id=ids[0]),
+            Edge(project_id=p.id, source_node_id=ids[39], target_node_id=tail.id),
+        ])
+        db.session.commit()
+        assert longest_path_by_planned_hours(p.id)[1] == _reference_longest(p.id)[1]
+        assert cp.full_recomputes == before
+
+        # Edge against the topological order forces one full recompute
+        before = cp.full_recomputes
+        db.session.add(Edge(project_id=p.id, source_node_id=ids[39], target_node_id=ids[0]))
+        db.session.commit()
+        assert longest_path_by_planned_hours(p.id)[1] == _reference_longest(p.id)[1]
+        assert cp.full_recomputes >= before
+
+
+def test_metrics_endpoint_uses_aggregates():
+    app = setup_app()
+    with app.app_context():
+        pid, a, b, c = seed()
+    with app.test_client() as client:
+        data = client.get(f"/api/v1/projects/{pid}/metrics").get_json()["data"]
+        assert data["count_nodes"] == 3 and data["count_edges"] == 1
+        assert data["critical_path_hint"]["total_planned_hours"] == 5.0
+        assert len(data["top_nodes"]) == 3
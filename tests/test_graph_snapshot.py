@@ -0,0 +1,170 @@
+from app import create_app
+from app.extensions import db
+from app.models import Project, Node, Edge, NodeLayout, NodeTranslation
+
+
+def setup_app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed(app):
+    with app.app_context():
+        p = Project(name="P")
+        db.session.add(p)
+        db.session.flush()
+        a = Node(project_id=p.id, title="A")
+        b = Node(project_id=p.id, title="B")
+        h = Node(project_id=p.id, title="H", is_hidden=True)
+        db.session.add_all([a, b, h])
+        db.session.flush()
+        db.session.add(Edge(project_id=p.id, source_node_id=a.id, target_node_id=b.id))
+        db.session.add(NodeLayout(node_id=a.id, x=10.0, y=20.0))
+        db.session.add(NodeTranslation(node_id=b.id, lang="uk", text="Б", provider="mock"))
+        db.session.commit()
+        return p.id, a.id, b.id
+
+
+def test_graph_snapshot_contains_nodes_edges_positions_translations():
+    app = setup_app()
+    pid, a_id, b_id = seed(app)
+    with app.test_client() as client:
+        resp = client.get(f"/api/v1/projects/{pid}/graph?lang=uk")
+        assert resp.status_code == 200
+        data = resp.get_json()["data"]
+        nodes = {n["id"]: n for n in data["nodes"]}
+        assert set(nodes) == {a_id, b_id}
+        assert nodes[a_id]["position"] == {"x": 10.0, "y": 20.0}
+        assert "position" not in nodes[b_id]
+        assert nodes[b_id]["title_translated"] == "Б"
+        assert len(data["edges"]) == 1
+        hidden = client.get(f"/api/v1/projects/{pid}/graph?include_hidden=1").get_json()["data"]
+        assert len(hidden["nodes"]) == 3
+
+
+def test_graph_snapshot_etag_roundtrip():
+    app = setup_app()
+    pid, a_id, _ = seed(app)
+    with app.test_client() as client:
+        first = client.get(f"/api/v1/projects/{pid}/graph")
+        etag = first.headers["ETag"]
+        again = client.get(f"/api/v1/projects/{pid}/graph", headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        # A different variant must not match
+        other = client.get(f"/api/v1/projects/{pid}/graph?lang=uk", headers={"If-None-Match": etag})
+        assert other.status_code == 200
+        with app.app_context():
+            db.session.get(NodeLayout, a_id).x = 99.0
+            db.session.commit()
+        changed = client.get(f"/api/v1/projects/{pid}/graph", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+
+
+def test_graph_snapshot_unknown_project():
+    app = setup_app()
+    with app.test_client() as client:
+        assert client.get("/api/v1/projects/nope/graph").status_code == 404
+
+
+def test_revision_bumps_and_changes_since():
+    app = setup_app()
+    pid, a_id, b_id = seed(app)
+    with app.test_client() as client:
+        base = client.get(f"/api/v1/projects/{pid}/graph").get_json()["data"]["revision"]
+        assert base > 0
+        with app.app_context():
+            db.session.get(Node, a_id).title = "A2"
+            db.session.get(NodeLayout, a_id).y = 5.0
+            c = Node(project_id=pid, title="C")
+            db.session.add(c)
+            db.session.commit()
+            c_id = c.id
+        js = client.get(f"/api/v1/projects/{pid}/changes?since={base}").get_json()["data"]
+        assert js["revision"] > base
+        ids = {n["id"] for n in js["nodes"]}
+        assert ids == {a_id, c_id}
+        assert {"node_id": a_id, "x": 10.0, "y": 5.0} in js["positions"]
+        assert js["edges"] == []
+        mid = js["revision"]
+        with app.app_context():
+            # Deleting a node cascades to its edges; both must be reported
+            db.session.delete(db.session.get(Node, b_id))
+            db.session.commit()
+        js = client.get(f"/api/v1/projects/{pid}/changes?since={mid}").get_json()["data"]
+        assert js["deleted"]["nodes"] == [b_id]
+        assert len(js["deleted"]["edges"]) == 1
+        empty = client.get(f"/api/v1/projects/{pid}/changes?since={js['revision']}").get_json()["data"]
+        assert empty["nodes"] == [] and empty["deleted"]["nodes"] == []
+        assert client.get(f"/api/v1/projects/{pid}/changes?since=999999").status_code == 409
+
+
+def test_changes_report_newly_hidden_nodes_as_deleted():
+    app = setup_app()
+    pid, a_id, _ = seed(app)
+    with app.app_context():
+        from app.services.revisions import current_revision
+        base = current_revision(pid)
+        db.session.get(Node, a_id).is_hidden = True
+        db.session.commit()
+    with app.test_client() as client:
+        js = client.get(f"/api/v1/projects/{pid}/changes?since={base}").get_json()["data"]
+        assert js["deleted"]["nodes"] == [a_id]
+        js = client.get(f"/api/v1/projects/{pid}/changes?since={base}&include_hidden=1").get_json()["data"]
+        assert [n["id"] for n in js["nodes"]] == [a_id]
+
+
+def test_columnar_format_matches_json():
+    from app.schemas.columnar import rows_from_columnar
+    app = setup_app()
+    pid, a_id, _ = seed(app)
+    with app.test_client() as client:
+        plain = client.get(f"/api/v1/projects/{pid}/nodes?lang=uk").get_json()["data"]
+        col = client.get(f"/api/v1/projects/{pid}/nodes?lang=uk&format=columnar").get_json()["data"]
+        assert col["format"] == "columnar" and col["project_id"] == pid
+        assert col["nodes"]["dicts"]["status"] == ["planned"]
+        decoded = {r["id"]: r for r in rows_from_columnar(col["nodes"])}
+        for n in plain:
+            row = decoded[n["id"]]
+            for k, v in n.items():
+                if k == "position":
+                    assert (row["x"], row["y"]) == (v["x"], v["y"])
+                else:
+                    assert row[k] == v
+        edges = client.get(f"/api/v1/projects/{pid}/edges?format=columnar").get_json()["data"]["edges"]
+        assert list(rows_from_columnar(edges)) == client.get(f"/api/v1/projects/{pid}/edges").get_json()["data"]
+
+
+def test_graph_msgpack_format():
+    msgpack = __import__("pytest").importorskip("msgpack")
+    app = setup_app()
+    pid, _, _ = seed(app)
+    with app.test_client() as client:
+        resp = client.get(f"/api/v1/projects/{pid}/graph?format=msgpack")
+        assert resp.status_code == 200
+        assert resp.mimetype == "application/x-msgpack"
+        body = msgpack.unpackb(resp.data, raw=False)["data"]
+        assert body["nodes"]["count"] == 2 and body["edges"]["count"] == 1
+        json_etag = client.get(f"/api/v1/projects/{pid}/graph").headers["ETag"]
+        assert resp.headers["ETag"] != json_etag
+
+
+def test_snapshot_racing_writers_keeps_the_pre_read_version(monkeypatch):
+    from app.services import graph_snapshot
+
+    app = setup_app()
+    pid, _a, _b = seed(app)
+    seen = []
+
+    def moving_version(project_id):
+        seen.append(str(len(seen) + 1))
+        return seen[-1]
+
+    monkeypatch.setattr(graph_snapshot, "project_graph_version", moving_version)
+    with app.app_context():
+        snap = graph_snapshot.load_graph_snapshot(pid, max_attempts=3)
+    # Versions 1..4 were observed; the last read started at 3 and finished at 4
+    assert seen == ["1", "2", "3", "4"]
+    assert snap["version"] == "3"
@@ -0,0 +1,101 @@
+from app import create_app
+from app.extensions import db
+from app.models import Project, Node
+from app.services.nodes import recompute_group_status, recompute_all_group_statuses
+from app.services.revisions import current_revision
+
+
+def setup_app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed():
+    # root > mid > (leaf1, leaf2);  root > other;  empty group E
+    p = Project(name="P")
+    db.session.add(p)
+    db.session.flush()
+    root = Node(project_id=p.id, title="root", is_group=True, status="done")
+    db.session.add(root)
+    db.session.flush()
+    mid = Node(project_id=p.id, title="mid", is_group=True, parent_id=root.id, status="done")
+    other = Node(project_id=p.id, title="other", parent_id=root.id, status="done")
+    empty = Node(project_id=p.id, title="E", is_group=True, status="done")
+    db.session.add_all([mid, other, empty])
+    db.session.flush()
+    l1 = Node(project_id=p.id, title="l1", parent_id=mid.id, status="done")
+    l2 = Node(project_id=p.id, title="l2", parent_id=mid.id, status="done")
+    db.session.add_all([l1, l2])
+    db.session.commit()
+    return p.id, {n.title: n.id for n in (root, mid, other, empty, l1, l2)}
+
+
+def statuses(ids):
+    return {k: db.session.get(Node, v).status for k, v in ids.items()}
+
+
+def test_ancestor_rollup_in_one_pass():
+    app = setup_app()
+    with app.app_context():
+        pid, ids = seed()
+        db.session.query(Node).update({Node.updated_at: "2000-01-01T00:00:00Z"})
+        db.session.commit()
+        rev = current_revision(pid)
+        db.session.get(Node, ids["l1"]).status = "blocked"
+        db.session.commit()
+        mid = db.session.get(Node, ids["mid"])
+        recompute_group_status(ids["mid"])
+        # Loaded instances see the new timestamp without a reload
+        assert mid.updated_at > "2001"
+        db.session.commit()
+        db.session.expire_all()
+        st = statuses(ids)
+        assert st["mid"] == "blocked" and st["root"] == "blocked"
+        # Rolled-up groups are touched; untouched nodes keep their timestamp
+        stamps = {k: db.session.get(Node, v).updated_at for k, v in ids.items()}
+        assert stamps["mid"] > "2001" and stamps["root"] > "2001" and stamps["other"] == "2000-01-01T00:00:00Z"
+        assert current_revision(pid) == rev + 2  # leaf edit + one rollup bump
+
+        db.session.get(Node, ids["l1"]).status = "discuss"
+        db.session.commit()
+        recompute_group_status(ids["mid"])
+        db.session.commit()
+        db.session.expire_all()
+        st = statuses(ids)
+        assert st["mid"] == "planned" and st["root"] == "planned"
+
+
+def test_project_wide_repair():
+    app = setup_app()
+    with app.app_context():
+        pid, ids = seed()
+        db.session.execute(Node.__table__.update().where(Node.id == ids["l2"]).values(status="in-progress"))
+        db.session.commit()
+        assert recompute_all_group_statuses(pid) == 3  # mid, root, empty group
+        db.session.commit()
+        db.session.expire_all()
+        st = statuses(ids)
+        assert (st["mid"], st["root"], st["E"], st["other"]) == ("in-progress", "in-progress", "planned", "done")
+        assert recompute_all_group_statuses(pid) == 0
+
+
+def test_parent_cycle_terminates():
+    app = setup_app()
+    with app.app_context():
+        pid, ids = seed()
+        db.session.execute(Node.__table__.update().where(Node.id == ids["root"]).values(parent_id=ids["mid"]))
+        db.session.commit()
+        recompute_group_status(ids["mid"])
+        recompute_all_group_statuses(pid)
+        db.session.commit()
+
+
+def test_cli_recompute_groups():
+    app = setup_app()
+    with app.app_context():
+        pid, _ = seed()
+    res = app.test_cli_runner().invoke(args=["recompute-groups", "--project", pid])
+    assert res.exit_code == 0, res.output
+    assert "project" in res.output
@@ -0,0 +1,33 @@
+from app import create_app
+from app.extensions import db
+from app.services.hot_queries import explain_hot_queries, _is_full_scan
+
+
+def setup_app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_hot_queries_use_indexes():
+    app = setup_app()
+    with app.app_context():
+        results = explain_hot_queries()
+        assert results
+        flagged = {r["name"]: r["plan"] for r in results if r["full_scans"]}
+        assert flagged == {}
+
+
+def test_full_scan_detection():
+    assert _is_full_scan("SCAN node")
+    assert not _is_full_scan("SCAN node USING INDEX ix_node_project_id")
+    assert not _is_full_scan("SEARCH edge USING INDEX ix_edge_project_id (project_id=?)")
+
+
+def test_cli_reports_plans():
+    app = setup_app()
+    runner = app.test_cli_runner()
+    res = runner.invoke(args=["explain-hot-queries", "--strict"])
+    assert res.exit_code == 0, res.output
+    assert "graph.nodes" in res.output
@@ -0,0 +1,247 @@
+import gzip
+import io
+import json
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.models import Project, Node, Edge, NodeLayout, Comment, Tag, User, Attachment, BackgroundJob, node_tag
+from app.services import graph_cache, project_import
+from app.services.project_archive import FORMAT, iter_buffered, iter_export_lines, iter_gzip
+from app.services.project_import import create_import_job, run_import
+
+
+def setup_app(tmp_path):
+    app = create_app("testing")
+    app.config["LOGIN_DISABLED"] = True
+    app.instance_path = str(tmp_path / "instance")
+    with app.app_context():
+        db.create_all()
+    graph_cache.drop()
+    return app
+
+
+def seed():
+    u = User(email="u@example.com", name="U")
+    p = Project(name="P")
+    db.session.add_all([u, p])
+    db.session.flush()
+    nodes = [Node(project_id=p.id, title=f"N{i}") for i in range(6)]
+    db.session.add_all(nodes)
+    db.session.flush()
+    nodes[1].parent_id = nodes[0].id
+    tag = Tag(name="infra")
+    tag.nodes.append(nodes[2])
+    c = Comment(node_id=nodes[0].id, user_id=u.id, body="hello")
+    c.attachments.append(Attachment(uploader_user_id=u.id, mime_type="image/png", kind="image", storage_path="x/1.png"))
+    db.session.add_all([tag, c, NodeLayout(node_id=nodes[0].id, x=5, y=6)])
+    db.session.add_all([
+        Edge(project_id=p.id, source_node_id=nodes[i].id, target_node_id=nodes[i + 1].id) for i in range(5)
+    ])
+    db.session.commit()
+    return p.id
+
+
+def write_archive(path, project_id):
+    with open(path, "wb") as fp:
+        for chunk in iter_gzip(iter_buffered(iter_export_lines(project_id))):
+            fp.write(chunk)
+    return str(path)
+
+
+def project_shape(pid):
+    nodes = {n.id: n for n in db.session.query(Node).filter_by(project_id=pid)}
+    titles = {n.id: n.title for n in nodes.values()}
+    edges = sorted((titles[e.source_node_id], titles[e.target_node_id]) for e in db.session.query(Edge).filter_by(project_id=pid))
+    parents = sorted((n.title, titles[n.parent_id]) for n in nodes.values() if n.parent_id)
+    return len(nodes), edges, parents
+
+
+def test_import_into_same_database_remaps_ids(tmp_path):
+    app = setup_app(tmp_path)
+    with app.app_context():
+        pid = seed()
+        path = write_archive(tmp_path / "p.ndjson.gz", pid)
+        job_id = create_import_job(path, batch_size=4)
+        meta = run_import(job_id)
+        new_pid = meta["project_id"]
+        assert meta["remap"] is True and new_pid != pid
+        assert project_shape(new_pid) == project_shape(pid)
+        assert db.session.get(Project, new_pid).name == "P (import)"
+        assert db.session.get(BackgroundJob, job_id).status == "finished"
+        assert meta["expected"]["node"] == 6 and meta["inserted"]["node"] == 6
+        new_nodes = [n.id for n in db.session.query(Node).filter_by(project_id=new_pid)]
+        assert db.session.query(node_tag).filter(node_tag.c.node_id.in_(new_nodes)).count() == 1
+        assert db.session.query(Tag).count() == 1
+        comment = db.session.query(Comment).join(Node).filter(Node.project_id == new_pid).one()
+        assert comment.user.email == "u@example.com" and len(comment.attachments) == 1
+
+
+def test_restore_keeps_ids_and_resumes_after_crash(tmp_path, monkeypatch):
+    app = setup_app(tmp_path)
+    with app.app_context():
+        pid = seed()
+        shape = project_shape(pid)
+        path = write_archive(tmp_path / "p.ndjson.gz", pid)
+        db.session.delete(db.session.get(Project, pid))
+        db.session.commit()
+        job_id = create_import_job(path, batch_size=3)
+
+        real_insert = project_import._Batch.insert
+        calls = {"n": 0}
+
+        def flaky(self, kind, rows):
+            calls["n"] += 1
+            if calls["n"] == 4:
+                raise RuntimeError("disk on fire")
+            return real_insert(self, kind, rows)
+
+        monkeypatch.setattr(project_import._Batch, "insert", flaky)
+        with pytest.raises(RuntimeError):
+            run_import(job_id)
+        job = db.session.get(BackgroundJob, job_id)
+        assert job.status == "failed" and json.loads(job.meta_json)["records"] > 0
+        monkeypatch.setattr(project_import._Batch, "insert", real_insert)
+
+        meta = run_import(job_id)
+        assert meta["project_id"] == pid and meta["remap"] is False
+        assert project_shape(pid) == shape
+        assert db.session.query(Node).count() == 6
+
+
+def test_forward_parent_links_are_applied_once_parent_arrives(tmp_path):
+    app = setup_app(tmp_path)
+    lines = [
+        {"type": "header", "data": {"format": FORMAT, "version": 1, "project_id": "p1", "exported_at": "t"}},
+        {"type": "project", "data": {"id": "p1", "name": "P"}},
+        {"type": "node", "data": {"id": "child", "project_id": "p1", "title": "C", "parent_id": "parent"}},
+        {"type": "node", "data": {"id": "parent", "project_id": "p1", "title": "P"}},
+        {"type": "footer", "data": {"counts": {}}},
+    ]
+    path = tmp_path / "fwd.ndjson"
+    path.write_text("\n".join(json.dumps(line) for line in lines) + "\n")
+    with app.app_context():
+        meta = run_import(create_import_job(str(path), batch_size=1))
+        assert meta["pending_parents"] == {}
+        assert db.session.get(Node, "child").parent_id == "parent"
+
+
+def test_import_endpoint(tmp_path):
+    app = setup_app(tmp_path)
+    with app.app_context():
+        pid = seed()
+        body = b"".join(iter_gzip(iter_buffered(iter_export_lines(pid))))
+    with app.test_client() as client:
+        res = client.post("/api/v1/projects/import", data={"file": (io.BytesIO(body), "p.ndjson.gz")},
+                          content_type="multipart/form-data")
+        assert res.status_code == 202
+        job = client.get(f"/api/v1/jobs/{res.get_json()['data']['job_id']}").get_json()["data"]
+        assert job["status"] == "finished" and job["type"] == "import"
+        assert job["project_id"] == job["meta"]["project_id"] != pid
+        assert job["total"] == job["done"] == sum(job["meta"]["expected"].values()) > 0
+        # The uploaded copy is gone once the import finished
+        assert list((tmp_path / "instance" / "imports").iterdir()) == []
+        bad = client.post("/api/v1/projects/import", data=gzip.compress(b'{"type":"node","data":{}}\n'))
+        assert bad.status_code == 400
+        assert client.post(f"/api/v1/projects/import?resume={job['id']}").status_code == 409
+        assert client.post("/api/v1/projects/import?resume=nope").status_code == 404
+
+
+def test_stalled_running_job_is_resumed_but_live_one_is_not(tmp_path):
+    import os
+    from datetime import datetime, timedelta
+
+    app = setup_app(tmp_path)
+    with app.app_context():
+        pid = seed()
+        path = write_archive(tmp_path / "p.ndjson.gz", pid)
+        job_id = create_import_job(path, batch_size=4, remap=True)
+        job = db.session.get(BackgroundJob, job_id)
+        # Header counts give progress a total before the first batch
+        assert job.total > 0 and job.done == 0
+        meta = json.loads(job.meta_json)
+        meta["worker"] = {"pid": -1, "thread": 1}
+        job.meta_json = json.dumps(meta)
+        job.status = "running"
+        job.updated_at = datetime.utcnow().isoformat() + "Z"
+        db.session.commit()
+    with app.test_client() as client:
+        url = f"/api/v1/projects/import?resume={job_id}"
+        # Another process checkpointed recently: still running
+        assert client.post(url).status_code == 409
+        with app.app_context():
+            job = db.session.get(BackgroundJob, job_id)
+            job.updated_at = (datetime.utcnow() - timedelta(seconds=app.config["IMPORT_STALE_SECONDS"] + 1)).isoformat() + "Z"
+            db.session.commit()
+        assert client.post(url).status_code == 202
+        with app.app_context():
+            job = db.session.get(BackgroundJob, job_id)
+            assert job.status == "finished" and job.done == job.total
+            # A worker of this process whose thread is gone is dead regardless of the heartbeat
+            job.status = "running"
+            job.meta_json = json.dumps({**json.loads(job.meta_json), "worker": {"pid": os.getpid(), "thread": -1}})
+            db.session.commit()
+            assert project_import.resume_blocker(job) is None
+    # Not an upload: the archive given by path is kept
+    assert os.path.exists(path)
+
+
+def test_uploaded_archive_is_deleted_when_it_cannot_be_imported(tmp_path):
+    app = setup_app(tmp_path)
+    truncated = tmp_path / "t.ndjson"
+    truncated.write_text(json.dumps({"type": "header", "data": {"format": FORMAT, "version": 1, "project_id": "p1"}}) + "\n")
+    with app.app_context():
+        job_id = create_import_job(str(truncated), owns_source=True)
+        with pytest.raises(Exception, match="footer"):
+            run_import(job_id)
+        assert db.session.get(BackgroundJob, job_id).status == "failed"
+    assert not truncated.exists()
+    with app.test_client() as client:
+        res = client.post(f"/api/v1/projects/import?resume={job_id}")
+        assert res.status_code == 409 and "no longer available" in res.get_json()["errors"][0]["detail"]
+
+
+def test_claim_is_atomic(tmp_path, monkeypatch):
+    app = setup_app(tmp_path)
+    with app.app_context():
+        pid = seed()
+        job_id = create_import_job(write_archive(tmp_path / "p.ndjson.gz", pid), remap=True)
+        assert project_import.claim_import_job(job_id) is None
+        assert db.session.get(BackgroundJob, job_id).status == "running"
+        # A second resumer in this process sees the live claim
+        assert project_import.claim_import_job(job_id) == "job is still running"
+        # Another process whose check raced the claim loses at the UPDATE: the heartbeat is fresh
+        job = db.session.get(BackgroundJob, job_id)
+        job.meta_json = json.dumps({**json.loads(job.meta_json), "worker": {"pid": -1}})
+        db.session.commit()
+        monkeypatch.setattr(project_import, "resume_blocker", lambda job, stale_after=0: None)
+        assert project_import.claim_import_job(job_id) == "job is already being resumed"
+    with app.test_client() as client:
+        res = client.post(f"/api/v1/projects/import?resume={job_id}")
+        assert res.status_code == 409
+    with app.app_context():
+        monkeypatch.undo()
+        meta = run_import(job_id, claimed=True)
+        assert meta["records"] > 0 and db.session.get(BackgroundJob, job_id).status == "finished"
+        assert job_id not in project_import._active
+
+
+def test_inline_import_failure_is_reported(tmp_path, monkeypatch):
+    app = setup_app(tmp_path)
+    assert app.config["IMPORT_ASYNC"] is False
+    header = json.dumps({"type": "header", "data": {"format": FORMAT, "version": 1, "project_id": "p1", "exported_at": "t"}})
+    with app.test_client() as client:
+        res = client.post("/api/v1/projects/import", data=(header + "\n").encode())
+        assert res.status_code == 400
+        err = res.get_json()["errors"][0]
+        assert "footer" in err["detail"]
+        assert client.get(f"/api/v1/jobs/{err['meta']['job_id']}").get_json()["data"]["status"] == "failed"
+
+        def boom(self, kind, rows):
+            raise RuntimeError("disk on fire")
+
+        monkeypatch.setattr(project_import._Batch, "insert", boom)
+        body = (header + "\n" + json.dumps({"type": "project", "data": {"id": "p1", "name": "P"}}) + "\n").encode()
+        res = client.post("/api/v1/projects/import", data=body)
+        assert res.status_code == 500 and res.get_json()["errors"][0]["detail"] == "disk on fire"
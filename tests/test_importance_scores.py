@@ -0,0 +1,63 @@
+from app import create_app
+from app.extensions import db
+from app.models import Project, Node, Edge
+from app.services import graph_cache
+from app.services.nodes import recompute_importance_scores, _importance
+from app.services.revisions import current_revision
+
+
+def setup_app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+    graph_cache.drop()
+    return app
+
+
+def seed():
+    p = Project(name="P")
+    db.session.add(p)
+    db.session.flush()
+    g = Node(project_id=p.id, title="G", is_group=True, planned_hours=1)
+    a = Node(project_id=p.id, title="A", planned_hours=3, actual_hours=2)
+    b = Node(project_id=p.id, title="B")
+    db.session.add_all([g, a, b])
+    db.session.flush()
+    a.parent_id = g.id
+    b.parent_id = g.id
+    db.session.add_all([
+        Edge(project_id=p.id, source_node_id=a.id, target_node_id=b.id),
+        Edge(project_id=p.id, source_node_id=g.id, target_node_id=a.id),
+    ])
+    db.session.commit()
+    return p.id, g.id, a.id, b.id
+
+
+def test_project_recompute_matches_formula_and_bumps_revision():
+    app = setup_app()
+    with app.app_context():
+        pid, g, a, b = seed()
+        db.session.execute(Node.__table__.update().values(importance_score=0.0))
+        db.session.commit()
+        cached = graph_cache.get_graph(pid)
+        rev = current_revision(pid)
+        assert recompute_importance_scores(project_id=pid) == 3
+        db.session.commit()
+        assert current_revision(pid) == rev + 1
+        scores = {n.id: n.importance_score for n in db.session.query(Node).filter_by(project_id=pid)}
+        assert scores[g] == _importance(1, 2, 1)
+        assert scores[a] == _importance(5, 0, 2)
+        assert scores[b] == _importance(0, 0, 1)
+        # Score-only writes keep cached adjacency valid
+        assert graph_cache.get_graph(pid) is cached
+        # Nothing changed: no UPDATE, no revision bump
+        assert recompute_importance_scores(node_ids=[g, a, b]) == 0
+
+
+def test_cli_recompute_scores():
+    app = setup_app()
+    with app.app_context():
+        pid, *_ = seed()
+    res = app.test_cli_runner().invoke(args=["recompute-scores", "--project", pid])
+    assert res.exit_code == 0, res.output
+    assert "Recomputed scores" in res.output
@@ -0,0 +1,81 @@
+from app import create_app
+from app.extensions import db
+from app.models import Project, Node, Edge, NodeLayout
+from app.services import graph_cache
+from app.services.layout import clear_layout_cache, layered_layout
+
+
+def setup_app():
+    app = create_app("testing")
+    app.config["LOGIN_DISABLED"] = True
+    with app.app_context():
+        db.create_all()
+    graph_cache.drop()
+    clear_layout_cache()
+    return app
+
+
+def test_layered_layout_ranks_edges_and_separates_layers():
+    ids = [f"n{i}" for i in range(8)]
+    edges = [("n0", "n1"), ("n0", "n2"), ("n1", "n3"), ("n2", "n3"), ("n3", "n4"), ("n0", "n4"), ("n5", "n6")]
+    pos = layered_layout(ids, edges, node_sep=50, rank_sep=100)
+    assert set(pos) == set(ids)
+    for s, t in edges:
+        assert pos[t][0] > pos[s][0]
+    by_rank = {}
+    for nid, (x, y) in pos.items():
+        by_rank.setdefault(x, []).append(y)
+    for ys in by_rank.values():
+        ys.sort()
+        assert all(b - a >= 50 - 1e-9 for a, b in zip(ys, ys[1:]))
+    # Input order does not matter; TB swaps the axes
+    assert layered_layout(list(reversed(ids)), list(reversed(edges)), node_sep=50, rank_sep=100) == pos
+    tb = layered_layout(ids, edges, direction="TB", node_sep=50, rank_sep=100)
+    assert all(tb[k] == (y, x) for k, (x, y) in pos.items())
+
+
+def test_layered_layout_removes_crossings_and_tolerates_cycles():
+    pos = layered_layout(["a", "b", "c", "d"], [("a", "d"), ("b", "c")])
+    assert (pos["a"][1] < pos["b"][1]) == (pos["d"][1] < pos["c"][1])
+    cyc = layered_layout(["a", "b", "c"], [("a", "b"), ("b", "c"), ("c", "a")])
+    assert len({p[0] for p in cyc.values()}) == 3
+
+
+def seed():
+    p = Project(name="P")
+    db.session.add(p)
+    db.session.flush()
+    nodes = [Node(project_id=p.id, title=f"N{i}") for i in range(4)]
+    db.session.add_all(nodes)
+    db.session.flush()
+    db.session.add_all([
+        Edge(project_id=p.id, source_node_id=nodes[0].id, target_node_id=nodes[1].id),
+        Edge(project_id=p.id, source_node_id=nodes[1].id, target_node_id=nodes[2].id),
+    ])
+    db.session.commit()
+    return p.id, [n.id for n in nodes]
+
+
+def test_layout_endpoint_saves_and_serves_repeat_requests_from_cache():
+    app = setup_app()
+    with app.app_context():
+        pid, ids = seed()
+    with app.test_client() as client:
+        url = f"/api/v1/projects/{pid}/layout?algo=layered"
+        first = client.post(url).get_json()["data"]
+        assert first["cached"] is False and first["saved"] is True
+        assert len(first["positions"]) == 4
+        again = client.post(url).get_json()["data"]
+        assert again["cached"] is True
+        # Nothing changed since the last save: no new revision
+        assert again["revision"] == first["revision"]
+        assert again["positions"] == first["positions"]
+        preview = client.post(url + "&save=0&direction=TB").get_json()["data"]
+        assert preview["saved"] is False and preview["revision"] == first["revision"]
+        assert client.post(f"/api/v1/projects/{pid}/layout?algo=spring").status_code == 400
+        assert client.post(f"/api/v1/projects/{pid}/layout?direction=up").status_code == 400
+        assert client.post("/api/v1/projects/missing/layout").status_code == 404
+    with app.app_context():
+        saved = {r.node_id: (r.x, r.y) for r in db.session.query(NodeLayout).all()}
+        assert saved == {p["node_id"]: (p["x"], p["y"]) for p in first["positions"]}
+        assert saved[ids[1]][0] > saved[ids[0]][0]
@@ -0,0 +1,69 @@
+from app import create_app
+from app.extensions import db
+from app.models import Project, Node, NodeLayout, GraphChange
+from app.services import graph_cache
+from app.services.spatial import node_ids_in_bbox
+
+
+def setup_app():
+    app = create_app("testing")
+    app.config["LOGIN_DISABLED"] = True
+    with app.app_context():
+        db.create_all()
+    graph_cache.drop()
+    return app
+
+
+def seed():
+    p = Project(name="P")
+    other = Project(name="Q")
+    db.session.add_all([p, other])
+    db.session.flush()
+    a = Node(project_id=p.id, title="A")
+    b = Node(project_id=p.id, title="B")
+    foreign = Node(project_id=other.id, title="X")
+    db.session.add_all([a, b, foreign])
+    db.session.flush()
+    db.session.add(NodeLayout(node_id=a.id, x=1, y=1))
+    db.session.commit()
+    return p.id, a.id, b.id, foreign.id
+
+
+def test_bulk_positions_upsert_in_one_revision():
+    app = setup_app()
+    with app.app_context():
+        pid, a, b, _ = seed()
+        before = db.session.get(Project, pid).revision
+    with app.test_client() as client:
+        res = client.post(f"/api/v1/projects/{pid}/positions", json=[
+            {"node_id": a, "x": 100, "y": 100},
+            {"node_id": b, "x": 200.5, "y": -3},
+        ])
+        assert res.status_code == 200
+        data = res.get_json()["data"]
+        assert data == {"revision": before + 1, "count": 2}
+    with app.app_context():
+        assert (db.session.get(NodeLayout, a).x, db.session.get(NodeLayout, a).y) == (100, 100)
+        assert (db.session.get(NodeLayout, b).x, db.session.get(NodeLayout, b).y) == (200.5, -3)
+        logged = db.session.query(GraphChange).filter_by(project_id=pid, revision=before + 1).all()
+        assert {(c.entity, c.entity_id) for c in logged} == {("position", a), ("position", b)}
+        # R*Tree mirror follows the Core upsert via triggers
+        assert set(node_ids_in_bbox(pid, 50, -10, 250, 150)) == {a, b}
+        assert node_ids_in_bbox(pid, 0, 0, 2, 2) == []
+
+
+def test_bulk_positions_reject_foreign_and_malformed():
+    app = setup_app()
+    with app.app_context():
+        pid, a, _, foreign = seed()
+        before = db.session.get(Project, pid).revision
+    with app.test_client() as client:
+        url = f"/api/v1/projects/{pid}/positions"
+        res = client.post(url, json={"positions": [{"node_id": a, "x": 5, "y": 5}, {"node_id": foreign, "x": 0, "y": 0}]})
+        assert res.status_code == 400
+        assert client.post(url, json=[{"node_id": a, "x": "nan", "y": 1}]).status_code == 400
+        assert client.post(url, json={"positions": "nope"}).status_code == 400
+        assert client.post("/api/v1/projects/missing/positions", json=[]).status_code == 404
+    with app.app_context():
+        assert db.session.get(NodeLayout, a).x == 1
+        assert db.session.get(Project, pid).revision == before
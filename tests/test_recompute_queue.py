@@ -0,0 +1,73 @@
+from app import create_app
+from app.extensions import db
+from app.models import Project, Node, Edge
+from app.services import graph_cache, recompute_queue
+
+
+def setup_app(mode):
+    app = create_app("testing")
+    app.config["RECOMPUTE_MODE"] = mode
+    app.config["LOGIN_DISABLED"] = True
+    with app.app_context():
+        db.create_all()
+    graph_cache.drop()
+    return app
+
+
+def seed():
+    p = Project(name="P")
+    db.session.add(p)
+    db.session.flush()
+    grp = Node(project_id=p.id, title="G", is_group=True)
+    db.session.add(grp)
+    db.session.flush()
+    a = Node(project_id=p.id, title="A", parent_id=grp.id)
+    b = Node(project_id=p.id, title="B", parent_id=grp.id)
+    db.session.add_all([a, b])
+    db.session.commit()
+    return p.id, grp.id, a.id, b.id
+
+
+def test_request_mode_coalesces_and_runs_once(monkeypatch):
+    app = setup_app("request")
+    with app.app_context():
+        pid, grp, a, b = seed()
+    calls = []
+    real = recompute_queue.run_recompute
+    monkeypatch.setattr(recompute_queue, "run_recompute", lambda s, g: (calls.append((list(s), list(g))), real(s, g)))
+    with app.test_client() as client:
+        res = client.post(f"/api/v1/projects/{pid}/edges", json={"source_node_id": a, "target_node_id": b})
+        assert res.status_code == 201
+        assert calls == [([a, b], [])]
+        calls.clear()
+        assert client.patch(f"/api/v1/nodes/{a}", json={"status": "in-progress"}).status_code == 200
+        assert calls == [([a], [grp])]
+    with app.app_context():
+        assert db.session.get(Node, grp).status == "in-progress"
+        assert db.session.get(Node, a).importance_score > 0
+
+
+def test_sync_mode_runs_inline():
+    app = setup_app("sync")
+    with app.app_context():
+        pid, grp, a, b = seed()
+    with app.test_client() as client:
+        data = client.post(f"/api/v1/projects/{pid}/edges", json={"source_node_id": a, "target_node_id": b}).get_json()
+        assert data["data"]["source_node_id"] == a
+    with app.app_context():
+        assert db.session.get(Node, b).importance_score > 0
+
+
+def test_background_mode_deduplicates(monkeypatch):
+    app = setup_app("background")
+    seen = []
+    monkeypatch.setattr(recompute_queue, "run_recompute", lambda s, g: seen.append((sorted(s), sorted(g))))
+    with app.app_context():
+        recompute_queue.schedule_recompute(scores=["x", "y", "x"], groups=["g"])
+        recompute_queue.schedule_recompute(scores=["y"], groups=["g", None])
+    assert recompute_queue.wait_idle()
+    merged = set()
+    for s, g in seen:
+        merged.update(s)
+    assert merged == {"x", "y"}
+    assert sum(len(s) for s, _ in seen) <= 3
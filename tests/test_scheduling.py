@@ -0,0 +1,59 @@
+from app import create_app
+from app.extensions import db
+from app.models import Project, Node, Edge
+from app.services import graph_cache
+
+
+def setup_app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+    graph_cache.drop()
+    return app
+
+
+def seed():
+    # A(2) -> B(3) -> D(1);  A -> C(1) -> D with lag 1;  E, F form a cycle
+    p = Project(name="P")
+    db.session.add(p)
+    db.session.flush()
+    n = {k: Node(project_id=p.id, title=k, planned_hours=h) for k, h in
+         {"A": 2, "B": 3, "C": 1, "D": 1, "E": 1, "F": 1}.items()}
+    db.session.add_all(n.values())
+    db.session.flush()
+    for s, t, w in [("A", "B", 0), ("B", "D", 0), ("A", "C", 0), ("C", "D", 1), ("E", "F", 0), ("F", "E", 0)]:
+        db.session.add(Edge(project_id=p.id, source_node_id=n[s].id, target_node_id=n[t].id, weight=w))
+    db.session.commit()
+    return p.id, {k: v.id for k, v in n.items()}
+
+
+def test_schedule_endpoint_computes_cpm_values():
+    app = setup_app()
+    with app.app_context():
+        pid, ids = seed()
+    with app.test_client() as client:
+        data = client.get(f"/api/v1/projects/{pid}/schedule").get_json()["data"]
+        rows = {r["id"]: r for r in data["nodes"]}
+        assert data["project_end"] == 6.0
+        assert set(data["critical_node_ids"]) == {ids["A"], ids["B"], ids["D"]}
+        assert set(data["cyclic_node_ids"]) == {ids["E"], ids["F"]}
+        c = rows[ids["C"]]
+        assert (c["es"], c["ef"], c["ls"], c["lf"]) == (2.0, 3.0, 3.0, 4.0)
+        assert c["total_float"] == 1.0 and c["free_float"] == 1.0
+        d = rows[ids["D"]]
+        assert (d["es"], d["lf"], d["total_float"]) == (5.0, 6.0, 0.0)
+        assert client.get("/api/v1/projects/missing/schedule").status_code == 404
+
+
+def test_schedule_is_memoized_per_revision():
+    from app.services.scheduling import project_schedule
+
+    app = setup_app()
+    with app.app_context():
+        pid, ids = seed()
+        first = project_schedule(pid)
+        assert project_schedule(pid) is first
+        db.session.get(Node, ids["C"]).planned_hours = 5
+        db.session.commit()
+        second = project_schedule(pid)
+        assert second is not first and second["project_end"] == 9.0
@@ -0,0 +1,51 @@
+from sqlalchemy import create_engine
+
+from app import create_app
+from app.extensions import db, sqlite_profile
+
+
+def setup_app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_profile_applied_on_connect(tmp_path):
+    setup_app()
+    assert sqlite_profile["journal_mode"] == "WAL"
+    engine = create_engine(f"sqlite:///{tmp_path / 'p.db'}")
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar().lower() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA temp_store").scalar() == 2  # MEMORY
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == sqlite_profile["busy_timeout"]
+        assert conn.exec_driver_sql("PRAGMA foreign_keys").scalar() == 1
+    engine.dispose()
+
+
+def test_invalid_values_are_dropped():
+    app = create_app("testing")
+    app.config["SQLITE_SYNCHRONOUS"] = "sometimes; DROP TABLE node"
+    app.config["SQLITE_MMAP_SIZE"] = "lots"
+    from app.extensions import configure_sqlite
+    configure_sqlite(app)
+    assert "synchronous" not in sqlite_profile and "mmap_size" not in sqlite_profile
+    assert sqlite_profile["journal_mode"] == "WAL"
+
+
+def test_health_reports_effective_pragmas():
+    app = setup_app()
+    with app.test_client() as client:
+        data = client.get("/api/v1/health").get_json()["data"]
+        assert data["status"] == "ok"
+        assert data["sqlite"]["foreign_keys"] == 1
+        assert "busy_timeout" in data["sqlite"]
+
+
+def test_maintenance_job_runs_without_error():
+    from app.services.scheduler_jobs import sqlite_maintenance_job
+
+    app = setup_app()
+    with app.app_context():
+        sqlite_maintenance_job()
@@ -0,0 +1,288 @@
+import threading
+import time
+
+import pytest
+
+from app.services import translation
+from app.services.translation import TokenBucket, TranslatedItem, TranslationError, get_limiter, translate_texts
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+def test_token_bucket_spends_burst_then_paces_at_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=4, burst=2, clock=clock, sleep=clock.sleep)
+    waits = [bucket.acquire() for _ in range(5)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2:] == pytest.approx([0.25, 0.25, 0.25])
+    clock.now += 10  # idle time refills at most `burst` tokens
+    assert [bucket.acquire() for _ in range(3)] == pytest.approx([0.0, 0.0, 0.25])
+    assert TokenBucket(rate=0).acquire() == 0.0
+
+
+def test_limiter_settings_come_from_env(monkeypatch):
+    monkeypatch.setenv("TRANSLATION_CONCURRENCY", "3")
+    monkeypatch.setenv("TRANSLATION_MOCK_RATE_LIMIT", "7.5")
+    lim = get_limiter("mock", translation.MockProvider())
+    assert (lim.concurrency, lim.bucket.rate, lim.bucket.burst) == (3, 7.5, 3)
+    assert get_limiter("mock", translation.MockProvider()) is lim
+    monkeypatch.setenv("TRANSLATION_MOCK_CONCURRENCY", "1")
+    assert get_limiter("mock", translation.MockProvider()).concurrency == 1
+
+
+def slow_mock(monkeypatch, delay=0.05):
+    state = {"in_flight": 0, "peak": 0, "calls": 0}
+    lock = threading.Lock()
+
+    def translate(self, texts, target_lang):
+        with lock:
+            state["in_flight"] += 1
+            state["calls"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+        time.sleep(delay)
+        with lock:
+            state["in_flight"] -= 1
+        return [TranslatedItem(f"<{t}>", None) for t in texts]
+
+    monkeypatch.setattr(translation.MockProvider, "translate", translate)
+    return state
+
+
+def test_batches_run_concurrently_up_to_the_cap_and_keep_order(monkeypatch):
+    monkeypatch.setenv("TRANSLATION_BATCH_SIZE", "2")
+    monkeypatch.setenv("TRANSLATION_MOCK_CONCURRENCY", "3")
+    state = slow_mock(monkeypatch)
+    texts = [f"t{i}" for i in range(12)]
+    started = time.monotonic()
+    out = translate_texts(texts, "de", provider="mock")
+    elapsed = time.monotonic() - started
+    assert [t.text for t in out] == [f"<t{i}>" for i in range(12)]
+    assert state["calls"] == 6 and state["peak"] == 3
+    assert elapsed < 6 * 0.05
+
+
+def test_rate_limit_paces_requests(monkeypatch):
+    monkeypatch.setenv("TRANSLATION_BATCH_SIZE", "1")
+    monkeypatch.setenv("TRANSLATION_MOCK_CONCURRENCY", "4")
+    monkeypatch.setenv("TRANSLATION_MOCK_RATE_LIMIT", "50")
+    monkeypatch.setenv("TRANSLATION_MOCK_BURST", "1")
+    slow_mock(monkeypatch, delay=0)
+    started = time.monotonic()
+    translate_texts([f"t{i}" for i in range(6)], "de", provider="mock")
+    assert time.monotonic() - started >= 5 / 50 * 0.9
+
+
+def test_failed_batch_propagates(monkeypatch):
+    monkeypatch.setenv("TRANSLATION_BATCH_SIZE", "1")
+    monkeypatch.setattr(translation.time, "sleep", lambda s: None)
+
+    def translate(self, texts, target_lang):
+        if texts == ["bad"]:
+            raise TranslationError("quota exceeded")
+        return [TranslatedItem(t, None) for t in texts]
+
+    monkeypatch.setattr(translation.MockProvider, "translate", translate)
+    with pytest.raises(TranslationError):
+        translate_texts(["a", "bad", "c"], "de", provider="mock")
+
+
+@pytest.mark.parametrize("result", [[], ["only one"]])
+def test_short_provider_result_is_a_502(monkeypatch, result):
+    monkeypatch.setattr(translation.MockProvider, "translate",
+                        lambda self, texts, lang: [TranslatedItem(t, None) for t in result])
+    with pytest.raises(TranslationError) as exc:
+        translate_texts(["a", "b"], "de", provider="mock")
+    assert exc.value.status == 502
+
+
+class StubDeepL:
+    """Local DeepL-shaped HTTP/1.1 server recording which connection served each request."""
+
+    def __init__(self, fail_first=0):
+        import json
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from urllib.parse import parse_qs
+
+        stub = self
+        self.peers = []
+        self.fail_first = fail_first
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                stub.peers.append(self.client_address)
+                if stub.fail_first > 0:
+                    stub.fail_first -= 1
+                    payload, status = b"busy", 503
+                else:
+                    texts = parse_qs(body.decode())["text"]
+                    payload = json.dumps({"translations": [{"text": t.upper(), "detected_source_language": "EN"} for t in texts]}).encode()
+                    status = 200
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v2/translate"
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_provider_singleton_reuses_one_keepalive_connection(monkeypatch):
+    stub = StubDeepL()
+    try:
+        monkeypatch.setenv("DEEPL_API_KEY", "k")
+        monkeypatch.setenv("DEEPL_API_URL", stub.url)
+        monkeypatch.setenv("TRANSLATION_DEEPL_CONCURRENCY", "1")
+        monkeypatch.setenv("TRANSLATION_DEEPL_RATE_LIMIT", "0")
+        monkeypatch.setenv("TRANSLATION_BATCH_SIZE", "2")
+        assert translation.get_provider("deepl") is translation.get_provider("deepl")
+        out = translate_texts(["a", "b", "c", "d", "e"], "de", provider="deepl")
+        out += translate_texts(["f"], "de", provider="deepl")
+        assert [t.text for t in out] == ["A", "B", "C", "D", "E", "F"]
+        assert len(stub.peers) == 4 and len(set(stub.peers)) == 1
+    finally:
+        stub.close()
+
+
+def test_transient_statuses_are_retried_in_one_layer(monkeypatch):
+    monkeypatch.setattr(translation.time, "sleep", lambda s: None)
+    stub = StubDeepL(fail_first=1)
+    try:
+        # The session itself returns the 503 instead of resending
+        client = translation.DeepLProvider(api_key="k", api_url=stub.url, session=translation.pooled_session(1, retries=2))
+        with pytest.raises(TranslationError, match="503"):
+            client.translate(["x"], "de")
+        assert len(stub.peers) == 1
+
+        monkeypatch.setenv("DEEPL_API_KEY", "k")
+        monkeypatch.setenv("DEEPL_API_URL", stub.url)
+        stub.fail_first = 1
+        assert [t.text for t in translate_texts(["x"], "de", provider="deepl")] == ["X"]
+        assert len(stub.peers) == 3
+        stub.fail_first = 5
+        with pytest.raises(TranslationError, match="503"):
+            translate_texts(["y"], "de", provider="deepl")
+        assert len(stub.peers) == 6
+    finally:
+        stub.close()
+
+
+def test_split_text_prefers_sentence_boundaries_and_round_trips():
+    text = "First sentence here. Second one follows! Third?\nFourth line without end"
+    parts = translation.split_text(text, 45)
+    assert "".join(parts) == text
+    assert parts == ["First sentence here. Second one follows! ", "Third?\nFourth line without end"]
+    long_word = "ж" * 30 + " tail"  # 60 bytes of Cyrillic, no boundary inside
+    parts = translation.split_text(long_word, 16)
+    assert "".join(parts) == long_word and all(len(p.encode()) <= 16 for p in parts)
+    assert translation.split_text("short", 16) == ["short"]
+
+
+def recording_mock(monkeypatch, too_large_over=None):
+    batches = []
+
+    def translate(self, texts, target_lang):
+        size = sum(len(t.encode()) for t in texts)
+        if too_large_over is not None and size > too_large_over and len(texts) > 1:
+            raise TranslationError("413 Request Entity Too Large", status=413)
+        batches.append(list(texts))
+        return [TranslatedItem(t.upper(), None) for t in texts]
+
+    monkeypatch.setattr(translation.MockProvider, "translate", translate)
+    return batches
+
+
+def test_batches_are_packed_by_byte_budget(monkeypatch):
+    monkeypatch.setenv("TRANSLATION_MOCK_CONCURRENCY", "1")
+    monkeypatch.setenv("TRANSLATION_MOCK_MAX_BATCH_BYTES", "101")
+    batches = recording_mock(monkeypatch)
+    titles = [f"t{i:02d}" for i in range(40)]  # 3 bytes each
+    comment = "x" * 90
+    out = translate_texts(titles + [comment], "de", provider="mock")
+    assert [t.text for t in out] == [t.upper() for t in titles] + [comment.upper()]
+    assert all(sum(len(t.encode()) for t in b) <= 101 for b in batches)
+    assert [len(b) for b in batches] == [33, 7, 1]
+
+
+def test_oversized_text_is_split_at_sentences_and_reassembled(monkeypatch):
+    monkeypatch.setenv("TRANSLATION_MOCK_CONCURRENCY", "1")
+    monkeypatch.setenv("TRANSLATION_MOCK_MAX_BATCH_BYTES", "1030")
+    batches = recording_mock(monkeypatch)
+    body = " ".join(f"Sentence {i} " + "word " * 20 + "end." for i in range(20))
+    stats = translation.TranslationStats()
+    out = translate_texts([body, "Title"], "de", provider="mock", stats=stats)
+    assert out[0].text == body.upper() and out[1].text == "TITLE"
+    sent = [t for b in batches for t in b]
+    assert len(sent) > 2 and all(t.endswith("end.") or t == "Title" for t in sent)
+    assert stats.split_texts == 1
+
+
+def test_413_bisects_batch_and_shrinks_budget_for_later_calls(monkeypatch):
+    monkeypatch.setenv("TRANSLATION_MOCK_CONCURRENCY", "1")
+    monkeypatch.setenv("TRANSLATION_MOCK_MAX_BATCH_BYTES", "4000")
+    batches = recording_mock(monkeypatch, too_large_over=1200)
+    texts = [f"{i:03d}" + "a" * 97 for i in range(30)]  # 100 bytes each
+    first = translation.TranslationStats()
+    out = translate_texts(texts, "de", provider="mock", stats=first)
+    assert [t.text for t in out] == [t.upper() for t in texts]
+    assert first.batch_splits >= 2
+    batcher = translation.get_batcher("mock", translation.MockProvider())
+    assert batcher.bytes <= 1200
+    # The next call starts from the learned budget and only probes past it additively
+    second = translation.TranslationStats()
+    out = translate_texts([t + "b" for t in texts], "de", provider="mock", stats=second)
+    assert [t.text for t in out] == [t.upper() + "B" for t in texts]
+    assert second.batch_splits < first.batch_splits
+
+
+@pytest.mark.parametrize("status", [408, 413])
+def test_timeout_and_too_large_bisect_without_resending(monkeypatch, status):
+    monkeypatch.setenv("TRANSLATION_MOCK_CONCURRENCY", "1")
+    monkeypatch.setattr(translation.time, "sleep", lambda s: pytest.fail("408/413 must not be retried"))
+    monkeypatch.setattr(translation, "_batchers", {})
+    calls = []
+
+    def translate(self, texts, target_lang):
+        calls.append(list(texts))
+        if len(texts) > 2:
+            raise TranslationError("too slow", status=status)
+        return [TranslatedItem(t.upper(), None) for t in texts]
+
+    monkeypatch.setattr(translation.MockProvider, "translate", translate)
+    out = translate_texts(["a", "b", "c", "d"], "de", provider="mock")
+    assert [t.text for t in out] == ["A", "B", "C", "D"]
+    assert calls == [["a", "b", "c", "d"], ["a", "b"], ["c", "d"]]
+
+
+def test_adaptive_batcher_aimd():
+    b = translation.AdaptiveBatcher(max_items=50, max_bytes=100_000, target_latency=1.0)
+    b.observe(50, 90_000, latency=3.0, full=True)
+    assert b.limits() == (25, 45_000)
+    b.observe(25, 45_000, latency=0.1, full=True)
+    assert b.limits() == (30, 55_000)
+    b.observe(3, 100, latency=0.1, full=False)  # tail batch says nothing about capacity
+    assert b.limits() == (30, 55_000)
+    b.too_large(1, 10)
+    assert b.limits() == (1, 1024)
@@ -0,0 +1,156 @@
+from app import create_app
+from app.extensions import db
+from app.models import Project, Node, NodeTranslation, TranslationMemory
+from app.repositories.translations import get_stale_node_titles, upsert_node_translations
+from app.services import translation
+from app.services.translation import TranslatedItem, source_hash, translate_texts
+
+
+def setup_app():
+    app = create_app("testing")
+    app.config["LOGIN_DISABLED"] = True
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def count_calls(monkeypatch):
+    calls = []
+    real = translation.MockProvider.translate
+
+    def spy(self, texts, target_lang):
+        calls.append(list(texts))
+        return real(self, texts, target_lang)
+
+    monkeypatch.setattr(translation.MockProvider, "translate", spy)
+    return calls
+
+
+def test_source_hash_normalizes_whitespace_and_unicode_but_not_case():
+    assert source_hash("  Deploy\n to  prod ") == source_hash("Deploy to prod")
+    assert source_hash("Caf\u00e9") == source_hash("Cafe\u0301")
+    assert source_hash("Review") != source_hash("review")
+
+
+def test_memory_serves_repeats_across_calls_and_refresh_bypasses_it(monkeypatch):
+    app = setup_app()
+    calls = count_calls(monkeypatch)
+    with app.app_context():
+        first = translate_texts(["Review", "Deploy"], "uk", provider="mock")
+        again = translate_texts(["Deploy ", "Review", "Plan"], "uk", provider="mock")
+        assert [t.text for t in first] == ["[UK] Review", "[UK] Deploy"]
+        assert [t.text for t in again] == ["[UK] Deploy", "[UK] Review", "[UK] Plan"]
+        assert calls == [["Review", "Deploy"], ["Plan"]]
+        # Keyed per target language and provider
+        translate_texts(["Review"], "de", provider="mock")
+        assert calls[-1] == ["Review"]
+        translate_texts(["Review"], "uk", provider="mock", refresh=True)
+        assert calls[-1] == ["Review"]
+        assert db.session.query(TranslationMemory).count() == 4
+
+
+def test_provider_fallbacks_are_not_memorized(monkeypatch):
+    app = setup_app()
+    monkeypatch.setattr(translation.MockProvider, "translate",
+                        lambda self, texts, lang: [TranslatedItem(t, None, cacheable=False) for t in texts])
+    with app.app_context():
+        translate_texts(["Review"], "uk", provider="mock")
+        assert db.session.query(TranslationMemory).count() == 0
+
+
+def test_memory_writes_leave_the_commit_to_the_caller():
+    app = setup_app()
+    with app.app_context():
+        db.session.add(Project(name="pending"))
+        translate_texts(["Review"], "uk", provider="mock")
+        db.session.rollback()
+        assert db.session.query(Project).count() == 0
+        assert db.session.query(TranslationMemory).count() == 0
+        translate_texts(["Review"], "uk", provider="mock")
+        db.session.commit()
+        assert db.session.query(TranslationMemory).count() == 1
+
+
+def test_stale_check_compares_source_hashes():
+    app = setup_app()
+    with app.app_context():
+        p = Project(name="P")
+        db.session.add(p)
+        db.session.flush()
+        n = Node(project_id=p.id, title="Review")
+        db.session.add(n)
+        db.session.commit()
+        upsert_node_translations([(n.id, "uk", "Огляд", None, "Review")], provider="mock")
+        row = db.session.get(NodeTranslation, (n.id, "uk"))
+        assert row.source_hash == source_hash("Review") and row.provider == "mock"
+
+        n.title = "Review again"
+        db.session.commit()
+        assert get_stale_node_titles(p.id, "uk") == [(n.id, "Review again")]
+        # Renamed back to the translated text: touched, but not stale
+        n.title = "Review"
+        db.session.commit()
+        assert get_stale_node_titles(p.id, "uk") == []
+
+        # Legacy rows without a hash keep the timestamp heuristic
+        row.source_hash = None
+        row.created_at = "2000-01-01T00:00:00Z"
+        db.session.commit()
+        assert get_stale_node_titles(p.id, "uk") == [(n.id, "Review")]
+
+
+def test_project_translate_reuses_memory_across_projects(monkeypatch):
+    app = setup_app()
+    calls = count_calls(monkeypatch)
+    with app.app_context():
+        pids = []
+        for name in ("A", "B"):
+            p = Project(name=name)
+            db.session.add(p)
+            db.session.flush()
+            db.session.add_all([Node(project_id=p.id, title="Deploy"), Node(project_id=p.id, title=f"Only {name}")])
+            pids.append(p.id)
+        db.session.commit()
+    with app.test_client() as client:
+        for pid in pids:
+            res = client.post(f"/api/v1/projects/{pid}/translate", json={"lang": "uk", "provider": "mock"})
+            assert res.get_json()["data"]["translated"] == 2
+    assert sorted(t for batch in calls for t in batch) == ["Deploy", "Only A", "Only B"]
+    with app.app_context():
+        assert {t.text for t in db.session.query(NodeTranslation)} == {"[UK] Deploy", "[UK] Only A", "[UK] Only B"}
+
+
+def test_duplicates_are_translated_once_and_fanned_out_in_order(monkeypatch):
+    calls = count_calls(monkeypatch)
+    stats = translation.TranslationStats()
+    out = translate_texts(["TODO", "Ship", "TODO", " TODO ", "Ship", "Done"], "de", provider="mock", stats=stats)
+    assert [t.text for t in out] == ["[DE] TODO", "[DE] Ship", "[DE] TODO", "[DE] TODO", "[DE] Ship", "[DE] Done"]
+    assert calls == [["TODO", "Ship", "Done"]]
+    assert stats.as_dict() == {"requested": 6, "unique": 3, "memory_hits": 0, "provider_items": 3, "batches": 1,
+                               "split_texts": 0, "batch_splits": 0, "dedup_ratio": 0.5}
+
+
+def test_async_job_reports_dedup_ratio(tmp_path, monkeypatch):
+    import time
+    from app.config import TestingConfig
+
+    monkeypatch.setattr(TestingConfig, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'jobs.db'}")
+    app = setup_app()
+    with app.app_context():
+        p = Project(name="P")
+        db.session.add(p)
+        db.session.flush()
+        db.session.add_all([Node(project_id=p.id, title="TODO") for _ in range(8)] + [Node(project_id=p.id, title="Ship")])
+        db.session.commit()
+        pid = p.id
+    with app.test_client() as client:
+        job_id = client.post(f"/api/v1/projects/{pid}/translate/async", json={"lang": "uk", "provider": "mock"}).get_json()["data"]["job_id"]
+        for _ in range(200):
+            job = client.get(f"/api/v1/jobs/{job_id}").get_json()["data"]
+            if job["status"] in ("finished", "failed"):
+                break
+            time.sleep(0.02)
+    assert job["status"] == "finished" and job["translated"] == 9
+    stats = job["meta"]["stats"]
+    assert (stats["requested"], stats["unique"], stats["provider_items"]) == (9, 2, 2)
+    assert stats["dedup_ratio"] == round(1 - 2 / 9, 4)
@@ -0,0 +1,99 @@
+from sqlalchemy import text
+
+from app import create_app
+from app.extensions import db
+from app.models import Project, Node, Edge, NodeLayout
+from app.services import graph_cache
+from app.services.spatial import node_ids_in_bbox, rtree_available, rebuild_spatial_index
+
+
+def setup_app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+    graph_cache.drop()
+    return app
+
+
+def seed():
+    p = Project(name="P")
+    db.session.add(p)
+    db.session.flush()
+    nodes = {k: Node(project_id=p.id, title=k) for k in "ABCD"}
+    nodes["D"].is_hidden = True
+    db.session.add_all(nodes.values())
+    db.session.flush()
+    for k, (x, y) in {"A": (0, 0), "B": (50, 50), "C": (500, 500), "D": (10, 10)}.items():
+        db.session.add(NodeLayout(node_id=nodes[k].id, x=x, y=y))
+    db.session.add_all([
+        Edge(project_id=p.id, source_node_id=nodes["A"].id, target_node_id=nodes["C"].id),
+        Edge(project_id=p.id, source_node_id=nodes["C"].id, target_node_id=nodes["D"].id),
+    ])
+    db.session.commit()
+    return p.id, {k: v.id for k, v in nodes.items()}
+
+
+def test_rtree_mirror_follows_layout_writes():
+    app = setup_app()
+    with app.app_context():
+        pid, ids = seed()
+        assert rtree_available()
+        assert set(node_ids_in_bbox(pid, -1, -1, 60, 60)) == {ids["A"], ids["B"]}
+        assert set(node_ids_in_bbox(pid, 60, 60, -1, -1, include_hidden=True)) == {ids["A"], ids["B"], ids["D"]}
+        db.session.get(NodeLayout, ids["C"]).x = 20
+        db.session.get(NodeLayout, ids["C"]).y = 20
+        db.session.delete(db.session.get(NodeLayout, ids["B"]))
+        db.session.commit()
+        assert set(node_ids_in_bbox(pid, -1, -1, 60, 60)) == {ids["A"], ids["C"]}
+        count = db.session.execute(text("SELECT count(*) FROM node_layout_rtree")).scalar()
+        assert count == 3
+        assert rebuild_spatial_index() == 3
+
+
+def test_rtree_is_keyed_by_stable_spatial_id_not_rowid():
+    app = setup_app()
+    with app.app_context():
+        pid, ids = seed()
+        before = dict(db.session.execute(text("SELECT node_id, spatial_id FROM node_layout")).all())
+        # What VACUUM may do to a table without an INTEGER PRIMARY KEY: renumber rowids
+        db.session.execute(text("UPDATE node_layout SET rowid = 1000 - rowid"))
+        db.session.commit()
+        assert dict(db.session.execute(text("SELECT node_id, spatial_id FROM node_layout")).all()) == before
+        assert node_ids_in_bbox(pid, 400, 400, 600, 600) == [ids["C"]]
+        assert set(node_ids_in_bbox(pid, -1, -1, 60, 60)) == {ids["A"], ids["B"]}
+        # New rows get fresh keys and stay indexed
+        db.session.delete(db.session.get(NodeLayout, ids["B"]))
+        db.session.commit()
+        db.session.add(NodeLayout(node_id=ids["B"], x=700, y=700))
+        db.session.commit()
+        assert node_ids_in_bbox(pid, 650, 650, 750, 750) == [ids["B"]]
+        assert rebuild_spatial_index() == 4
+
+
+def test_graph_bbox_returns_viewport_nodes_and_incident_edges():
+    app = setup_app()
+    with app.app_context():
+        pid, ids = seed()
+    with app.test_client() as client:
+        res = client.get(f"/api/v1/projects/{pid}/graph?bbox=-1,-1,60,60")
+        data = res.get_json()["data"]
+        assert {n["id"] for n in data["nodes"]} == {ids["A"], ids["B"]}
+        assert len(data["edges"]) == 1 and data["edges"][0]["target_node_id"] == ids["C"]
+        assert data["bbox"] == [-1, -1, 60, 60]
+        full_etag = client.get(f"/api/v1/projects/{pid}/graph").headers["ETag"]
+        assert res.headers["ETag"] != full_etag
+        lod = client.get(f"/api/v1/projects/{pid}/graph?min_lod=0.9").get_json()["data"]
+        assert {n["id"] for n in lod["nodes"]} == {ids["A"]}
+        assert client.get(f"/api/v1/projects/{pid}/graph?bbox=1,2,3").status_code == 400
+
+
+def test_range_fallback_without_rtree():
+    app = setup_app()
+    with app.app_context():
+        pid, ids = seed()
+        db.session.execute(text("DROP TABLE node_layout_rtree"))
+        for t in ("ai", "au", "ad"):
+            db.session.execute(text(f"DROP TRIGGER node_layout_rtree_{t}"))
+        db.session.commit()
+        assert not rtree_available()
+        assert set(node_ids_in_bbox(pid, -1, -1, 60, 60)) == {ids["A"], ids["B"]}
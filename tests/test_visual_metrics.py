@@ -0,0 +1,135 @@
+import random
+
+from app import create_app
+from app.extensions import db
+from app.models import Project, Node, Edge
+from app.services import graph_cache
+from app.services.graph_analysis import node_visual_metrics
+
+
+def setup_app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+    graph_cache.drop()
+    return app
+
+
+def brute_force(nodes, edges):
+    adj = {n: [] for n in nodes}
+    for s, t in edges:
+        if s in adj and t in adj:
+            adj[s].append(t)
+    out = {}
+    for n in nodes:
+        seen, todo = {n}, [n]
+        while todo:
+            for v in adj[todo.pop()]:
+                if v not in seen:
+                    seen.add(v)
+                    todo.append(v)
+        deg = sum(1 for s, t in edges if s in adj and t in adj and n in (s, t))
+        out[n] = (len(seen) - 1, deg)
+    return out
+
+
+def test_descendants_and_degree_match_bfs_including_cycles_and_hidden():
+    app = setup_app()
+    with app.app_context():
+        p = Project(name="P")
+        db.session.add(p)
+        db.session.flush()
+        rnd = random.Random(3)
+        nodes = [Node(project_id=p.id, title=str(i), is_hidden=(i % 9 == 0)) for i in range(30)]
+        db.session.add_all(nodes)
+        db.session.flush()
+        ids = [n.id for n in nodes]
+        pairs = set()
+        while len(pairs) < 50:
+            a, b = rnd.sample(range(30), 2)
+            pairs.add((ids[a], ids[b]))
+        db.session.add_all([Edge(project_id=p.id, source_node_id=s, target_node_id=t) for s, t in pairs])
+        db.session.commit()
+
+        visible = [n.id for n in nodes if not n.is_hidden]
+        for include_hidden, subset in ((True, ids), (False, visible)):
+            got = node_visual_metrics(p.id, include_hidden)
+            expected = brute_force(subset, pairs)
+            assert {k: v[:2] for k, v in got.items()} == expected
+            assert max(v[2] for v in got.values()) <= 1.0
+
+
+def test_graph_payload_carries_derived_fields():
+    app = setup_app()
+    with app.app_context():
+        p = Project(name="P")
+        db.session.add(p)
+        db.session.flush()
+        a, b, c = (Node(project_id=p.id, title=t) for t in "ABC")
+        db.session.add_all([a, b, c])
+        db.session.flush()
+        db.session.add_all([
+            Edge(project_id=p.id, source_node_id=a.id, target_node_id=b.id),
+            Edge(project_id=p.id, source_node_id=b.id, target_node_id=c.id),
+        ])
+        db.session.commit()
+        pid, aid, cid = p.id, a.id, c.id
+    with app.test_client() as client:
+        nodes = {n["id"]: n for n in client.get(f"/api/v1/projects/{pid}/graph").get_json()["data"]["nodes"]}
+        assert (nodes[aid]["descendants"], nodes[aid]["degree"], nodes[aid]["lod_score"]) == (2, 1, 0.7)
+        assert nodes[cid]["descendants"] == 0
+        block = client.get(f"/api/v1/projects/{pid}/graph?format=columnar").get_json()["data"]["nodes"]
+        assert {"descendants", "degree", "lod_score"} <= set(block["fields"])
+
+
+def test_metrics_are_patched_incrementally_and_survive_non_structural_writes():
+    app = setup_app()
+    with app.app_context():
+        p = Project(name="P")
+        db.session.add(p)
+        db.session.flush()
+        rnd = random.Random(11)
+        nodes = [Node(project_id=p.id, title=str(i), is_hidden=(i % 7 == 0)) for i in range(25)]
+        db.session.add_all(nodes)
+        db.session.flush()
+        for _ in range(35):
+            a, b = rnd.sample(nodes, 2)
+            db.session.add(Edge(project_id=p.id, source_node_id=a.id, target_node_id=b.id))
+        db.session.commit()
+
+        first = node_visual_metrics(p.id)
+        node_visual_metrics(p.id, True)
+        # Hours and titles do not touch the memo
+        nodes[1].planned_hours = 5
+        nodes[2].title = "renamed"
+        db.session.commit()
+        assert node_visual_metrics(p.id) is first
+
+        g = graph_cache.get_graph(p.id)
+        states = g.visual_metrics
+        for _ in range(40):
+            op = rnd.choice(["add", "delete", "hide", "node", "drop"])
+            alive = db.session.query(Node).filter_by(project_id=p.id).all()
+            if op == "add":
+                a, b = rnd.sample(alive, 2)
+                db.session.add(Edge(project_id=p.id, source_node_id=a.id, target_node_id=b.id))
+            elif op == "delete":
+                e = db.session.query(Edge).filter_by(project_id=p.id).first()
+                if e is not None:
+                    db.session.delete(e)
+            elif op == "hide":
+                n = rnd.choice(alive)
+                n.is_hidden = not n.is_hidden
+            elif op == "node":
+                db.session.add(Node(project_id=p.id, title="new"))
+            else:
+                db.session.delete(rnd.choice(alive))
+            db.session.commit()
+            assert graph_cache.get_graph(p.id) is g
+            every = [n.id for n in db.session.query(Node).filter_by(project_id=p.id)]
+            visible = [n.id for n in db.session.query(Node).filter_by(project_id=p.id, is_hidden=False)]
+            pairs = [(e.source_node_id, e.target_node_id) for e in db.session.query(Edge).filter_by(project_id=p.id)]
+            for include_hidden, subset in ((True, every), (False, visible)):
+                got = node_visual_metrics(p.id, include_hidden)
+                assert {k: v[:2] for k, v in got.items()} == brute_force(subset, pairs)
+        assert states[False].full_recomputes == 1 and states[True].full_recomputes == 1